@@ -0,0 +1,134 @@
+/*
+ * Micro-benchmark for the byteswapping of numeric vectors, R files being big
+ * endian. Reader path: byteswap8_copy / byteswap4_copy from the input into the
+ * destination array against the element by element loop used before. Writer
+ * path: rdata_append_real_values / rdata_append_int32_values against one
+ * rdata_append_*_value call per element, writing to a callback that discards
+ * the data.
+ *
+ * build and run from the repository root:
+ *   cc -O3 -Ipyreadr/libs/librdata/src -DHAVE_ZLIB -DHAVE_BZIP2 -DHAVE_LZMA \
+ *       benchmarks/bench_byteswap.c pyreadr/libs/librdata/src/rdata_bits.c \
+ *       pyreadr/libs/librdata/src/rdata_write.c pyreadr/libs/librdata/src/CKHashTable.c \
+ *       -o bench_byteswap
+ *   ./bench_byteswap [count]
+ */
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <time.h>
+
+#include "rdata.h"
+#include "rdata_bits.h"
+
+#define REPEAT 5
+
+static double now(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec * 1e-9;
+}
+
+static void scalar8(double *dst, const double *src, size_t count) {
+    size_t i;
+    for (i=0; i<count; i++)
+        dst[i] = byteswap_double(src[i]);
+}
+
+static void scalar4(int32_t *dst, const int32_t *src, size_t count) {
+    size_t i;
+    for (i=0; i<count; i++)
+        dst[i] = byteswap4(src[i]);
+}
+
+static ssize_t discard(const void *bytes, size_t len, void *ctx) {
+    *(size_t *)ctx += len;
+    return len;
+}
+
+static void report(const char *name, double seconds, size_t bytes) {
+    printf("%-34s %8.2f ms %8.2f GB/s\n", name, 1000 * seconds, bytes / seconds / 1e9);
+}
+
+int main(int argc, char *argv[]) {
+    size_t count = argc > 1 ? strtoul(argv[1], NULL, 10) : 10000000;
+    double *doubles = malloc(count * sizeof(double));
+    double *doubles_out = malloc(count * sizeof(double));
+    int32_t *ints = malloc(count * sizeof(int32_t));
+    int32_t *ints_out = malloc(count * sizeof(int32_t));
+    size_t i;
+    int r;
+
+    for (i=0; i<count; i++) {
+        doubles[i] = i * 0.5;
+        ints[i] = (int32_t)i;
+    }
+    printf("elements: %zu\n\nreader\n", count);
+
+    double best_scalar = 1e9, best_bulk = 1e9;
+    for (r=0; r<REPEAT; r++) {
+        double start = now();
+        scalar8(doubles_out, doubles, count);
+        double middle = now();
+        byteswap8_copy(doubles_out, doubles, count);
+        double end = now();
+        best_scalar = middle - start < best_scalar ? middle - start : best_scalar;
+        best_bulk = end - middle < best_bulk ? end - middle : best_bulk;
+    }
+    report("double per element", best_scalar, count * sizeof(double));
+    report("double byteswap8_copy", best_bulk, count * sizeof(double));
+
+    best_scalar = 1e9, best_bulk = 1e9;
+    for (r=0; r<REPEAT; r++) {
+        double start = now();
+        scalar4(ints_out, ints, count);
+        double middle = now();
+        byteswap4_copy(ints_out, ints, count);
+        double end = now();
+        best_scalar = middle - start < best_scalar ? middle - start : best_scalar;
+        best_bulk = end - middle < best_bulk ? end - middle : best_bulk;
+    }
+    report("int32 per element", best_scalar, count * sizeof(int32_t));
+    report("int32 byteswap4_copy", best_bulk, count * sizeof(int32_t));
+
+    printf("\nwriter\n");
+    size_t written = 0;
+    rdata_writer_t *writer = rdata_writer_init(&discard, RDATA_WORKSPACE);
+    writer->user_ctx = &written;
+
+    best_scalar = 1e9, best_bulk = 1e9;
+    for (r=0; r<REPEAT; r++) {
+        double start = now();
+        for (i=0; i<count; i++)
+            rdata_append_real_value(writer, doubles[i]);
+        double middle = now();
+        rdata_append_real_values(writer, doubles, count);
+        double end = now();
+        best_scalar = middle - start < best_scalar ? middle - start : best_scalar;
+        best_bulk = end - middle < best_bulk ? end - middle : best_bulk;
+    }
+    report("double rdata_append_real_value", best_scalar, count * sizeof(double));
+    report("double rdata_append_real_values", best_bulk, count * sizeof(double));
+
+    best_scalar = 1e9, best_bulk = 1e9;
+    for (r=0; r<REPEAT; r++) {
+        double start = now();
+        for (i=0; i<count; i++)
+            rdata_append_int32_value(writer, ints[i]);
+        double middle = now();
+        rdata_append_int32_values(writer, ints, count);
+        double end = now();
+        best_scalar = middle - start < best_scalar ? middle - start : best_scalar;
+        best_bulk = end - middle < best_bulk ? end - middle : best_bulk;
+    }
+    report("int32 rdata_append_int32_value", best_scalar, count * sizeof(int32_t));
+    report("int32 rdata_append_int32_values", best_bulk, count * sizeof(int32_t));
+
+    rdata_writer_free(writer);
+    free(doubles);
+    free(doubles_out);
+    free(ints);
+    free(ints_out);
+    return 0;
+}
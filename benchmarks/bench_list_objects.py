@@ -0,0 +1,66 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for list_objects: a RData file with several data frames is
+generated and the objects are listed with list_objects, with and without
+detailed=True, and compared with reading the whole file with read_r. The
+estimated memory size of the objects is compared with the actual size of
+the data frames.
+
+usage: python benchmarks/bench_list_objects.py [--inplace] [--objects N] [--rows N] [--compress gzip|bzip2|xz|none]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rdata_bytes, write_file, timed
+
+
+def make_objects(objects, rows):
+    rng = np.random.default_rng(0)
+    data = dict()
+    for objno in range(objects):
+        data["df%d" % objno] = {
+            "num": Column("REAL", rng.random(rows)),
+            "int": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+            "char": Column("STRING", ["id%d" % x for x in rng.integers(0, 1000, rows).tolist()]),
+        }
+    return data
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--objects", type=int, default=10)
+    argparser.add_argument("--rows", type=int, default=500_000)
+    argparser.add_argument("--compress", default="gzip")
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    compress = None if args.compress == "none" else args.compress
+    print("package location:", pyreadr.__file__)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = write_file(os.path.join(tmpdir, "workspace.RData"),
+                          rdata_bytes(make_objects(args.objects, args.rows), compress))
+        print("objects: %d, rows per object: %d, compression: %s, file size %.1f MB" % (
+            args.objects, args.rows, args.compress, os.path.getsize(path) / 1e6))
+        elapsed, _ = timed(pyreadr.list_objects, path)
+        print("list_objects                 %8.3f s" % elapsed)
+        elapsed, objects = timed(pyreadr.list_objects, path, detailed=True)
+        print("list_objects(detailed=True)  %8.3f s" % elapsed)
+        elapsed, result = timed(pyreadr.read_r, path)
+        print("read_r                       %8.3f s" % elapsed)
+        estimated = sum(obj["memory_size"] for obj in objects) / 1e6
+        actual = sum(df.memory_usage(deep=True).sum() for df in result.values()) / 1e6
+        print("memory size: estimated %.1f MB, actual %.1f MB" % (estimated, actual))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+@author: Otto Fajardo
+
+Memory benchmark for read_r_iter: a RData file with several data frames is
+read with read_r, which keeps all of them in memory, and with read_r_iter,
+consuming (and dropping) one object at a time. Each mode runs in its own
+process and the peak resident memory is reported. (On linux the peak is
+inherited through exec, therefore the parent process must stay small.)
+
+usage: python benchmarks/bench_memory_iter.py [--inplace] [--objects N] [--rows N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+script = os.path.realpath(__file__)
+script_folder = os.path.dirname(script)
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rdata_bytes, write_file, peak_rss_mb, run_child
+
+
+def make_file(path, objects, rows):
+    rng = np.random.default_rng(0)
+    data = dict()
+    for objno in range(objects):
+        data["df%d" % objno] = {
+            "num": Column("REAL", rng.random(rows)),
+            "int": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+        }
+    return write_file(path, rdata_bytes(data, "gzip"))
+
+
+def measure(path, iterate):
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    total_rows = 0
+    if iterate:
+        for name, df in pyreadr.read_r_iter(path):
+            total_rows += len(df)
+    else:
+        for name, df in pyreadr.read_r(path).items():
+            total_rows += len(df)
+    elapsed = time.perf_counter() - start
+    print("%-12s %8.3f s  peak +%8.1f MB  rows %d" % (
+        "read_r_iter" if iterate else "read_r", elapsed, peak_rss_mb() - before, total_rows))
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--objects", type=int, default=10)
+    argparser.add_argument("--rows", type=int, default=2_000_000)
+    argparser.add_argument("--make", default=None, help=argparse.SUPPRESS)
+    argparser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    argparser.add_argument("--iterate", action="store_true", help=argparse.SUPPRESS)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+
+    if args.make:
+        make_file(args.make, args.objects, args.rows)
+        return
+    if args.child:
+        measure(args.child, args.iterate)
+        return
+
+    print("objects: %d, rows per object: %d" % (args.objects, args.rows))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "objects.RData")
+        run_child(script, "--make", path, "--objects", args.objects, "--rows", args.rows)
+        run_child(script, "--child", path, inplace=args.inplace)
+        run_child(script, "--child", path, "--iterate", inplace=args.inplace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+@author: Otto Fajardo
+
+Memory benchmark for integer columns with missing values: a 10M row integer
+column with 1% NA is read with use_nullable_dtypes False (object dtype) and
+True (Int32 masked array). The file is generated and each mode runs in
+its own process, the peak resident memory of the read is reported together
+with the size of the resulting data frame. (On linux the peak is inherited
+through exec, therefore the parent process must stay small.)
+
+usage: python benchmarks/bench_memory_nullable.py [--inplace] [--rows N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+script = os.path.realpath(__file__)
+script_folder = os.path.dirname(script)
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, R_NA_INTEGER, rds_bytes, write_file, peak_rss_mb, run_child
+
+
+def make_file(path, rows):
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 1000, rows, dtype=np.int32)
+    values[rng.random(rows) < 0.01] = R_NA_INTEGER
+    return write_file(path, rds_bytes({"x": Column("INT32", values)}))
+
+
+def measure(path, use_nullable_dtypes):
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    df = pyreadr.read_r(path, use_nullable_dtypes=use_nullable_dtypes)[None]
+    elapsed = time.perf_counter() - start
+    df_size = df.memory_usage(deep=True).sum() / 1e6
+    print("%-22s %8.3f s  peak +%8.1f MB  data frame %8.1f MB  dtype %s" % (
+        "use_nullable_dtypes=%s" % use_nullable_dtypes, elapsed, peak_rss_mb() - before, df_size, df["x"].dtype))
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=10_000_000)
+    argparser.add_argument("--make", default=None, help=argparse.SUPPRESS)
+    argparser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    argparser.add_argument("--nullable", action="store_true", help=argparse.SUPPRESS)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+
+    if args.make:
+        make_file(args.make, args.rows)
+        return
+    if args.child:
+        measure(args.child, args.nullable)
+        return
+
+    print("rows: %d, 1%% NA" % args.rows)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "int_na.rds")
+        run_child(script, "--make", path, "--rows", args.rows)
+        run_child(script, "--child", path, inplace=args.inplace)
+        run_child(script, "--child", path, "--nullable", inplace=args.inplace)
+
+
+if __name__ == "__main__":
+    main()
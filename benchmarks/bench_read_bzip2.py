@@ -0,0 +1,60 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for the block parallel bzip2 decompression: a data frame with numeric,
+integer and character columns is written with bzip2 compression and read with
+1, 2, 4 ... threads up to the number of cpus (at least 2). With 1 thread the
+file is decompressed sequentially in the calling thread, with more the blocks
+are decompressed in parallel, so the gain grows with the number of cores.
+
+usage: python benchmarks/bench_read_bzip2.py [--inplace] [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rdata_bytes, write_file, best_of
+
+
+def make_columns(rows):
+    rng = np.random.default_rng(0)
+    return {
+        "num": Column("REAL", rng.random(rows)),
+        "int": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+        "char": Column("STRING", ["id%d" % x for x in rng.integers(0, 1000, rows).tolist()]),
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=2_000_000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    cores = os.cpu_count() or 1
+    print("package location:", pyreadr.__file__)
+    print("rows: %d, cores: %d" % (args.rows, cores))
+    thread_counts = [1]
+    while thread_counts[-1] < max(cores, 2):
+        thread_counts.append(min(2 * thread_counts[-1], max(cores, 2)))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = write_file(os.path.join(tmpdir, "df_bzip2.RData"), rdata_bytes({"df": make_columns(args.rows)}, "bzip2"))
+        print("file size: %.1f MB" % (os.path.getsize(path) / 1e6))
+        single = None
+        for threads in thread_counts:
+            elapsed = best_of(args.repeat, pyreadr.read_r, path, threads=threads)
+            single = single or elapsed
+            print("threads=%-3d %8.3f s  speedup %5.2f" % (threads, elapsed, single / elapsed))
+
+
+if __name__ == "__main__":
+    main()
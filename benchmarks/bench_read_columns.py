@@ -0,0 +1,65 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for read_r with use_columns: a wide data frame with numeric,
+integer and character columns is generated and a few of its columns are read,
+compared with reading the whole data frame.
+
+usage: python benchmarks/bench_read_columns.py [--inplace] [--columns N] [--rows N] [--select N] [--compress gzip|bzip2|xz|none]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rdata_bytes, write_file, timed
+
+
+def make_columns(columns, rows):
+    rng = np.random.default_rng(0)
+    labels = ["id%d" % x for x in rng.integers(0, 1000, rows).tolist()]
+    data = dict()
+    for colno in range(columns):
+        kind = colno % 3
+        if kind == 0:
+            data["col%d" % colno] = Column("REAL", rng.random(rows))
+        elif kind == 1:
+            data["col%d" % colno] = Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32))
+        else:
+            data["col%d" % colno] = Column("STRING", labels)
+    return data
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--columns", type=int, default=400)
+    argparser.add_argument("--rows", type=int, default=50_000)
+    argparser.add_argument("--select", type=int, default=5)
+    argparser.add_argument("--compress", default="gzip")
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    compress = None if args.compress == "none" else args.compress
+    print("package location:", pyreadr.__file__)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = write_file(os.path.join(tmpdir, "wide.RData"),
+                          rdata_bytes({"wide": make_columns(args.columns, args.rows)}, compress))
+        print("columns: %d, rows: %d, compression: %s, file size %.1f MB" % (
+            args.columns, args.rows, args.compress, os.path.getsize(path) / 1e6))
+        step = args.columns // args.select
+        use_columns = ["col%d" % colno for colno in range(0, args.columns, step)][:args.select]
+        elapsed, _ = timed(pyreadr.read_r, path)
+        print("read_r                      %8.3f s" % elapsed)
+        elapsed, result = timed(pyreadr.read_r, path, use_columns=use_columns)
+        print("read_r(use_columns=%d cols)  %8.3f s" % (result["wide"].shape[1], elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for read_r with an index: a gzip compressed RData file with several
+data frames and a small one at the end is generated, and the last object is
+read with use_objects with and without an index built with build_index.
+
+usage: python benchmarks/bench_read_indexed.py [--inplace] [--objects N] [--rows N] [--compress gzip|bzip2|xz|none]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rdata_bytes, write_file, timed
+
+
+def make_objects(objects, rows):
+    rng = np.random.default_rng(0)
+    data = dict()
+    for objno in range(objects):
+        data["df%d" % objno] = {
+            "num": Column("REAL", rng.random(rows)),
+            "int": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+            "char": Column("STRING", ["id%d" % x for x in rng.integers(0, 1000, rows).tolist()]),
+        }
+    data["lookup"] = {"code": Column("INT32", np.arange(100, dtype=np.int32))}
+    return data
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--objects", type=int, default=20)
+    argparser.add_argument("--rows", type=int, default=500_000)
+    argparser.add_argument("--compress", default="gzip")
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    compress = None if args.compress == "none" else args.compress
+    print("package location:", pyreadr.__file__)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = write_file(os.path.join(tmpdir, "workspace.RData"),
+                          rdata_bytes(make_objects(args.objects, args.rows), compress))
+        print("objects: %d, rows per object: %d, compression: %s, file size %.1f MB" % (
+            args.objects, args.rows, args.compress, os.path.getsize(path) / 1e6))
+        elapsed, index_path = timed(pyreadr.build_index, path)
+        print("build_index            %8.3f s  index size %.1f KB" % (elapsed, os.path.getsize(index_path) / 1e3))
+        elapsed, _ = timed(pyreadr.read_r, path, use_objects=["lookup"])
+        print("read_r without index   %8.3f s" % elapsed)
+        elapsed, _ = timed(pyreadr.read_r, path, use_objects=["lookup"], index=True)
+        print("read_r with index      %8.3f s" % elapsed)
+
+
+if __name__ == "__main__":
+    main()
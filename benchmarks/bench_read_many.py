@@ -0,0 +1,63 @@
+"""
+@author: Otto Fajardo
+
+Scaling benchmark for read_r_many: a set of gzip compressed Rds files is read
+with 1, 2, ... up to the number of cores threads.
+
+usage: python benchmarks/bench_read_many.py [--inplace] [--files N] [--rows N] [--max-workers N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rds_bytes, write_file
+
+
+def make_columns(rows, seed):
+    rng = np.random.default_rng(seed)
+    return {
+        "num": Column("REAL", rng.random(rows)),
+        "int": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+        "char": Column("STRING", ["id%d" % x for x in rng.integers(0, 1000, rows).tolist()]),
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--files", type=int, default=32)
+    argparser.add_argument("--rows", type=int, default=200_000)
+    argparser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    print("files: %d, rows per file: %d, cores: %d" % (args.files, args.rows, os.cpu_count()))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = list()
+        for fileno in range(args.files):
+            path = os.path.join(tmpdir, "file%d.rds" % fileno)
+            paths.append(write_file(path, rds_bytes(make_columns(args.rows, fileno), "gzip")))
+        # warm up the os cache
+        pyreadr.read_r_many(paths, max_workers=1)
+        single = None
+        workers = 1
+        while workers <= args.max_workers:
+            start = time.perf_counter()
+            pyreadr.read_r_many(paths, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            single = single or elapsed
+            print("workers %3d  %8.3f s  speedup %5.2f" % (workers, elapsed, single / elapsed))
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
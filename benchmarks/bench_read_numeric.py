@@ -0,0 +1,53 @@
+"""
+@author: Otto Fajardo
+
+Benchmark reading numeric columns: one Rds file per R type (REAL, INT32,
+LOGICAL, TIMESTAMP and DATE) is generated and read with pyreadr.read_r.
+
+usage: python benchmarks/bench_read_numeric.py [--inplace] [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rds_bytes, write_file, best_of
+
+
+def make_columns(rows):
+    rng = np.random.default_rng(0)
+    return {
+        "REAL": Column("REAL", rng.random(rows)),
+        "INT32": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+        "LOGICAL": Column("LOGICAL", rng.integers(0, 2, rows, dtype=np.int32)),
+        "TIMESTAMP": Column("TIMESTAMP", rng.integers(0, 2e9, rows).astype(np.float64)),
+        "DATE": Column("DATE", rng.integers(0, 20000, rows).astype(np.float64)),
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=5_000_000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    print("rows: %d" % args.rows)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, column in make_columns(args.rows).items():
+            path = write_file(os.path.join(tmpdir, name + ".rds"), rds_bytes({"x": column}))
+            elapsed = best_of(args.repeat, pyreadr.read_r, path)
+            size_mb = os.path.getsize(path) / 1e6
+            print("%-10s %8.3f s  %8.1f MB/s" % (name, elapsed, size_mb / elapsed))
+
+
+if __name__ == "__main__":
+    main()
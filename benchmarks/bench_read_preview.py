@@ -0,0 +1,77 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for read_r with nrows: a long data frame with numeric, integer and
+character columns is generated and its first rows are read, compared with
+reading the whole data frame. Each read runs in its own process, the peak
+resident memory of the read is reported as well.
+
+usage: python benchmarks/bench_read_preview.py [--inplace] [--rows N] [--nrows N] [--compress gzip|bzip2|xz|none]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+script = os.path.realpath(__file__)
+script_folder = os.path.dirname(script)
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rds_bytes, write_file, peak_rss_mb, run_child
+
+
+def make_file(path, rows, compress):
+    rng = np.random.default_rng(0)
+    columns = {
+        "num": Column("REAL", rng.random(rows)),
+        "int": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+        "char": Column("STRING", ["id%d" % x for x in rng.integers(0, 1000, rows).tolist()]),
+    }
+    return write_file(path, rds_bytes(columns, compress))
+
+
+def measure(path, nrows):
+    import pyreadr
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    df = pyreadr.read_r(path, nrows=nrows)[None]
+    elapsed = time.perf_counter() - start
+    print("%-16s %8.3f s  peak +%8.1f MB  rows %d" % (
+        "nrows=%s" % nrows, elapsed, peak_rss_mb() - before, len(df)))
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=5_000_000)
+    argparser.add_argument("--nrows", type=int, default=100)
+    argparser.add_argument("--compress", default="none")
+    argparser.add_argument("--make", default=None, help=argparse.SUPPRESS)
+    argparser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    argparser.add_argument("--child-nrows", type=int, default=None, help=argparse.SUPPRESS)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+
+    compress = None if args.compress == "none" else args.compress
+    if args.make:
+        make_file(args.make, args.rows, compress)
+        return
+    if args.child:
+        measure(args.child, args.child_nrows)
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "long.rds")
+        run_child(script, "--make", path, "--rows", args.rows, "--compress", args.compress)
+        print("rows: %d, compression: %s, file size %.1f MB" % (
+            args.rows, args.compress, os.path.getsize(path) / 1e6))
+        run_child(script, "--child", path, inplace=args.inplace)
+        run_child(script, "--child", path, "--child-nrows", args.nrows, inplace=args.inplace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for reading one small object out of a large workspace with
+use_objects: a RData file with a large data frame followed by a small one is
+generated and only the small one is read. The large object is skipped by
+librdata without being handed to python. Each read runs in its own process
+and the peak resident memory is reported together with the time.
+
+usage: python benchmarks/bench_read_selected.py [--inplace] [--rows N] [--compress gzip|bzip2|xz|none]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+script = os.path.realpath(__file__)
+script_folder = os.path.dirname(script)
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rdata_bytes, write_file, peak_rss_mb, run_child
+
+
+def make_file(path, rows, compress):
+    rng = np.random.default_rng(0)
+    data = {
+        "big": {
+            "num": Column("REAL", rng.random(rows)),
+            "int": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+            "char": Column("STRING", ["id%d" % x for x in rng.integers(0, 1000, rows // 10).tolist()] * 10),
+        },
+        "lookup": {"code": Column("INT32", np.arange(100, dtype=np.int32))},
+    }
+    return write_file(path, rdata_bytes(data, compress))
+
+
+def measure(path, use_objects):
+    import pyreadr
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    pyreadr.read_r(path, use_objects=use_objects)
+    elapsed = time.perf_counter() - start
+    print("%-24s %8.3f s  peak +%8.1f MB" % ("use_objects=%s" % use_objects, elapsed, peak_rss_mb() - before))
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=10_000_000)
+    argparser.add_argument("--compress", default="gzip")
+    argparser.add_argument("--make", default=None, help=argparse.SUPPRESS)
+    argparser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    argparser.add_argument("--objects", default=None, help=argparse.SUPPRESS)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+
+    compress = None if args.compress == "none" else args.compress
+    if args.make:
+        make_file(args.make, args.rows, compress)
+        return
+    if args.child:
+        measure(args.child, args.objects.split(",") if args.objects else None)
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "workspace.RData")
+        run_child(script, "--make", path, "--rows", args.rows, "--compress", args.compress)
+        print("rows of the big object: %d, compression: %s, file size %.1f MB" % (
+            args.rows, args.compress, os.path.getsize(path) / 1e6))
+        for objects in ("lookup", ""):
+            run_child(script, "--child", path, "--objects", objects, inplace=args.inplace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for the read buffer: a character column of short strings means three
+small reads per element (header, length and the characters), served from a
+buffer of decompressed data instead of one call into the decompressor (or one
+read system call) each. The column is read uncompressed without and with
+memory mapping (where the buffer is not used) and with each compression.
+
+usage: python benchmarks/bench_read_short_strings.py [--inplace] [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rds_bytes, write_file, best_of
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=10_000_000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    print("rows: %d" % args.rows)
+    rng = np.random.default_rng(0)
+    codes = ["c%d" % x for x in rng.integers(0, 100, args.rows).tolist()]
+    columns = {"code": Column("STRING", codes)}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for compress in (None, "gzip", "bzip2", "xz"):
+            path = write_file(os.path.join(tmpdir, "codes_%s.rds" % compress), rds_bytes(columns, compress))
+            options = [("mmap=False", dict(mmap=False)), ("mmap=True", dict(mmap=True))] if compress is None else [("", {})]
+            for label, kwargs in options:
+                elapsed = best_of(args.repeat, pyreadr.read_r, path, threads=1, **kwargs)
+                print("%-13s %8.3f s  %6.1f M strings/s" % (
+                    "%s %s" % (compress or "none", label), elapsed, args.rows / elapsed / 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+@author: Otto Fajardo
+
+Benchmark reading character columns: short ids, longer free text and
+a column with missing values.
+
+usage: python benchmarks/bench_read_strings.py [--inplace] [--rows N] [--repeat N] [--compress gzip|bzip2|xz]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rds_bytes, write_file, best_of
+
+
+def make_columns(rows):
+    rng = np.random.default_rng(0)
+    ids = ["id%08d" % x for x in range(rows)]
+    words = np.array(["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit"])
+    text = [" ".join(x) for x in words[rng.integers(0, len(words), (rows, 8))].tolist()]
+    with_na = [None if x % 10 == 0 else ids[x] for x in range(rows)]
+    return {
+        "ids": Column("STRING", ids),
+        "text": Column("STRING", text),
+        "with_na": Column("STRING", with_na),
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=2_000_000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    argparser.add_argument("--compress", choices=["gzip", "bzip2", "xz"], default=None)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    print("rows: %d, compression: %s" % (args.rows, args.compress))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, column in make_columns(args.rows).items():
+            path = write_file(os.path.join(tmpdir, name + ".rds"), rds_bytes({"x": column}, args.compress))
+            elapsed = best_of(args.repeat, pyreadr.read_r, path)
+            print("%-10s %8.3f s  %10.0f rows/s" % (name, elapsed, args.rows / elapsed))
+
+
+if __name__ == "__main__":
+    main()
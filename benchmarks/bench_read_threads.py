@@ -0,0 +1,55 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for the background decompression thread: a data frame with numeric,
+integer and character columns is written with each compression and read with
+threads=1 (decompression and parsing in the same thread) and threads=2
+(decompression in a background thread). The gain needs at least 2 cores.
+
+usage: python benchmarks/bench_read_threads.py [--inplace] [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import Column, rdata_bytes, write_file, best_of
+
+
+def make_columns(rows):
+    rng = np.random.default_rng(0)
+    return {
+        "num": Column("REAL", rng.random(rows)),
+        "int": Column("INT32", rng.integers(0, 1000, rows, dtype=np.int32)),
+        "char": Column("STRING", ["id%d" % x for x in rng.integers(0, 1000, rows).tolist()]),
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=2_000_000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    print("rows: %d, cores: %d" % (args.rows, os.cpu_count()))
+    columns = make_columns(args.rows)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for compress in ("gzip", "bzip2", "xz"):
+            path = write_file(os.path.join(tmpdir, "df_%s.RData" % compress), rdata_bytes({"df": columns}, compress))
+            single = best_of(args.repeat, pyreadr.read_r, path, threads=1)
+            pipelined = best_of(args.repeat, pyreadr.read_r, path, threads=2)
+            print("%-6s threads=1 %8.3f s  threads=2 %8.3f s  speedup %5.2f" % (
+                compress, single, pipelined, single / pipelined))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for write_rds: data frames with float64, int32, bool and string
+columns are written uncompressed, the time includes the type inference and
+the conversion of the columns done in python.
+
+usage: python benchmarks/bench_write.py [--inplace] [--rows N] [--cols N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import best_of
+
+
+def make_frames(rows, cols):
+    rng = np.random.default_rng(0)
+    return {
+        "float64": pd.DataFrame({"c%d" % i: rng.random(rows) for i in range(cols)}),
+        "int32": pd.DataFrame({"c%d" % i: rng.integers(0, 1000, rows, dtype=np.int32) for i in range(cols)}),
+        "bool": pd.DataFrame({"c%d" % i: rng.random(rows) > 0.5 for i in range(cols)}),
+        "string": pd.DataFrame({"c%d" % i: np.array(["id%d" % x for x in rng.integers(0, 1000, rows).tolist()],
+                                                    dtype=object) for i in range(cols)}),
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=1_000_000)
+    argparser.add_argument("--cols", type=int, default=20)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    print("rows: %d, columns: %d" % (args.rows, args.cols))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "df.rds")
+        for name, df in make_frames(args.rows, args.cols).items():
+            elapsed = best_of(args.repeat, pyreadr.write_rds, path, df)
+            print("%-8s %8.3f s  %8.1f M cells/s  %8.1f MB" % (
+                name, elapsed, df.size / elapsed / 1e6, os.path.getsize(path) / 1e6))
+
+
+if __name__ == "__main__":
+    main()
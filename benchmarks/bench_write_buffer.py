@@ -0,0 +1,69 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for the output buffer of the writer: a large numeric data frame is
+written with write_rds with different buffer sizes, 0 meaning one write system
+call per value (headers, lengths, row names) as it was before the buffer. The
+number of write system calls is taken from /proc/self/io, on Linux only.
+
+usage: python benchmarks/bench_write_buffer.py [--inplace] [--rows N] [--cols N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+
+
+def write_syscalls():
+    try:
+        with open("/proc/self/io") as fhandle:
+            for line in fhandle:
+                if line.startswith("syscw:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=2_000_000)
+    argparser.add_argument("--cols", type=int, default=10)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+    from pyreadr._pyreadr_writer import PyreadrWriter
+
+    print("package location:", pyreadr.__file__)
+    print("rows: %d, columns: %d" % (args.rows, args.cols))
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"c%d" % i: rng.random(args.rows) for i in range(args.cols)})
+    default_size = PyreadrWriter().output_buffer_size
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "df.rds")
+        for size in (0, 64 * 1024, default_size, 8 * 1024 * 1024):
+            writer = PyreadrWriter(output_buffer_size=size)
+            best = None
+            for _ in range(args.repeat):
+                before = write_syscalls()
+                start = time.perf_counter()
+                writer.write_r(path.encode("utf-8"), "rds", df, "", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", None)
+                elapsed = time.perf_counter() - start
+                after = write_syscalls()
+                best = elapsed if best is None else min(best, elapsed)
+            calls = "n/a" if before is None else str(after - before)
+            print("buffer %8d kB %8.3f s  %8.1f MB/s  write calls %s" % (
+                size // 1024, best, os.path.getsize(path) / best / 1e6, calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for writing a data frame in chunks: a data frame with numeric,
+integer and character columns is generated chunk by chunk and written with
+write_rds_chunks, and compared with building the whole data frame and
+writing it with write_rds. Each mode runs in its own process so that the
+peak resident memory reported is that of the mode alone.
+
+usage: python benchmarks/bench_write_chunks.py [--inplace] [--rows N] [--chunk N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+script = os.path.realpath(__file__)
+script_folder = os.path.dirname(script)
+sys.path.insert(0, script_folder)
+from rdata_fixtures import peak_rss_mb, run_child
+
+
+def make_chunks(rows, chunk):
+    rng = np.random.default_rng(0)
+    labels = np.array(["id%d" % x for x in range(1000)], dtype=object)
+    for start in range(0, rows, chunk):
+        size = min(chunk, rows - start)
+        yield pd.DataFrame({"num": rng.random(size),
+                            "int": rng.integers(0, 1000, size, dtype=np.int32),
+                            "char": labels[rng.integers(0, len(labels), size)]})
+
+
+def measure(mode, path, rows, chunk):
+    import pyreadr
+
+    start = time.perf_counter()
+    if mode == "chunks":
+        pyreadr.write_rds_chunks(path, make_chunks(rows, chunk), nrows=rows)
+    else:
+        pyreadr.write_rds(path, pd.concat(make_chunks(rows, chunk), ignore_index=True))
+    elapsed = time.perf_counter() - start
+    print("%-7s %8.3f s  peak memory %8.1f MB  file %8.1f MB" % (mode, elapsed, peak_rss_mb(), os.path.getsize(path) / 1e6))
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=10_000_000)
+    argparser.add_argument("--chunk", type=int, default=500_000)
+    argparser.add_argument("--mode", choices=["chunks", "full"])
+    argparser.add_argument("--path")
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+
+    if args.mode:
+        measure(args.mode, args.path, args.rows, args.chunk)
+        return
+
+    import pyreadr
+    print("package location:", pyreadr.__file__)
+    print("rows: %d, chunk: %d" % (args.rows, args.chunk))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "df.rds")
+        for mode in ("chunks", "full"):
+            run_child(script, "--mode", mode, "--path", path, "--rows", args.rows, "--chunk", args.chunk,
+                      inplace=args.inplace)
+
+
+if __name__ == "__main__":
+    main()
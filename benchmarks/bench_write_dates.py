@@ -0,0 +1,62 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for writing dates and datetimes: data frames with datetime64,
+tz-aware datetime64 and datetime.date columns are written with write_rds
+as strings (the default) and with native_dates=True as R POSIXct and Date
+vectors.
+
+usage: python benchmarks/bench_write_dates.py [--inplace] [--rows N] [--cols N] [--repeat N]
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import best_of
+
+
+def make_frames(rows, cols):
+    rng = np.random.default_rng(0)
+    seconds = lambda: rng.integers(0, 50 * 365 * 86400, rows).astype("datetime64[s]").astype("datetime64[ns]")
+    dates = np.array([datetime.date(1970, 1, 1) + datetime.timedelta(days=x) for x in range(20000)], dtype=object)
+    return {
+        "datetime": pd.DataFrame({"c%d" % i: seconds() for i in range(cols)}),
+        "datetime_tz": pd.DataFrame({"c%d" % i: pd.DatetimeIndex(seconds()).tz_localize("UTC").tz_convert("Europe/Berlin")
+                                     for i in range(cols)}),
+        "date": pd.DataFrame({"c%d" % i: dates[rng.integers(0, len(dates), rows)] for i in range(cols)}),
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=1_000_000)
+    argparser.add_argument("--cols", type=int, default=5)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    print("rows: %d, columns: %d" % (args.rows, args.cols))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "df.rds")
+        for name, df in make_frames(args.rows, args.cols).items():
+            strings = best_of(args.repeat, pyreadr.write_rds, path, df)
+            strings_size = os.path.getsize(path)
+            native = best_of(args.repeat, pyreadr.write_rds, path, df, native_dates=True)
+            native_size = os.path.getsize(path)
+            print("%-12s strings %8.3f s %8.1f MB  native %8.3f s %8.1f MB  speedup %6.1f" % (
+                name, strings, strings_size / 1e6, native, native_size / 1e6, strings / native))
+
+
+if __name__ == "__main__":
+    main()
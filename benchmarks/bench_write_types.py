@@ -0,0 +1,55 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for the column type inference of the writer: the pyreadr type of
+every column of a data frame with object columns of strings (half of them
+with missing values) is inferred before writing. The data frame with the
+default size holds 250 million references, about 2 GB.
+
+usage: python benchmarks/bench_write_types.py [--inplace] [--rows N] [--cols N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import best_of
+
+
+def make_frame(rows, cols):
+    rng = np.random.default_rng(0)
+    labels = np.array(["id%d" % x for x in range(1000)], dtype=object)
+    columns = dict()
+    for col in range(cols):
+        values = labels[rng.integers(0, len(labels), rows)]
+        if col % 2:
+            values[::100] = None
+        columns["c%d" % col] = values
+    return pd.DataFrame(columns)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--rows", type=int, default=5_000_000)
+    argparser.add_argument("--cols", type=int, default=50)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+    from pyreadr._pyreadr_writer import get_pyreadr_column_types
+
+    print("package location:", pyreadr.__file__)
+    print("rows: %d, object columns: %d" % (args.rows, args.cols))
+    df = make_frame(args.rows, args.cols)
+    elapsed = best_of(args.repeat, get_pyreadr_column_types, df)
+    print("type inference %8.3f s  %6.1f ns per value" % (elapsed, elapsed * 1e9 / (args.rows * args.cols)))
+
+
+if __name__ == "__main__":
+    main()
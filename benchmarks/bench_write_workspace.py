@@ -0,0 +1,63 @@
+"""
+@author: Otto Fajardo
+
+Benchmark for writing many data frames to one RData workspace: a dict of
+data frames with numeric, integer and character columns is written with one
+write_rdata call, and compared with one write_rdata call (and file) per data
+frame, uncompressed and with gzip.
+
+usage: python benchmarks/bench_write_workspace.py [--inplace] [--objects N] [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_folder)
+from rdata_fixtures import best_of
+
+
+def make_frames(objects, rows):
+    rng = np.random.default_rng(0)
+    labels = np.array(["id%d" % x for x in range(1000)], dtype=object)
+    return {"df%d" % i: pd.DataFrame({"num": rng.random(rows),
+                                      "int": rng.integers(0, 1000, rows, dtype=np.int32),
+                                      "char": labels[rng.integers(0, len(labels), rows)]})
+            for i in range(objects)}
+
+
+def write_single(pyreadr, tmpdir, frames, compress):
+    for name, df in frames.items():
+        pyreadr.write_rdata(os.path.join(tmpdir, name + ".RData"), df, df_name=name, compress=compress)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--inplace", action="store_true")
+    argparser.add_argument("--objects", type=int, default=30)
+    argparser.add_argument("--rows", type=int, default=100_000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+    if args.inplace:
+        sys.path.insert(0, os.path.split(script_folder)[0])
+    import pyreadr
+
+    print("package location:", pyreadr.__file__)
+    print("objects: %d, rows: %d" % (args.objects, args.rows))
+    frames = make_frames(args.objects, args.rows)
+    cells = sum(df.size for df in frames.values())
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for compress in (None, "gzip"):
+            single = best_of(args.repeat, write_single, pyreadr, tmpdir, frames, compress)
+            path = os.path.join(tmpdir, "workspace.RData")
+            workspace = best_of(args.repeat, pyreadr.write_rdata, path, frames, compress=compress)
+            print("%-5s one file per object %8.3f s %8.1f M cells/s  one workspace %8.3f s %8.1f M cells/s" % (
+                compress or "none", single, cells / single / 1e6, workspace, cells / workspace / 1e6))
+
+
+if __name__ == "__main__":
+    main()
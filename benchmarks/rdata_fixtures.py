@@ -0,0 +1,258 @@
+"""
+@author: Otto Fajardo
+
+Helpers to produce synthetic RData and Rds files for the benchmarks without
+needing R, and to measure their time and memory. The files are written in
+the XDR serialization format version 2, which is the same format R produces
+with save(..., version=2) and saveRDS(..., version=2).
+"""
+import bz2
+import gzip
+import lzma
+import struct
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+R_NA_INTEGER = -2147483648
+
+NILVALUE_SXP = 254
+REFSXP = 255
+SYMSXP = 1
+LISTSXP = 2
+CHARSXP = 9
+LGLSXP = 10
+INTSXP = 13
+REALSXP = 14
+STRSXP = 16
+VECSXP = 19
+
+IS_OBJECT = 1 << 8
+HAS_ATTR = 1 << 9
+HAS_TAG = 1 << 10
+ASCII_MASK = 64 << 12
+
+compressors = {None: lambda x: x,
+               "gzip": lambda x: gzip.compress(x, compresslevel=6),
+               "bzip2": lambda x: bz2.compress(x, compresslevel=9),
+               "xz": lambda x: lzma.compress(x, format=lzma.FORMAT_XZ)}
+
+
+class Column:
+    """
+    A column to be serialized: kind is one of REAL, INT32, LOGICAL, TIMESTAMP,
+    DATE, STRING or FACTOR. For FACTOR, values are the 1 based integer codes
+    and levels must be given.
+    """
+
+    def __init__(self, kind, values, levels=None, ordered=False):
+        self.kind = kind
+        self.values = values
+        self.levels = levels
+        self.ordered = ordered
+
+
+class _Serializer:
+
+    def __init__(self):
+        self.chunks = list()
+        self.symbols = dict()
+
+    def int(self, value):
+        self.chunks.append(struct.pack(">i", value))
+
+    def header(self, sexptype, flags=0):
+        self.int(sexptype | flags)
+
+    def charsxp(self, value):
+        if value is None:
+            self.header(CHARSXP)
+            self.int(-1)
+        else:
+            encoded = value.encode("utf-8")
+            self.header(CHARSXP, ASCII_MASK)
+            self.int(len(encoded))
+            self.chunks.append(encoded)
+
+    def symbol(self, name):
+        ref = self.symbols.get(name)
+        if ref:
+            self.int((ref << 8) | REFSXP)
+        else:
+            self.symbols[name] = len(self.symbols) + 1
+            self.header(SYMSXP)
+            self.charsxp(name)
+
+    def strsxp(self, values):
+        self.header(STRSXP)
+        self.int(len(values))
+        for value in values:
+            self.charsxp(value)
+
+    def strsxp_fast(self, values):
+        """ same as strsxp but vectorized for long columns of short strings """
+        self.header(STRSXP)
+        self.int(len(values))
+        na_header = struct.pack(">ii", CHARSXP, -1)
+        pieces = list()
+        for value in values:
+            if value is None:
+                pieces.append(na_header)
+            else:
+                encoded = value.encode("utf-8")
+                pieces.append(struct.pack(">ii", CHARSXP | ASCII_MASK, len(encoded)))
+                pieces.append(encoded)
+        self.chunks.append(b"".join(pieces))
+
+    def attributes(self, attrs):
+        for key, writer in attrs:
+            self.header(LISTSXP, HAS_TAG)
+            self.symbol(key)
+            writer()
+        self.header(NILVALUE_SXP)
+
+    def column(self, column):
+        kind = column.kind
+        values = column.values
+        attrs = list()
+        if kind in ("REAL", "TIMESTAMP", "DATE"):
+            sexptype = REALSXP
+            payload = np.asarray(values, dtype=">f8").tobytes()
+        elif kind in ("INT32", "FACTOR"):
+            sexptype = INTSXP
+            payload = np.asarray(values, dtype=">i4").tobytes()
+        elif kind == "LOGICAL":
+            sexptype = LGLSXP
+            payload = np.asarray(values, dtype=">i4").tobytes()
+        elif kind == "STRING":
+            self.strsxp_fast(values)
+            return
+        else:
+            raise ValueError("Unknown column kind %s" % kind)
+
+        if kind == "TIMESTAMP":
+            attrs.append(("class", lambda: self.strsxp(["POSIXct", "POSIXt"])))
+        elif kind == "DATE":
+            attrs.append(("class", lambda: self.strsxp(["Date"])))
+        elif kind == "FACTOR":
+            classes = ["ordered", "factor"] if column.ordered else ["factor"]
+            attrs.append(("levels", lambda: self.strsxp(column.levels)))
+            attrs.append(("class", lambda: self.strsxp(classes)))
+
+        flags = (IS_OBJECT | HAS_ATTR) if attrs else 0
+        self.header(sexptype, flags)
+        self.int(len(values))
+        self.chunks.append(payload)
+        if attrs:
+            self.attributes(attrs)
+
+    def data_frame(self, columns):
+        """ columns is a dict with column name as key and Column as value """
+        nrows = len(next(iter(columns.values())).values) if columns else 0
+        self.header(VECSXP, IS_OBJECT | HAS_ATTR)
+        self.int(len(columns))
+        for column in columns.values():
+            self.column(column)
+
+        def row_names():
+            self.header(INTSXP)
+            self.int(2)
+            self.int(R_NA_INTEGER)
+            self.int(-nrows)
+
+        self.attributes([("names", lambda: self.strsxp(list(columns.keys()))),
+                         ("class", lambda: self.strsxp(["data.frame"])),
+                         ("row.names", row_names)])
+
+    def version_header(self):
+        self.chunks.append(b"X\n")
+        self.int(2)
+        self.int(0x00040002)
+        self.int(0x00020300)
+
+    def getvalue(self):
+        return b"".join(self.chunks)
+
+
+def rds_bytes(columns, compress=None):
+    """
+    Serializes a data frame into the contents of a Rds file.
+    """
+    serializer = _Serializer()
+    serializer.version_header()
+    serializer.data_frame(columns)
+    return compressors[compress](serializer.getvalue())
+
+
+def rdata_bytes(objects, compress=None):
+    """
+    Serializes a dictionary of data frames (object name as key and
+    a dictionary of columns as value) into the contents of a RData file.
+    """
+    serializer = _Serializer()
+    serializer.chunks.append(b"RDX2\n")
+    serializer.version_header()
+    for name, columns in objects.items():
+        serializer.header(LISTSXP, HAS_TAG)
+        serializer.symbol(name)
+        serializer.data_frame(columns)
+    serializer.header(NILVALUE_SXP)
+    return compressors[compress](serializer.getvalue())
+
+
+def write_file(path, contents):
+    with open(path, "wb") as fhandle:
+        fhandle.write(contents)
+    return path
+
+
+def best_of(repeat, function, *args, **kwargs):
+    """
+    Best wall time in seconds of repeat calls to function(*args, **kwargs).
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def timed(function, *args, **kwargs):
+    """
+    Wall time in seconds of one call to function(*args, **kwargs) and its
+    result.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process in MB.
+    """
+    # unix only
+    import resource
+
+    # ru_maxrss is in kilobytes on linux and bytes on mac
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / 1e6
+    return peak / 1e3
+
+
+def run_child(script, *args, inplace=False):
+    """
+    Runs the benchmark script again in a process of its own with the command
+    line arguments args, so that its peak memory is measured alone. (On linux
+    the peak is inherited through exec, therefore the parent process must
+    stay small.)
+    """
+    command = [sys.executable, script] + [str(arg) for arg in args]
+    if inplace:
+        command.append("--inplace")
+    subprocess.run(command, check=True)
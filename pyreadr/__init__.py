@@ -1,4 +1,5 @@
-from .pyreadr import read_r, list_objects, write_rds, write_rdata, download_file
+from .pyreadr import read_r, read_r_iter, read_r_many, list_objects, build_index, write_rds, write_rdata, write_rds_chunks, write_rdata_chunks, \
+    download_file
 from .custom_errors import PyreadrError, LibrdataError
 
 __version__ = "0.5.4"
@@ -0,0 +1,82 @@
+"""
+@author: Otto Fajardo
+
+Sidecar index files for RData files, see pyreadr.build_index. The index is a
+gzip compressed json document with the objects of the file, their offsets in
+the uncompressed stream, the symbol table and, for gzip files, the points where
+decompression can resume.
+"""
+import base64
+import bisect
+import gzip
+import hashlib
+import json
+import os
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".pyreadr_index"
+# bytes at the beginning and at the end of the file that are hashed
+HASH_SPAN = 1024 * 1024
+
+
+def default_index_path(path):
+    return os.fsdecode(path) + INDEX_SUFFIX
+
+
+def file_fingerprint(path):
+    """
+    Size, modification time and a hash of the first and last MB of the file. The hash does not cover the whole
+    file, as that would cost as much as reading it.
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fhandle:
+        digest.update(fhandle.read(HASH_SPAN))
+        if stat.st_size > HASH_SPAN:
+            fhandle.seek(max(HASH_SPAN, stat.st_size - HASH_SPAN))
+            digest.update(fhandle.read())
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+def write_index(index_path, fingerprint, parser):
+    """
+    Writes the data collected by an IndexParser
+    """
+    checkpoints = [[uncompressed_offset, compressed_offset, bits, base64.b64encode(window).decode("ascii")]
+                   for uncompressed_offset, compressed_offset, bits, window in parser.checkpoints]
+    index = {"version": INDEX_VERSION, "file": fingerprint, "atoms": parser.atoms, "objects": parser.objects,
+             "checkpoints": checkpoints}
+    with gzip.open(index_path, "wt", encoding="utf-8") as fhandle:
+        json.dump(index, fhandle)
+
+
+def read_index(index_path, path):
+    """
+    Returns the index, or None if it does not exist, cannot be read or does not match the current file at path
+    """
+    try:
+        with gzip.open(index_path, "rt", encoding="utf-8") as fhandle:
+            index = json.load(fhandle)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION or index.get("file") != file_fingerprint(path):
+        return None
+    index["checkpoints"] = [(uncompressed_offset, compressed_offset, bits, base64.b64decode(window))
+                            for uncompressed_offset, compressed_offset, bits, window in index["checkpoints"]]
+    return index
+
+
+def start_objects(index, use_objects):
+    """
+    For each object in use_objects present in the index, in file order, the arguments for
+    PyreadrParser.set_start_object: the offset, the symbol table and the last checkpoint before the object.
+    """
+    checkpoint_offsets = [checkpoint[0] for checkpoint in index["checkpoints"]]
+    result = list()
+    for obj in index["objects"]:
+        if obj["name"] not in use_objects:
+            continue
+        position = bisect.bisect_right(checkpoint_offsets, obj["offset"])
+        checkpoint = index["checkpoints"][position - 1] if position else None
+        result.append((obj["offset"], index["atoms"][:obj["atom_count"]], checkpoint))
+    return result
@@ -13,10 +13,27 @@ try:
     xray_available = True
 except:
     pass
+# pyarrow is needed for the pyarrow backend only
+pyarrow_available = False
+try:
+    import pyarrow as pa
+    pyarrow_available = True
+except:
+    pass
 
-from .librdata import Parser
+from .librdata import Parser, DeferredStrings
 from .custom_errors import PyreadrError
 
+# sizes for the estimation of the memory of objects in list_objects (64 bit CPython and pandas)
+# sys.getsizeof(""): a python str object without its characters (ascii)
+STR_OBJECT_SIZE = 49
+# pd.RangeIndex(n).memory_usage(deep=True): the default index of a data frame
+RANGE_INDEX_SIZE = 132
+# pandas uses int8 codes for categoricals with fewer categories than this, then int16 up to the next limit,
+# then int32 (pandas.core.dtypes.cast.coerce_indexer_dtype)
+INT8_CODES_MAX_CATEGORIES = np.iinfo(np.int8).max
+INT16_CODES_MAX_CATEGORIES = np.iinfo(np.int16).max
+
 
 
 class Table:
@@ -26,7 +43,7 @@ class Table:
     Once the parsing is finished it has methods to convert to pandas data frame.
     """
 
-    def __init__(self, timezone=None):
+    def __init__(self, timezone=None, use_nullable_dtypes=False):
 
         self.name = None
         self.column_names = dict()
@@ -35,28 +52,179 @@ class Table:
         self.column_types = dict()
         self.columns = list()
         self.value_labels = dict()
+        self.ordered_factors = set()
         self.df = None
         self.timezone = timezone
+        self.use_nullable_dtypes = use_nullable_dtypes
         self.dim = None
         self.dim_num = 0
         self.dim_names = list()
         self.dim_names_ready = list()
         self.arraylike_data = None
+        self.arraylike_na = None
+        self.use_columns = None
+        self.row_window = None
 
     def convert_to_pandas_dataframe(self):
         """
         Coordinates all the necessary steps to convert the data collected from the parser to a pandas data frame.
         :return: a pandas data frame
         """
+        self._select_columns()
+        self._materialize_columns(False)
         # we need to handle things differently depening wether the dim attribute is set
         if self.dim_num:
             self._arraylike_todf()
         else:
             self._dflike_todf()
+        self.df = self._slice_rows(self.df)
         return self.df
 
+    def convert_to_arrow_table(self):
+        """
+        Converts the data collected from the parser to a pyarrow table without going through pandas.
+        :return: a pyarrow Table
+        """
+        self._select_columns()
+        self._materialize_columns(True)
+        if self.dim_num:
+            return self._slice_rows(self._arraylike_toarrow())
+        else:
+            return self._slice_rows(self._dflike_toarrow())
+
     # Internal methods
 
+    def _select_columns(self):
+        """
+        Drops the data frame columns not in use_columns, the others keep their order.
+        """
+        # only data frames have column names from the names attribute
+        if self.use_columns is None or self.dim_num or not self.column_names_special:
+            return
+        self._consolidate_names()
+        use_columns = set(self.use_columns)
+        keep = [indx for indx in range(len(self.columns)) if self.final_names.get(indx) in use_columns]
+        newindx = {indx: pos for pos, indx in enumerate(keep)}
+        self.columns = [self.columns[indx] for indx in keep]
+        self.column_names = {newindx[indx]: name for indx, name in self.column_names.items() if indx in newindx}
+        self.column_names_special = {newindx[indx]: name for indx, name in self.column_names_special.items()
+                                     if indx in newindx}
+        self.column_types = {newindx[indx]: dtype for indx, dtype in self.column_types.items() if indx in newindx}
+        self.value_labels = {newindx[indx]: labels for indx, labels in self.value_labels.items() if indx in newindx}
+        self.ordered_factors = set(newindx[indx] for indx in self.ordered_factors if indx in newindx)
+        self.use_columns = None
+
+    def _slice_rows(self, result):
+        """
+        Applies the row window (skip, limit) to vectors and arrays, data frames come already windowed from librdata.
+        """
+        if self.row_window is None or (self.column_names_special and not self.dim_num):
+            return result
+        skip, limit = self.row_window
+        stop = None if limit < 0 else skip + limit
+        if pyarrow_available and isinstance(result, pa.Table):
+            return result.slice(skip) if stop is None else result.slice(skip, limit)
+        if isinstance(result, pd.DataFrame):
+            result = result.iloc[skip:stop]
+            if isinstance(result.index, pd.RangeIndex):
+                result = result.reset_index(drop=True)
+            return result
+        # xarray DataArray
+        return result[skip:stop]
+
+    def _materialize_columns(self, arrow_strings):
+        """
+        Decodes the character vectors that were kept as DeferredStrings.
+        """
+        for indx, column in enumerate(self.columns):
+            if isinstance(column, DeferredStrings):
+                self.columns[indx] = column.materialize(arrow_strings)
+
+    # methods for the pyarrow backend
+    def _arrow_array(self, data, dtype, labels=None, ordered=False):
+        """
+        Converts one flat R vector into a pyarrow array, R NA values become nulls.
+        """
+        if labels is not None:
+            # factor: integer codes starting at 1, the dictionary are the levels
+            data = np.asarray(data, dtype=np.int32)
+            na_index = data <= 0
+            indices = pa.array(np.where(na_index, 0, data - 1), mask=na_index, type=pa.int32())
+            levels = pa.array(self._factor_levels(labels), type=pa.string())
+            return pa.DictionaryArray.from_arrays(indices, levels, ordered=ordered)
+        if dtype.name == "CHARACTER":
+            if isinstance(data, pa.Array):
+                return data
+            return pa.array(data, type=pa.large_string(), from_pandas=True)
+        if dtype.name == "INTEGER":
+            return pa.array(data, mask=(data == -2147483648), type=pa.int32())
+        if dtype.name == "LOGICAL":
+            return pa.array(data != 0, mask=(data == -2147483648), type=pa.bool_())
+        if dtype.name == "NUMERIC":
+            # R NA is a NaN with 1954 in the lower word, other NaNs stay NaN
+            na_index = np.isnan(data) & ((data.view(np.uint64) & 0xFFFFFFFF) == 1954)
+            if np.any(na_index):
+                return pa.array(data, mask=na_index, type=pa.float64())
+            return pa.array(data, type=pa.float64())
+        if dtype.name == "TIMESTAMP":
+            na_index = ~np.isfinite(data)
+            values = np.round(np.where(na_index, 0, data) * 1e6).astype(np.int64)
+            return pa.array(values, mask=na_index, type=pa.timestamp("us", tz=self.timezone or "UTC"))
+        if dtype.name == "DATE":
+            na_index = ~np.isfinite(data)
+            # fractional days belong to the day they start in, also before 1970
+            values = np.floor(np.where(na_index, 0, data)).astype(np.int32)
+            return pa.array(values, mask=na_index, type=pa.date32())
+        raise PyreadrError("Data type %s cannot be converted to arrow" % dtype.name)
+
+    def _dflike_toarrow(self):
+        """
+        Builds a pyarrow table for data frames and atomic vectors.
+        """
+        self._consolidate_names()
+        arrays = list()
+        names = list()
+        if self.row_names:
+            arrays.append(pa.array(self.row_names, type=pa.string(), from_pandas=True))
+            names.append("rownames")
+        for indx, column in enumerate(self.columns):
+            arrays.append(self._arrow_array(column, self.column_types[indx], self.value_labels.get(indx),
+                                            indx in self.ordered_factors))
+            name = self.final_names[indx]
+            names.append(name if name is not None else str(indx))
+        return pa.Table.from_arrays(arrays, names=names)
+
+    def _arraylike_toarrow(self):
+        """
+        Builds a pyarrow table for matrices, tables and one dimensional arrays, one column per matrix column.
+        """
+        if len(self.columns)>1:
+            raise PyreadrError("matrix, array or table object with more than one vector!")
+        if self.dim_num>2:
+            raise PyreadrError("Arrays with more than 2 dimensions cannot be converted to a pyarrow table")
+
+        flat = self._arrow_array(self.columns[0], self.column_types[0], self.value_labels.get(0),
+                                 0 in self.ordered_factors)
+        nrows = int(self.dim[0])
+        ncols = int(self.dim[1]) if self.dim_num>1 else 1
+        rownames = None
+        colnames = None
+        if self.dim_names:
+            self.arrange_dimnames_arraylike()
+            rownames = self.dim_names_ready[0]
+            if len(self.dim_names_ready)>1:
+                colnames = self.dim_names_ready[1]
+        arrays = list()
+        names = list()
+        if rownames is not None:
+            arrays.append(pa.array(rownames, type=pa.string(), from_pandas=True))
+            names.append("rownames")
+        for colindx in range(ncols):
+            # R stores matrices column by column, each column is a zero copy slice
+            arrays.append(flat.slice(colindx * nrows, nrows))
+            names.append(str(colnames[colindx]) if colnames is not None else str(colindx))
+        return pa.Table.from_arrays(arrays, names=names)
+
     # methods for arraylike: array, matrix, table
     def _arraylike_todf(self):
         """
@@ -91,7 +259,13 @@ class Table:
                 data = data.dt.tz_localize('UTC').dt.tz_convert(self.timezone)
         elif dtype.name == "DATE":
             data[data == np.inf] = np.nan
-            data = data.astype("datetime64[D]").astype(datetime)
+            data = np.floor(data).astype("datetime64[D]").astype(datetime)
+        elif self.value_labels:
+            # factor codes are converted later to categories
+            pass
+        elif (dtype.name == "LOGICAL" or dtype.name == "INTEGER") and self.use_nullable_dtypes and self.dim_num<3:
+            # converted column by column to masked arrays once the data frame is built
+            self.arraylike_na = data <= -2147483648
         elif dtype.name == "LOGICAL" or dtype.name == "INTEGER":
             na_index = data <= -2147483648
             if np.any(na_index):
@@ -140,6 +314,33 @@ class Table:
                     raise PyreadrError("Trying to read array with >2 dimensions, please install xarray!")
                 df = xr.DataArray(data)
         self.df = df
+        if self.arraylike_na is not None:
+            self._arraylike_nullable()
+
+    def _arraylike_nullable(self):
+        """
+        Replace the integer or logical columns of the data frame by masked arrays
+        """
+        dtype = self.column_types[0]
+        nrows = self.df.shape[0]
+        arrays = dict()
+        for colindx in range(self.df.shape[1]):
+            # data is in column major order, so each column is a contiguous piece
+            start = colindx * nrows
+            arrays[colindx] = self._nullable_array(self.arraylike_data[start:start+nrows],
+                                                   self.arraylike_na[start:start+nrows], dtype)
+        df = pd.DataFrame(arrays, index=self.df.index)
+        df.columns = self.df.columns
+        self.df = df
+
+    @staticmethod
+    def _nullable_array(data, na_index, dtype):
+        """
+        Builds a pandas masked array (Int32 or boolean) from the raw R integer or logical vector
+        """
+        if dtype.name == "INTEGER":
+            return pd.arrays.IntegerArray(np.asarray(data, dtype=np.int32), na_index)
+        return pd.arrays.BooleanArray(data != 0, na_index)
 
     def arrange_dimnames_arraylike(self):
         """
@@ -230,7 +431,13 @@ class Table:
                     df[colname] = df[colname].dt.tz_localize('UTC').dt.tz_convert(self.timezone)
             elif dtype.name == "DATE":
                 df.loc[df[colname] == np.inf, colname] = np.nan
-                df[colname] = df[colname].values.astype("datetime64[D]").astype(datetime)
+                df[colname] = np.floor(df[colname].values).astype("datetime64[D]").astype(datetime)
+            elif colindx in self.value_labels:
+                # factor codes are converted later to categories
+                continue
+            elif (dtype.name == "LOGICAL" or dtype.name == "INTEGER") and self.use_nullable_dtypes:
+                data = np.asarray(self.columns[colindx])
+                df[colname] = self._nullable_array(data, data <= -2147483648, dtype)
             elif dtype.name == "LOGICAL" or dtype.name == "INTEGER":
                 # iscategorical = value_labels.get(colindx)
                 # if not iscategorical:
@@ -265,7 +472,7 @@ class Table:
     def _handle_value_labels(self):
         """
         R factors are represented as integer vectors, and their string equivalences are stored somewhere else. This
-        method replaces the integers by the correspondent strings and transforms the data into a pandas category.
+        method builds a pandas category directly from the integer codes and the levels.
         """
 
         if self.value_labels:
@@ -275,13 +482,23 @@ class Table:
                     dim = self.dim[1]
                 else:
                     dim = 1
-                indx_labels = [(x, self.value_labels[0]) for x in range(0, dim)]
+                indx_labels = [(x, self.value_labels[0], 0 in self.ordered_factors) for x in range(0, dim)]
             else:
-               indx_labels = list(self.value_labels.items()) 
-            for colindx, labels in indx_labels:
+               indx_labels = [(x, labels, x in self.ordered_factors) for x, labels in self.value_labels.items()]
+            for colindx, labels, ordered in indx_labels:
                 colname = colnames[colindx]
-                self.df = self.df.replace({colname: labels})
-                self.df[colname] = self.df[colname].astype("category")
+                # R codes start at 1, NA (the smallest int32) maps to -1
+                codes = np.asarray(self.df[colname].values, dtype=np.int32)
+                codes = np.where(codes <= 0, -1, codes - 1)
+                self.df[colname] = pd.Categorical.from_codes(codes, categories=self._factor_levels(labels),
+                                                             ordered=ordered)
+
+    @staticmethod
+    def _factor_levels(labels):
+        """
+        Factor levels as a list, labels is a dictionary with the 1 based code as key
+        """
+        return [labels[x] for x in sorted(labels)]
 
 
 class PyreadrParser(Parser):
@@ -299,19 +516,85 @@ class PyreadrParser(Parser):
         self.use_objects = None
         self.parse_current_table = True
         self.timezone = None
+        self.use_nullable_dtypes = False
+        self.table_callback = None
+        self.use_columns = None
+        self.column_selection = None
+        self.current_columns = None
+        self.row_window = None
 
     def set_use_objects(self, use_objects):
         self.use_objects = use_objects
 
+    def set_use_columns(self, use_columns):
+        """
+        use_columns is a list of column names for all data frames or a dictionary with object names as keys and lists
+        of column names as values. All the columns are read, but character vectors are decoded only for the
+        selected columns, the others are dropped before the conversion.
+        """
+        self.use_columns = use_columns
+        self.defer_strings = True
+
+    def set_column_selection(self, column_selection):
+        """
+        column_selection is a dictionary with object names as keys and a list of column positions to read as
+        values. The other columns are skipped by librdata. Objects not in the dictionary are read entirely.
+        """
+        self.column_selection = column_selection
+        self.filter_columns = True
+
+    def set_decompress_threads(self, decompress_threads):
+        self.decompress_threads = decompress_threads
+
+    def set_row_window(self, skip, limit):
+        """
+        Of each column of a data frame librdata reads limit rows (all if -1) after skipping the first skip rows,
+        other objects are sliced after conversion.
+        """
+        self.row_window = (skip, limit)
+
     def set_timezone(self, timezone):
         self.timezone = timezone
 
+    def set_use_nullable_dtypes(self, use_nullable_dtypes):
+        self.use_nullable_dtypes = use_nullable_dtypes
+
+    def set_arrow_strings(self, arrow_strings):
+        self.arrow_strings = arrow_strings
+
+    def set_start_object(self, offset, atoms, checkpoint=None):
+        """
+        Parse only the object at the uncompressed offset, with the symbol table atoms, as collected by IndexParser.
+        checkpoint is a tuple (uncompressed_offset, compressed_offset, bits, window) where gzip decompression
+        resumes, or None.
+        """
+        self.start_object = (offset, atoms, checkpoint)
+
+    def set_table_callback(self, table_callback):
+        """
+        If set, table_callback is called with each table as soon as it is complete, and the table is not kept in
+        table_data. The last table is complete after calling finish_table once the parsing is done.
+        """
+        self.table_callback = table_callback
+
+    def finish_table(self):
+        """
+        Hands the current table to table_callback, if any.
+        """
+        if self.table_callback is not None and self.current_table is not None:
+            table = self.current_table
+            self.current_table = None
+            self.table_callback(table)
+
     def handle_table(self, name):
         """
         Every object in the file is called table, this method is evoked once per object.
         :param name: str: the name of the table
         """
 
+        # a new object begins, therefore the previous one is complete
+        self.finish_table()
+
         if (self.use_objects is None) or name in self.use_objects:
 
             self.parse_current_table = True
@@ -320,8 +603,19 @@ class PyreadrParser(Parser):
 
             table = Table()
             table.timezone = self.timezone
+            table.use_nullable_dtypes = self.use_nullable_dtypes
             table.name = name
-            self.table_data.append(table)
+            if isinstance(self.use_columns, dict):
+                table.use_columns = self.use_columns.get(name)
+            else:
+                table.use_columns = self.use_columns
+            table.row_window = self.row_window
+            # maps the position of the selected columns in the file to their position in the table
+            self.current_columns = None
+            if self.column_selection is not None and name in self.column_selection:
+                self.current_columns = {pos: indx for indx, pos in enumerate(self.column_selection[name])}
+            if self.table_callback is None:
+                self.table_data.append(table)
             self.current_table = table
 
         else:
@@ -351,8 +645,21 @@ class PyreadrParser(Parser):
         :param index: int: index of the column
         """
         if self.parse_current_table:
+            if self.current_columns is not None:
+                # the names of skipped columns are also listed
+                if index not in self.current_columns:
+                    return
+                index = self.current_columns[index]
             self.current_table.column_names_special[index] = name
 
+    def handle_column_filter(self, index):
+        """
+        Called before each column of a data frame is read.
+        :param index: int: position of the column in the data frame
+        :return: False to skip the column
+        """
+        return self.current_columns is None or index in self.current_columns
+
     def handle_dim(self, name, data_type, data, count):
         """
         Evoked once to retrieve the number of dimensions
@@ -394,6 +701,25 @@ class PyreadrParser(Parser):
         if self.parse_current_table:
             self.current_table.columns[self.column_index].append(name)
 
+    def handle_string_vector(self, values):
+        """
+        For character vectors holding data this is called once with all the values, it replaces
+        the per row calls to handle_text_value.
+        :param values: numpy object array with the string values, missing values are np.nan
+        """
+        if self.parse_current_table:
+            self.current_table.columns[self.column_index] = values
+
+    def handle_column_class(self, name, index):
+        """
+        Called with each element of the class attribute of a vector, before the vector is passed to handle_column.
+        Used to know if a factor is ordered.
+        :param name: str: class name
+        :param index: int: index of the class name in the class attribute
+        """
+        if self.parse_current_table and name == "ordered":
+            self.current_table.ordered_factors.add(self.column_index + 1)
+
     def handle_value_label(self, name, index):
         """
         Factors are represented as integer vectors.
@@ -416,21 +742,43 @@ class PyreadrParser(Parser):
 
 class ListObjectsParser(Parser):
     """
-    Specialized parser to only retrieve the R objects in the file and their columns
+    Specialized parser to only retrieve the R objects in the file and their columns. The data of the vectors is
+    skipped, with detailed=True the number of rows, the type and class of each column and an estimation of the
+    memory needed to read each object are collected as well.
     """
 
-    def __init__(self):
+    # storage type in R (typeof) and implicit class of columns without class attribute
+    r_types = {"NUMERIC": "double", "INTEGER": "integer", "LOGICAL": "logical", "CHARACTER": "character",
+               "TIMESTAMP": "double", "DATE": "double"}
+    r_classes = {"NUMERIC": "numeric", "INTEGER": "integer", "LOGICAL": "logical", "CHARACTER": "character",
+                 "TIMESTAMP": "POSIXct", "DATE": "Date"}
+    # bytes per element of the resulting pandas column
+    item_sizes = {"NUMERIC": 8, "INTEGER": 4, "LOGICAL": 1, "TIMESTAMP": 8, "DATE": 8}
+
+    def __init__(self, detailed=False, use_objects=None):
 
         self.object_list = list()
+        self.use_objects = use_objects
         self.current_table = -1
-        self.parse_current_table = False
+        self.scan_mode = True
+        self.detailed = detailed
+        self.parse_current_table = True
+        self.current_class = None
+        self.current_levels = 0
+        self.current_levels_size = 0
 
     def handle_table(self, name):
         """
         Every object in the file is called table, this method is evoked once per object.
         :param name: str: the name of the table
         """
+        if self.use_objects is not None and name not in self.use_objects:
+            self.parse_current_table = False
+            return
+        self.parse_current_table = True
         curobject = {"object_name": name, "columns": list()}
+        if self.detailed:
+            curobject.update({"nrows": None, "dims": None, "types": list(), "classes": list(), "memory_size": 0})
         self.object_list.append(curobject)
         self.current_table += 1
 
@@ -441,3 +789,117 @@ class ListObjectsParser(Parser):
         :param index: int: index of the column
         """
         self.object_list[self.current_table]["columns"].append(name)
+
+    def handle_column_class(self, name, index):
+        """
+        Called with each element of the class attribute of a vector, before the vector is passed to handle_column.
+        The first element is the class reported for the column.
+        :param name: str: class name
+        :param index: int: index of the class name in the class attribute
+        """
+        if self.detailed and index == 0:
+            self.current_class = name
+
+    def handle_value_label(self, name, index):
+        """
+        Called with the levels of factors, before the codes are passed to handle_column.
+        :param name: str: the level
+        :param index: int: index of the level
+        """
+        if self.detailed:
+            self.current_levels += 1
+            self.current_levels_size += STR_OBJECT_SIZE + len(name)
+
+    def handle_dim(self, name, data_type, data, count):
+        """
+        Called with the dim attribute of matrices, arrays and tables.
+        :param data: list of ints: the dimensions
+        """
+        if not self.detailed:
+            return
+        curobject = self.object_list[self.current_table]
+        curobject["dims"] = tuple(int(x) for x in data)
+        # for character matrices the dimensions come after the vector
+        curobject["nrows"] = curobject["dims"][0]
+
+    def handle_column(self, name, data_type, data, count):
+        """
+        Evoked once per each column in the table, data is empty as the values are skipped.
+        :param data_type: object of type DataType(Enum) (defined in librdata.pyx)
+        :param count: int: number of elements in the vector
+        """
+        if not self.detailed:
+            return
+        curobject = self.object_list[self.current_table]
+        type_name = data_type.name
+        rclass = self.current_class or self.r_classes[type_name]
+        curobject["types"].append(self.r_types[type_name])
+        curobject["classes"].append(rclass)
+        if curobject["nrows"] is None:
+            curobject["nrows"] = count
+        if curobject["memory_size"] == 0:
+            # the index
+            curobject["memory_size"] = RANGE_INDEX_SIZE
+        if self.current_levels:
+            # categorical: codes of the smallest integer type plus the categories
+            if self.current_levels < INT8_CODES_MAX_CATEGORIES:
+                codes_size = 1
+            elif self.current_levels < INT16_CODES_MAX_CATEGORIES:
+                codes_size = 2
+            else:
+                codes_size = 4
+            curobject["memory_size"] += codes_size * count + self.current_levels_size
+        elif type_name != "CHARACTER":
+            curobject["memory_size"] += self.item_sizes[type_name] * count
+        self.current_class = None
+        self.current_levels = 0
+        self.current_levels_size = 0
+
+    def handle_string_scan(self, count, null_count, data_size):
+        """
+        Called after handle_column for character vectors.
+        :param count: int: number of elements in the vector
+        :param null_count: int: number of missing values
+        :param data_size: int: total size in bytes of the strings
+        """
+        if not self.detailed:
+            return
+        # object array: one pointer per row and one python str object per non missing value
+        self.object_list[self.current_table]["memory_size"] += 8 * count + STR_OBJECT_SIZE * (count - null_count) + \
+            data_size
+
+
+class IndexParser(Parser):
+    """
+    Specialized parser to build an index of a RData file: objects are not read, instead the uncompressed offset of
+    each object, the symbol table at that point and (for gzip files) points where decompression can resume are
+    collected.
+    """
+
+    def __init__(self, checkpoint_span):
+
+        self.index_mode = True
+        self.checkpoint_span = checkpoint_span
+        self.atoms = list()
+        self.objects = list()
+        self.checkpoints = list()
+
+    def handle_object_offset(self, name, offset, new_atoms):
+        """
+        Evoked once per object.
+        :param name: str: the name of the object
+        :param offset: int: offset of the object in the uncompressed stream
+        :param new_atoms: list: symbols added to the symbol table since the previous object
+        """
+        self.atoms.extend(new_atoms)
+        self.objects.append({"name": name, "offset": offset, "atom_count": len(self.atoms)})
+
+    def handle_checkpoint(self, uncompressed_offset, compressed_offset, bits, window):
+        """
+        Evoked at deflate block boundaries every checkpoint_span uncompressed bytes for gzip files.
+        :param uncompressed_offset: int: offset of the block in the uncompressed stream
+        :param compressed_offset: int: offset of the first full byte of the block in the file
+        :param bits: int: number of bits of the block in the previous byte
+        :param window: bytes: the uncompressed data preceding the block
+        """
+        self.checkpoints.append((uncompressed_offset, compressed_offset, bits, window))
@@ -7,9 +7,18 @@ import datetime
 import gzip
 import os
 import shutil
+import tempfile
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import infer_dtype, is_datetime64_any_dtype
+# pyarrow is needed only to write columns with pandas ArrowDtype
+pyarrow_available = False
+try:
+    import pyarrow as pa
+    pyarrow_available = True
+except:
+    pass
 
 from .librdata import Writer
 from .custom_errors import PyreadrError
@@ -24,16 +33,149 @@ float_types = {np.dtype('int64'), np.dtype('uint64'), np.dtype('uint32'), np.dty
                np.int64, np.uint64, np.uint32, float, pd.Int64Dtype(), pd.UInt32Dtype(), pd.UInt64Dtype(),
                pd.Float64Dtype(), pd.Float32Dtype()}
 datetime_types = {datetime.datetime, np.datetime64}
+if pyarrow_available:
+    arrow_int_types = {pa.int8(), pa.int16(), pa.int32(), pa.uint8(), pa.uint16()}
 
 pyreadr_to_librdata_types = {"INTEGER": "INTEGER", "NUMERIC": "NUMERIC",
                         "LOGICAL": "LOGICAL", "CHARACTER": "CHARACTER",
                         "OBJECT": "CHARACTER", "DATE": "CHARACTER",
-                        "DATETIME":"CHARACTER"}
+                        "DATETIME":"CHARACTER", "FACTOR": "INTEGER"}
+# with native_dates dates and datetimes are written as R Date and POSIXct
+native_dates_librdata_types = {"DATE": "DATE", "DATETIME": "TIMESTAMP"}
                         
 librdata_min_integer = -2147483648
+# datetime.date(1970, 1, 1).toordinal()
+epoch_ordinal = 719163
 
 
-def get_pyreadr_column_types(df):
+def get_python_type_pyreadr_type(curtype):
+    """
+    pyreadr type for the values of an object column, all of them of the
+    python type curtype.
+    """
+
+    if curtype in int_types:
+        return "INTEGER"
+    elif curtype in float_types:
+        return "NUMERIC"
+    elif curtype == bool:
+        return "LOGICAL"
+    elif curtype == str:
+        return "CHARACTER"
+    elif curtype == datetime.date:
+        return "DATE"
+    elif curtype == datetime.datetime:
+        return "DATETIME"
+    return "OBJECT"
+
+
+def get_object_column_type(values):
+    """
+    pyreadr type and presence of missing values for a numpy array of
+    python objects. pandas infer_dtype classifies the values in one pass
+    in C, a column of strings without missing values (the most common case)
+    needs nothing else. Otherwise the missing values are located and if the
+    rest are not all strings the pyreadr type depends on their exact python
+    types, collected in another pass in C.
+    """
+
+    if infer_dtype(values, skipna=False) == "string":
+        # str subclasses (np.str_) included, written as strings anyway
+        return "CHARACTER", False
+    missing = pd.isna(values)
+    has_missing = bool(missing.any())
+    inferred = infer_dtype(values, skipna=True)
+    if inferred == "empty":
+        # all values missing
+        return "LOGICAL", has_missing
+    if inferred == "string":
+        return "CHARACTER", has_missing
+    pytypes = set(map(type, values[~missing] if has_missing else values))
+    if len(pytypes) == 1:
+        return get_python_type_pyreadr_type(pytypes.pop()), has_missing
+    return "OBJECT", has_missing
+
+
+def get_arrow_column_type(pa_type, native_dates=False):
+    """
+    pyreadr type for a column with pandas ArrowDtype
+    """
+
+    if pa.types.is_string(pa_type) or pa.types.is_large_string(pa_type):
+        return "CHARACTER"
+    elif pa.types.is_boolean(pa_type):
+        return "LOGICAL"
+    elif pa_type in arrow_int_types:
+        return "INTEGER"
+    elif pa.types.is_integer(pa_type) or pa.types.is_floating(pa_type):
+        return "NUMERIC"
+    elif pa.types.is_date(pa_type):
+        return "DATE"
+    elif pa.types.is_timestamp(pa_type) and (pa_type.tz is None or native_dates):
+        return "DATETIME"
+    return "OBJECT"
+
+
+def is_factor(categorical_dtype):
+    """
+    Categories are written as R factors if the levels are strings, as
+    levels in R are always strings. Otherwise they are written as the type
+    of the levels.
+    """
+
+    categories = categorical_dtype.categories
+    return len(categories) > 0 and infer_dtype(categories, skipna=False) == "string"
+
+
+def get_column_type(column, native_dates=False):
+    """
+    From a column (pd.Series) get the pyreadr type and a boolean indicating
+    if the column has missing values (np.nan, None, pd.NA).
+    With native_dates all datetime64 columns, tz-aware and any unit, are
+    DATETIME, otherwise only naive nanosecond ones.
+    """
+
+    col_type = column.dtype
+    # extension types holding their own mask
+    if isinstance(col_type, pd.StringDtype):
+        return "CHARACTER", bool(column.isna().any())
+    if isinstance(col_type, pd.BooleanDtype):
+        return "LOGICAL", bool(column.isna().any())
+    if pyarrow_available and isinstance(col_type, pd.ArrowDtype):
+        return get_arrow_column_type(col_type.pyarrow_dtype, native_dates), bool(column.isna().any())
+    if native_dates and is_datetime64_any_dtype(col_type):
+        return "DATETIME", bool(column.isna().any())
+
+    # categories with string levels are R factors
+    if isinstance(col_type, pd.CategoricalDtype) and is_factor(col_type):
+        return "FACTOR", bool((column.cat.codes.to_numpy() < 0).any())
+    # recover original type for other categories
+    if isinstance(col_type, pd.CategoricalDtype):
+        values = np.asarray(column)
+        col_type = values.dtype
+    else:
+        values = None
+
+    if col_type in int_types:
+        return "INTEGER", False
+    elif col_type in float_types:
+        return "NUMERIC", False
+    elif col_type == bool:
+        return "LOGICAL", False
+    # np.datetime64[ns]
+    elif col_type == np.dtype('<M8[ns]') or col_type == np.datetime64:
+        return "DATETIME", bool(column.isna().any())
+    elif col_type in int_mixed_types:
+        return "INTEGER", bool(column.isna().any())
+    elif col_type == object:
+        if values is None:
+            values = column.to_numpy()
+        return get_object_column_type(values)
+    # generic object
+    return "OBJECT", False
+
+
+def get_pyreadr_column_types(df, native_dates=False):
     """
     From a pandas data frame, get an OrderedDict with column name as key
     and pyreadr column type as value, and also a list with boolean 
@@ -41,85 +183,26 @@ def get_pyreadr_column_types(df):
     The pyreadr column types are needed for downstream processing.
     """
 
-    types = df.dtypes.values.tolist()
-    columns = df.columns.values.tolist()
-
     result = OrderedDict()
-    has_missing_values = [False] * len(columns)
-    for indx, (col_name, col_type) in enumerate(zip(columns, types)):
-        
-        # recover original type for categories
-        if type(col_type) is pd.core.dtypes.dtypes.CategoricalDtype:
-            col_type = np.asarray(df[col_name]).dtype
-        
-        if col_type in int_types:
-            result[col_name] = "INTEGER"
-        elif col_type in float_types:
-            result[col_name] = "NUMERIC"
-        elif col_type == bool:
-            result[col_name] = "LOGICAL"
-        # np.datetime64[ns]
-        elif col_type == np.dtype('<M8[ns]') or col_type == np.datetime64:
-                result[col_name] = "DATETIME"
-                missing = pd.isna(df[col_name])
-                if np.any(missing):
-                    has_missing_values[indx] = True
-        elif col_type == object or col_type in int_mixed_types:
-            missing = pd.isna(df[col_name])
-            if np.any(missing):
-                has_missing_values[indx] = True
-                if col_type in int_mixed_types:
-                    result[col_name] = "INTEGER"
-                    continue
-                col = df[col_name].dropna()
-                if len(col):
-                    curtype = type(col.iloc[0])
-                    equal = np.array(col.apply(lambda x: type(x) == curtype))
-                    if not np.all(equal):
-                        result[col_name] = "OBJECT"
-                        continue
-                else:
-                    result[col_name] = "LOGICAL"
-                    continue
-            else:
-                if col_type in int_mixed_types:
-                    result[col_name] = "INTEGER"
-                    continue
-                curtype = type(df[col_name].iloc[0])
-                equal = np.array(df[col_name].apply(lambda x: type(x) == curtype))
-                if not np.all(equal):
-                    result[col_name] = "OBJECT"
-                    continue
-            
-            if curtype in int_types:
-                result[col_name] = "INTEGER"
-            elif curtype in float_types:
-                result[col_name] = "NUMERIC"
-            elif curtype == bool:
-                result[col_name] = "LOGICAL"
-            elif curtype == str:
-                result[col_name] = "CHARACTER"
-            elif curtype == datetime.date:
-                result[col_name] = "DATE"
-            elif curtype == datetime.datetime:
-                result[col_name] = "DATETIME"
-            else:
-                result[col_name] = "OBJECT"
-            
-        else:
-            # generic object
-            result[col_name] = "OBJECT"
+    has_missing_values = list()
+    for indx, col_name in enumerate(df.columns.values.tolist()):
+        col_type, has_missing = get_column_type(df.iloc[:, indx], native_dates)
+        result[col_name] = col_type
+        has_missing_values.append(has_missing)
     return result, has_missing_values
 
     
-def pyreadr_types_to_librdata_types(pyreadr_types):
+def pyreadr_types_to_librdata_types(pyreadr_types, native_dates=False):
     """
     Transform pyreadr types to data types compatible with librdata
     """
     
     result = OrderedDict()
     for key, value in pyreadr_types.items():
-        result[key] = pyreadr_to_librdata_types[value]
+        if native_dates and value in native_dates_librdata_types:
+            result[key] = native_dates_librdata_types[value]
+        else:
+            result[key] = pyreadr_to_librdata_types[value]
         
     return result
 
@@ -141,7 +224,8 @@ def transform_data(pd_series, dtype, has_missing, dateformat, datetimeformat):
     elif dtype == "NUMERIC":
         pass
     elif dtype == "LOGICAL":
-        if type(pd_series.dtype) is pd.core.dtypes.dtypes.CategoricalDtype:
+        # categorical and extension (boolean, arrow) dtypes
+        if not isinstance(pd_series.dtype, np.dtype):
             pd_series = pd_series.astype('object')
         if has_missing:
             pd_series.loc[pd.isna(pd_series)] = librdata_min_integer
@@ -149,11 +233,11 @@ def transform_data(pd_series, dtype, has_missing, dateformat, datetimeformat):
     elif dtype == "CHARACTER":
         pass
     elif dtype == "OBJECT":
-        if type(pd_series.dtype) is pd.core.dtypes.dtypes.CategoricalDtype:
+        if not isinstance(pd_series.dtype, np.dtype):
             pd_series = pd_series.astype('object')
         pd_series.loc[pd.notnull(pd_series)] = pd_series.loc[pd.notnull(pd_series)].apply(lambda x: str(x))
     elif dtype == "DATE":
-        if type(pd_series.dtype) is pd.core.dtypes.dtypes.CategoricalDtype:
+        if not isinstance(pd_series.dtype, np.dtype):
             pd_series = pd_series.astype('object')
         # for now transforming to string
         # potentially dates could be transformed to true DATE type in R using rdata_append_date_value
@@ -172,6 +256,259 @@ def transform_data(pd_series, dtype, has_missing, dateformat, datetimeformat):
     return pd_series
 
 
+def transform_factor(pd_series):
+    """
+    Get a FACTOR column (categorical pd.Series) and return an int32 array
+    with the R factor codes: the pandas codes plus one and NA for missing
+    values (pandas code -1).
+    """
+
+    codes = pd_series.cat.codes.to_numpy().astype(np.int32) + 1
+    codes[codes == 0] = librdata_min_integer
+    return codes
+
+
+def transform_datetime_native(pd_series):
+    """
+    Get a DATETIME column (pd.Series) and return a float64 array with
+    seconds since the epoch (UTC), missing values as nan, for a POSIXct
+    vector. Naive datetimes are taken as UTC.
+    """
+
+    if not is_datetime64_any_dtype(pd_series.dtype):
+        # datetime objects, categories
+        pd_series = pd.to_datetime(pd_series.astype('object'), utc=True)
+    if pd_series.dt.tz is not None:
+        # to naive UTC, keeping the unit
+        pd_series = pd_series.dt.tz_convert(None)
+    # in the unit of the column, converting to nanoseconds would overflow outside 1677-2262
+    values = pd_series.to_numpy()
+    unit, _ = np.datetime_data(values.dtype)
+    seconds = values.view(np.int64) / (np.timedelta64(1, "s") / np.timedelta64(1, unit))
+    seconds[np.isnat(values)] = np.nan
+    return seconds
+
+
+def transform_date_native(pd_series):
+    """
+    Get a DATE column (pd.Series) and return a float64 array with days
+    since the epoch, missing values as nan, for a Date vector.
+    """
+
+    values = pd_series.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    days = np.full(len(values), np.nan)
+    days[~missing] = np.fromiter(map(datetime.date.toordinal, values[~missing]), np.int64) - epoch_ordinal
+    return days
+
+
+def get_timezone(dtype):
+    """
+    Timezone for the tzone attribute of a DATETIME column (with dtype)
+    written natively, UTC for naive datetimes.
+    """
+
+    if pyarrow_available and isinstance(dtype, pd.ArrowDtype):
+        tz = dtype.pyarrow_dtype.tz
+    else:
+        tz = getattr(dtype, "tz", None)
+    if tz is None:
+        return "UTC"
+    return str(tz)
+
+
+def get_column_values(pd_series, pyreadr_type, librdata_type, has_missing, dateformat, datetimeformat):
+    """
+    Get a column (pd.Series) with its pyreadr and librdata types and return
+    a numpy array with the values to write: float64 for NUMERIC, TIMESTAMP
+    and DATE, int32 for INTEGER and LOGICAL (factor codes included) and
+    object (str or missing) for CHARACTER.
+    """
+
+    if librdata_type == "TIMESTAMP":
+        return transform_datetime_native(pd_series)
+    elif librdata_type == "DATE":
+        return transform_date_native(pd_series)
+    elif pyreadr_type == "FACTOR":
+        return transform_factor(pd_series)
+    tcol = transform_data(pd_series.copy(), pyreadr_type, has_missing, dateformat, datetimeformat)
+    if librdata_type == "NUMERIC":
+        return tcol.to_numpy(dtype=np.float64, na_value=np.nan)
+    elif librdata_type == "CHARACTER":
+        return tcol.to_numpy(dtype=object)
+    return tcol.to_numpy(dtype=np.int32)
+
+
+def add_writer_column(writer, col_name, pyreadr_type, librdata_type, dtype):
+    """
+    Adds a column to the writer with its attributes: the timezone of
+    TIMESTAMP columns and the levels of factors, taken from the column
+    dtype.
+    """
+
+    rcolumn = writer.add_column(str(col_name), librdata_type)
+    if librdata_type == "TIMESTAMP":
+        rcolumn.set_timezone(get_timezone(dtype))
+    elif pyreadr_type == "FACTOR":
+        rcolumn.add_level_labels(dtype.categories)
+        rcolumn.set_ordered(dtype.ordered)
+
+
+class ChunkSpill:
+    """
+    Collects a data frame given in chunks of rows (data frames or pyarrow
+    record batches) in temporary files in folder, one per column, with the
+    values already transformed for librdata, so that it can be written
+    column by column afterwards as R needs, while only one chunk at a time
+    is in memory. Character columns go to two files: the utf-8 strings NUL
+    terminated and the missing values mask. Each chunk is appended to the
+    files with plain writes, and only when the data frame is written out
+    are the files memory mapped, read only, for librdata to take the values.
+    The type of each column is inferred from the chunks and must give the
+    same R type in all of them, except for chunks where the column has
+    only missing values, which fit any type.
+    """
+
+    def __init__(self, folder, dateformat, datetimeformat, native_dates=False):
+        self.folder = folder
+        self.dateformat = dateformat
+        self.datetimeformat = datetimeformat
+        self.native_dates = native_dates
+        self.columns = None
+        self.row_count = 0
+        # per column, None while only missing values came
+        self.pyreadr_types = list()
+        self.librdata_types = list()
+        self.dtypes = list()
+        # per column, missing values to spill once the type is known
+        self.pending_missing = list()
+
+    def _path(self, indx, suffix=""):
+        return os.path.join(self.folder, "column_%d%s" % (indx, suffix))
+
+    def _spill(self, indx, values, missing=None):
+        if not len(values):
+            return
+        if self.librdata_types[indx] == "CHARACTER":
+            strings = values.copy()
+            strings[missing] = ""
+            data = ("\0".join(strings.tolist()) + "\0").encode("utf-8")
+            if data.count(b"\0") != len(strings):
+                msg = "column {0} has strings with NUL characters".format(self.columns[indx])
+                raise PyreadrError(msg)
+            with open(self._path(indx, "_missing"), "ab") as fhandle:
+                fhandle.write(memoryview(np.ascontiguousarray(missing, dtype=np.uint8)))
+        else:
+            data = memoryview(np.ascontiguousarray(values))
+        with open(self._path(indx), "ab") as fhandle:
+            fhandle.write(data)
+
+    def _spill_missing(self, indx, count):
+        librdata_type = self.librdata_types[indx]
+        if count == 0:
+            return
+        if librdata_type == "CHARACTER":
+            self._spill(indx, np.full(count, "", dtype=object), np.ones(count, dtype=bool))
+        elif librdata_type in ("INTEGER", "LOGICAL"):
+            self._spill(indx, np.full(count, librdata_min_integer, dtype=np.int32))
+        else:
+            self._spill(indx, np.full(count, np.nan))
+
+    def append(self, chunk):
+        """
+        Adds the rows of a chunk, a data frame or anything with a to_pandas
+        method (pyarrow record batches and tables).
+        """
+
+        if not isinstance(chunk, pd.DataFrame):
+            if not hasattr(chunk, "to_pandas"):
+                msg = "chunks must be pandas data frames or pyarrow record batches"
+                raise PyreadrError(msg)
+            chunk = chunk.to_pandas()
+        columns = chunk.columns.tolist()
+        if self.columns is None:
+            self.columns = columns
+            self.pyreadr_types = [None] * len(columns)
+            self.librdata_types = [None] * len(columns)
+            self.dtypes = [None] * len(columns)
+            self.pending_missing = [0] * len(columns)
+        elif columns != self.columns:
+            msg = "all chunks must have the same columns"
+            raise PyreadrError(msg)
+
+        pyreadr_types, hasmissing = get_pyreadr_column_types(chunk, self.native_dates)
+        librdata_types = pyreadr_types_to_librdata_types(pyreadr_types, self.native_dates)
+        for indx, col_name in enumerate(columns):
+            column = chunk.iloc[:, indx]
+            pyreadr_type = pyreadr_types[col_name]
+            # object columns with only missing values
+            if pyreadr_type == "LOGICAL" and column.dtype == object and (not len(column) or column.isna().all()):
+                if self.pyreadr_types[indx] is None:
+                    self.pending_missing[indx] += len(column)
+                else:
+                    self._spill_missing(indx, len(column))
+                continue
+            if self.pyreadr_types[indx] is None:
+                self.pyreadr_types[indx] = pyreadr_type
+                self.librdata_types[indx] = librdata_types[col_name]
+                self.dtypes[indx] = column.dtype
+                self._spill_missing(indx, self.pending_missing[indx])
+            elif librdata_types[col_name] != self.librdata_types[indx] or \
+                    (pyreadr_type == "FACTOR") != (self.pyreadr_types[indx] == "FACTOR"):
+                msg = "column {0} is {1} in a chunk and {2} in another, please cast it to one type".format(
+                    col_name, pyreadr_type, self.pyreadr_types[indx])
+                raise PyreadrError(msg)
+            elif pyreadr_type == "FACTOR" and column.dtype != self.dtypes[indx]:
+                msg = "column {0} has different categories in different chunks".format(col_name)
+                raise PyreadrError(msg)
+            elif self.librdata_types[indx] == "TIMESTAMP" and \
+                    get_timezone(column.dtype) != get_timezone(self.dtypes[indx]):
+                msg = "column {0} has different timezones in different chunks".format(col_name)
+                raise PyreadrError(msg)
+            values = get_column_values(column, pyreadr_type, self.librdata_types[indx], hasmissing[indx],
+                                       self.dateformat, self.datetimeformat)
+            if self.librdata_types[indx] == "CHARACTER":
+                self._spill(indx, values, pd.isna(values))
+            else:
+                self._spill(indx, values)
+        self.row_count += chunk.shape[0]
+
+    def _load(self, indx, suffix, dtype):
+        # read only memory map of a spilled file, already complete
+        path = self._path(indx, suffix)
+        if not os.path.isfile(path) or not os.path.getsize(path):
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+
+    def write_table(self, writer, df_name):
+        """
+        Writes the collected data frame as the next object of the open
+        file of writer, taking the values from the spilled files memory
+        mapped read only.
+        """
+
+        if self.columns is None:
+            self.columns = list()
+        for indx in range(len(self.columns)):
+            if self.pyreadr_types[indx] is None:
+                # only missing values
+                self.pyreadr_types[indx] = self.librdata_types[indx] = "LOGICAL"
+                self._spill_missing(indx, self.pending_missing[indx])
+
+        writer.set_row_count(self.row_count)
+        writer.set_table_name(df_name)
+        for indx, col_name in enumerate(self.columns):
+            add_writer_column(writer, col_name, self.pyreadr_types[indx], self.librdata_types[indx], self.dtypes[indx])
+        for indx, librdata_type in enumerate(self.librdata_types):
+            if librdata_type == "CHARACTER":
+                writer.insert_strings(indx, self._load(indx, "", np.uint8), self._load(indx, "_missing", np.uint8))
+            elif librdata_type in ("INTEGER", "LOGICAL"):
+                writer.insert_column(indx, self._load(indx, "", np.int32), librdata_type)
+            else:
+                writer.insert_column(indx, self._load(indx, "", np.float64), librdata_type)
+        writer.end_table()
+
+
 class PyreadrWriter(Writer):
 
     def compress_file(self, src, dst, compression="gzip"):
@@ -192,21 +529,53 @@ class PyreadrWriter(Writer):
             raise PyreadrError("compression {0} not implemented!".format(compression))
 
     
-    def write_r(self, path, file_format, df, df_name, dateformat, datetimeformat, compress):
+    def write_table(self, df, df_name, dateformat, datetimeformat, native_dates=False):
+        """
+        write a data frame as the next object of the open file.
+        df: pandas data frame, or a ChunkSpill with the chunks of one
+        df_name = name of the object to write. Irrelevant if rds format.
+        dateformat: str: string to format dates
+        datetimeformat: str: string to format datetimes
+        native_dates: bool: write dates and datetimes as R Date and POSIXct instead of strings.
+        """
+
+        if isinstance(df, ChunkSpill):
+            df.write_table(self, df_name)
+            return
+
+        pyreadr_types, hasmissing = get_pyreadr_column_types(df, native_dates)
+        librdata_types = pyreadr_types_to_librdata_types(pyreadr_types, native_dates)
+
+        self.set_row_count(df.shape[0])
+        self.set_table_name(df_name)
+        for col_name in df.columns.tolist():
+            add_writer_column(self, col_name, pyreadr_types[col_name], librdata_types[col_name], df[col_name].dtype)
+            
+        for indx, column in enumerate(df):
+            values = get_column_values(df[column], pyreadr_types[column], librdata_types[column], hasmissing[indx],
+                                       dateformat, datetimeformat)
+            self.insert_column(indx, values, librdata_types[column])
+
+        self.end_table()
+
+    def write_r(self, path, file_format, df, df_name, dateformat, datetimeformat, compress, native_dates=False):
         """
         write a RData or Rds file. 
         path: str: path to the file
         file_format: str: rdata or rds
-        df: pandas data frame
-        df_name = name of the object to write. Irrelevant if rds format.
+        df: pandas data frame, or for rdata a dict with object names as keys and data frames as values,
+            all written in the same file
+        df_name = name of the object to write. Irrelevant if rds format or df is a dict.
         dateformat: str: string to format dates
         datetimeformat: str: string to format datetimes
         compress: str: compression to use, for now only gzip supported.
+        native_dates: bool: write dates and datetimes as R Date and POSIXct instead of strings.
         """
         
-        col_names = df.columns.tolist()
-        pyreadr_types, hasmissing = get_pyreadr_column_types(df)
-        librdata_types = pyreadr_types_to_librdata_types(pyreadr_types)
+        if isinstance(df, dict):
+            frames = df.items()
+        else:
+            frames = [(df_name, df)]
         original_path = path
         
         if compress:
@@ -215,22 +584,29 @@ class PyreadrWriter(Writer):
                 PyreadrError("compression {0} not implemented!, Please use gzip".format(compress))
 
         self.open(path, file_format)
-        self.set_row_count(df.shape[0])
-        self.set_table_name(df_name)
-        for col_name in col_names:
-            curtype = librdata_types[col_name]
-            self.add_column(str(col_name), curtype)
-            
-        for indx, column in enumerate(df):
-            col = df[column].copy()
-            tcol = transform_data(col, pyreadr_types[column], hasmissing[indx], dateformat, datetimeformat)
-            tcol = tcol.values.tolist()
-            curtype = librdata_types[column]
-            for row_indx, val in enumerate(tcol):
-                self.insert_value(row_indx, indx, val, curtype)
-            
+        for name, frame in frames:
+            self.write_table(frame, name, dateformat, datetimeformat, native_dates)
         self.close()
 
         if compress:
             self.compress_file(path, original_path, compress)
             os.remove(path)
+
+    def write_r_chunks(self, path, file_format, chunks, df_name, nrows, dateformat, datetimeformat, compress,
+                       native_dates=False):
+        """
+        write a RData or Rds file with a data frame given in chunks of rows.
+        chunks: iterable of pandas data frames or pyarrow record batches
+        nrows: int: total number of rows, checked if not None
+        the rest as in write_r
+        """
+
+        with tempfile.TemporaryDirectory() as folder:
+            spill = ChunkSpill(folder, dateformat, datetimeformat, native_dates)
+            for chunk in chunks:
+                spill.append(chunk)
+                if nrows is not None and spill.row_count > nrows:
+                    raise PyreadrError("the chunks have more rows than nrows")
+            if nrows is not None and spill.row_count != nrows:
+                raise PyreadrError("the chunks have {0} rows instead of nrows {1}".format(spill.row_count, nrows))
+            self.write_r(path, file_format, spill, df_name, dateformat, datetimeformat, compress, native_dates)
@@ -1,7 +1,7 @@
 # cython: c_string_type=str, c_string_encoding=utf8, language_level=3
 
 from libc.time cimport time_t, tm
-from libc.stdint cimport int32_t
+from libc.stdint cimport int32_t, int64_t, uint8_t
 from libc.stddef cimport wchar_t
 
 
@@ -10,6 +10,7 @@ cdef extern from '<sys/types.h>':
 
 cdef extern from 'Python.h':
     object PyByteArray_FromStringAndSize(const char *string, Py_ssize_t len)
+    const char *PyUnicode_AsUTF8(object unicode) except NULL
 
 cdef extern from 'libs/librdata/src/rdata.h':
 
@@ -40,12 +41,35 @@ cdef extern from 'libs/librdata/src/rdata.h':
 
     const char *rdata_error_message(rdata_error_t error_code);
 
+    enum: RDATA_HANDLER_SKIP
+
     ctypedef int (*rdata_column_handler)(const char *name, rdata_type_t type,
             void *data, long count, void *ctx);
     ctypedef int (*rdata_table_handler)(const char *name, void *ctx);
     ctypedef int (*rdata_text_value_handler)(const char *value, int index, void *ctx);
     ctypedef int (*rdata_column_name_handler)(const char *value, int index, void *ctx);
     ctypedef void (*rdata_error_handler)(const char *error_message, void *ctx);
+
+    ctypedef struct rdata_string_vector_t:
+        long count
+        long null_count
+        const char *data
+        const int64_t *offsets
+        const uint8_t *validity
+
+    ctypedef int (*rdata_string_vector_handler)(const rdata_string_vector_t *vector, void *ctx);
+
+    ctypedef struct rdata_checkpoint_t:
+        int64_t uncompressed_offset
+        int64_t compressed_offset
+        int bits
+        const void *window
+        size_t window_len
+
+    ctypedef int (*rdata_object_offset_handler)(const char *name, int64_t offset, char * const *atoms, int atom_count, void *ctx);
+    ctypedef int (*rdata_checkpoint_handler)(const rdata_checkpoint_t *checkpoint, void *ctx);
+    ctypedef int (*rdata_string_scan_handler)(long count, long null_count, int64_t data_size, void *ctx);
+    ctypedef int (*rdata_column_filter_handler)(int index, void *ctx);
     ctypedef int (*rdata_progress_handler)(double progress, void *ctx);
 
     #IF UNAME_SYSNAME == 'Windows':
@@ -80,6 +104,7 @@ cdef extern from 'libs/librdata/src/rdata.h':
     rdata_error_t rdata_set_row_name_handler(rdata_parser_t *parser, rdata_column_name_handler row_name_handler);
     rdata_error_t rdata_set_text_value_handler(rdata_parser_t *parser, rdata_text_value_handler text_value_handler);
     rdata_error_t rdata_set_value_label_handler(rdata_parser_t *parser, rdata_text_value_handler value_label_handler);
+    rdata_error_t rdata_set_column_class_handler(rdata_parser_t *parser, rdata_text_value_handler column_class_handler);
     rdata_error_t rdata_set_dim_handler(rdata_parser_t *parser, rdata_column_handler dim_handler);
     rdata_error_t rdata_set_dim_name_handler(rdata_parser_t *parser, rdata_text_value_handler dim_name_handler);
     rdata_error_t rdata_set_error_handler(rdata_parser_t *parser, rdata_error_handler error_handler);
@@ -89,9 +114,19 @@ cdef extern from 'libs/librdata/src/rdata.h':
     rdata_error_t rdata_set_read_handler(rdata_parser_t *parser, rdata_read_handler read_handler);
     rdata_error_t rdata_set_update_handler(rdata_parser_t *parser, rdata_update_handler update_handler);
     rdata_error_t rdata_set_io_ctx(rdata_parser_t *parser, void *io_ctx);
+    rdata_error_t rdata_set_column_data_handoff(rdata_parser_t *parser, int handoff);
+    rdata_error_t rdata_set_string_vector_handler(rdata_parser_t *parser, rdata_string_vector_handler string_vector_handler);
+    rdata_error_t rdata_set_column_filter_handler(rdata_parser_t *parser, rdata_column_filter_handler column_filter_handler);
+    rdata_error_t rdata_set_scan_mode(rdata_parser_t *parser, int scan_mode, rdata_string_scan_handler string_scan_handler);
+    rdata_error_t rdata_set_decompress_threads(rdata_parser_t *parser, int decompress_threads);
+    rdata_error_t rdata_set_row_window(rdata_parser_t *parser, int64_t skip, int64_t limit);
+    rdata_error_t rdata_set_index_handlers(rdata_parser_t *parser, rdata_object_offset_handler object_offset_handler,
+            rdata_checkpoint_handler checkpoint_handler, int64_t checkpoint_span);
+    rdata_error_t rdata_set_start_object(rdata_parser_t *parser, int64_t offset, char * const *atoms, int atom_count,
+            const rdata_checkpoint_t *checkpoint);
     # /* rdata_parse works on RData and RDS. The table handler will be called once
     #  * per data frame in RData files, and zero times on RDS files. */
-    rdata_error_t rdata_parse(rdata_parser_t *parser, const char *filename, void *user_ctx);
+    rdata_error_t rdata_parse(rdata_parser_t *parser, const char *filename, void *user_ctx) nogil;
 
 
     # // Write API
@@ -105,13 +140,18 @@ cdef extern from 'libs/librdata/src/rdata.h':
 
     rdata_writer_t *rdata_writer_init(rdata_data_writer write_callback, rdata_file_format_t format);
     void rdata_writer_free(rdata_writer_t *writer);
+    rdata_error_t rdata_set_output_buffer_size(rdata_writer_t *writer, size_t size);
+    rdata_error_t rdata_writer_flush(rdata_writer_t *writer);
 
     rdata_column_t *rdata_add_column(rdata_writer_t *writer, const char *name, rdata_type_t type);
 
     rdata_error_t rdata_column_set_label(rdata_column_t *column, const char *label);
     rdata_error_t rdata_column_add_factor(rdata_column_t *column, const char *factor);
+    rdata_error_t rdata_column_set_ordered(rdata_column_t *column, int ordered);
+    rdata_error_t rdata_column_set_timezone(rdata_column_t *column, const char *timezone);
 
     rdata_column_t *rdata_get_column(rdata_writer_t *writer, int32_t j);
+    void rdata_clear_columns(rdata_writer_t *writer);
 
     rdata_error_t rdata_begin_file(rdata_writer_t *writer, void *ctx);
     rdata_error_t rdata_begin_table(rdata_writer_t *writer, const char *variable_name);
@@ -119,6 +159,8 @@ cdef extern from 'libs/librdata/src/rdata.h':
 
     rdata_error_t rdata_append_real_value(rdata_writer_t *writer, double value);
     rdata_error_t rdata_append_int32_value(rdata_writer_t *writer, int32_t value);
+    rdata_error_t rdata_append_real_values(rdata_writer_t *writer, const double *values, int32_t count);
+    rdata_error_t rdata_append_int32_values(rdata_writer_t *writer, const int32_t *values, int32_t count);
     rdata_error_t rdata_append_timestamp_value(rdata_writer_t *writer, time_t value);
     rdata_error_t rdata_append_date_value(rdata_writer_t *writer, tm *value)
     rdata_error_t rdata_append_logical_value(rdata_writer_t *writer, int value);
@@ -132,6 +174,10 @@ cdef extern from 'libs/librdata/src/rdata_io_unistd.h':
     cdef struct rdata_unistd_io_ctx_t 'rdata_unistd_io_ctx_s':
         int fd
 
+cdef extern from 'libs/librdata/src/rdata_io_mmap.h':
+    void rdata_mmap_io_init(rdata_parser_t *parser)
+    void rdata_memory_io_init(rdata_parser_t *parser, const void *data, size_t size)
+
 cdef extern from "conditional_includes.h":
     wchar_t* PyUnicode_AsWideCharString(object, Py_ssize_t *) except NULL
     int _wsopen(const wchar_t *filename, int oflag, int shflag, int pmode)
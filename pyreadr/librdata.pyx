@@ -6,7 +6,14 @@ import numpy as np
 import pandas as pd
 import os.path
 from cython.operator cimport dereference as deref
-from libc.string cimport strlen
+from libc.string cimport strlen, memcpy
+from libc.stdlib cimport free, malloc
+from cpython.buffer cimport PyBuffer_FillInfo
+from cpython.unicode cimport PyUnicode_DecodeUTF8
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from cpython.bytearray cimport PyByteArray_AS_STRING
+from cpython.buffer cimport PyBUF_WRITE
+from cpython.memoryview cimport PyMemoryView_FromMemory
 
 from .custom_errors import PyreadrError, LibrdataError
 
@@ -20,6 +27,50 @@ class DataType(Enum):
     DATE       = rdata_type_t.RDATA_TYPE_DATE
 
 
+cdef class _ColumnBuffer:
+    """
+    Owns a column buffer allocated by librdata. numpy arrays created with
+    np.frombuffer keep a reference to it, the buffer is freed together with
+    the last of them.
+    """
+    cdef void *data
+    cdef Py_ssize_t nbytes
+
+    def __cinit__(self):
+        self.data = NULL
+        self.nbytes = 0
+
+    def __dealloc__(self):
+        free(self.data)
+
+    def __getbuffer__(self, Py_buffer *buffer, int flags):
+        PyBuffer_FillInfo(buffer, self, self.data, self.nbytes, 0, flags)
+
+    def __releasebuffer__(self, Py_buffer *buffer):
+        pass
+
+
+cdef object _column_data_to_array(void *data, rdata_type_t type, long count):
+    """
+    Takes ownership of the buffer handed off by librdata and wraps it in a numpy
+    array without copying. Returns None for types without a data buffer.
+    """
+    cdef _ColumnBuffer owner = _ColumnBuffer.__new__(_ColumnBuffer)
+    owner.data = data
+
+    if type == rdata_type_t.RDATA_TYPE_REAL or type == rdata_type_t.RDATA_TYPE_TIMESTAMP or type == rdata_type_t.RDATA_TYPE_DATE:
+        dtype = np.float64
+    elif type == rdata_type_t.RDATA_TYPE_INT32 or type == rdata_type_t.RDATA_TYPE_LOGICAL:
+        dtype = np.int32
+    else:
+        return None
+
+    if count <= 0 or data == NULL:
+        return np.empty([0], dtype=dtype)
+    owner.nbytes = count * np.dtype(dtype).itemsize
+    return np.frombuffer(owner, dtype=dtype)
+
+
 cdef int _os_open(path, mode) noexcept:
     cdef int flags
     cdef Py_ssize_t length
@@ -48,7 +99,155 @@ cdef int _os_close(int fd) noexcept:
         return close(fd)
 
 
-cdef int _handle_open(const char* path, void* io_ctx) noexcept:
+# size of the read buffer for file like objects
+cdef Py_ssize_t _FILEOBJ_BUFFER_SIZE = 1024 * 1024
+# default output buffer of the writer
+cdef Py_ssize_t _OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+
+cdef class _FileObjectReader:
+    """
+    io context for reading from a binary file like object. Reads are served
+    from a buffer filled with readinto. The beginning of the stream is kept in
+    the buffer until it is full, so that librdata can go back to the start
+    after sniffing the compression also when the stream is not seekable.
+    Offsets are relative to the position of the stream when reading started.
+    """
+    cdef object fileobj
+    cdef bytearray buffer
+    cdef object view
+    cdef char *data
+    cdef Py_ssize_t capacity
+    # stream offset of the first byte in the buffer, number of valid bytes in
+    # the buffer and current position
+    cdef Py_ssize_t start
+    cdef Py_ssize_t length
+    cdef Py_ssize_t pos
+    cdef Py_ssize_t base
+    cdef bint seekable
+    cdef object error
+
+    def __cinit__(self, fileobj, Py_ssize_t capacity=_FILEOBJ_BUFFER_SIZE):
+        self.fileobj = fileobj
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.data = PyByteArray_AS_STRING(self.buffer)
+        self.capacity = capacity
+        self.start = 0
+        self.length = 0
+        self.pos = 0
+        self.error = None
+        seekable = getattr(fileobj, "seekable", None)
+        self.seekable = seekable is not None and seekable()
+        self.base = fileobj.tell() if self.seekable else 0
+
+    cdef Py_ssize_t _readinto(self, target) except -1:
+        n = self.fileobj.readinto(target)
+        if n is None:
+            raise PyreadrError("Non blocking streams are not supported")
+        return n
+
+    cdef Py_ssize_t fill(self) except -1:
+        """Reads the next chunk of the stream into the buffer, returns the number of bytes read"""
+        cdef Py_ssize_t n
+        if self.start == 0 and self.length < self.capacity:
+            n = self._readinto(self.view[self.length:])
+            self.length += n
+        else:
+            self.start += self.length
+            self.length = 0
+            n = self._readinto(self.view)
+            self.length = n
+        return n
+
+    cdef Py_ssize_t read(self, char *buf, Py_ssize_t nbyte) except -1:
+        cdef Py_ssize_t copied = 0
+        cdef Py_ssize_t offset, n
+        while copied < nbyte:
+            offset = self.pos - self.start
+            if offset < self.length:
+                n = min(nbyte - copied, self.length - offset)
+                memcpy(buf + copied, self.data + offset, n)
+                copied += n
+                self.pos += n
+            elif nbyte - copied >= self.capacity and self.start > 0:
+                # large reads go straight to the destination
+                n = self._readinto(PyMemoryView_FromMemory(buf + copied, nbyte - copied, PyBUF_WRITE))
+                if n == 0:
+                    break
+                copied += n
+                self.pos += n
+                self.start = self.pos
+                self.length = 0
+            elif self.fill() == 0:
+                break
+        return copied
+
+    cdef Py_ssize_t seek(self, Py_ssize_t offset, int whence) except -1:
+        cdef Py_ssize_t target
+        if whence == RDATA_SEEK_SET:
+            target = offset
+        elif whence == RDATA_SEEK_CUR:
+            target = self.pos + offset
+        elif whence == RDATA_SEEK_END and self.seekable:
+            target = self.fileobj.seek(0, os.SEEK_END) - self.base
+            self.start = target
+            self.length = 0
+            target += offset
+        else:
+            return -1
+        if target < 0:
+            return -1
+        if self.start <= target <= self.start + self.length:
+            self.pos = target
+        elif self.seekable:
+            self.fileobj.seek(self.base + target)
+            self.start = target
+            self.length = 0
+            self.pos = target
+        elif target > self.pos:
+            # forward on a non seekable stream: read and discard
+            while self.start + self.length < target:
+                self.start += self.length
+                self.length = 0
+                self.length = self._readinto(self.view)
+                if self.length == 0:
+                    return -1
+            self.pos = target
+        else:
+            return -1
+        return target
+
+
+cdef int _handle_fileobj_open(const char *path, void *io_ctx) noexcept with gil:
+    return 0
+
+cdef int _handle_fileobj_close(void *io_ctx) noexcept with gil:
+    # the file like object belongs to the caller and stays open
+    return 0
+
+cdef rdata_off_t _handle_fileobj_seek(rdata_off_t offset, rdata_io_flags_t whence, void *io_ctx) noexcept with gil:
+    reader = <_FileObjectReader>io_ctx
+    try:
+        return reader.seek(offset, whence)
+    except Exception as e:
+        reader.error = e
+        return -1
+
+cdef ssize_t _handle_fileobj_read(void *buf, size_t nbyte, void *io_ctx) noexcept with gil:
+    reader = <_FileObjectReader>io_ctx
+    try:
+        return reader.read(<char *>buf, nbyte)
+    except Exception as e:
+        reader.error = e
+        return -1
+
+cdef rdata_error_t _handle_fileobj_update(long file_size, rdata_progress_handler progress_handler, void *user_ctx,
+                                          void *io_ctx) noexcept with gil:
+    return rdata_error_t.RDATA_OK
+
+
+cdef int _handle_open(const char* path, void* io_ctx) noexcept with gil:
     cdef rdata_unistd_io_ctx_t* ctx = <rdata_unistd_io_ctx_t*>io_ctx
     cdef int fd
     if not os.path.isfile(path):
@@ -57,27 +256,32 @@ cdef int _handle_open(const char* path, void* io_ctx) noexcept:
     ctx.fd = fd
     return fd
 
-cdef int _handle_table(const char *name, void *ctx) noexcept:
+cdef int _handle_table(const char *name, void *ctx) noexcept with gil:
     parser = <Parser>ctx
     try:
         Parser.__handle_table(parser, name)
+        # objects that are not going to be parsed are skipped by librdata without further callbacks
+        if not parser.parse_current_table:
+            return RDATA_HANDLER_SKIP
         return rdata_error_t.RDATA_OK
     except Exception as e:
         parser._error = e
         return rdata_error_t.RDATA_ERROR_USER_ABORT
 
 
-cdef int _handle_column(const char *name, rdata_type_t type, void *data, long count, void *ctx) noexcept:
+cdef int _handle_column(const char *name, rdata_type_t type, void *data, long count, void *ctx) noexcept with gil:
     parser = <Parser>ctx
     try:
+        # the buffer is handed off to us, wrap it first so that it is always freed
+        array = _column_data_to_array(data, type, count)
         if parser.parse_current_table:
-            Parser.__handle_column(parser, name, type, data, count)
+            Parser.__handle_column(parser, name, type, array, count)
         return rdata_error_t.RDATA_OK
     except Exception as e:
         parser._error = e
         return rdata_error_t.RDATA_ERROR_USER_ABORT
 
-cdef int _handle_dim(const char *name, rdata_type_t type, void *data, long count, void *ctx) noexcept:
+cdef int _handle_dim(const char *name, rdata_type_t type, void *data, long count, void *ctx) noexcept with gil:
     parser = <Parser>ctx
     try:
         if parser.parse_current_table:
@@ -88,35 +292,38 @@ cdef int _handle_dim(const char *name, rdata_type_t type, void *data, long count
         return rdata_error_t.RDATA_ERROR_USER_ABORT
 
 
-cdef int _handle_column_name(const char *name, int index, void *ctx) noexcept:
+cdef int _handle_column_name(const char *name, int index, void *ctx) noexcept with gil:
     parser = <Parser>ctx
     try:
-        Parser.__handle_column_name(parser, name, index)
+        if parser.parse_current_table:
+            Parser.__handle_column_name(parser, name, index)
         return rdata_error_t.RDATA_OK
     except Exception as e:
         parser._error = e
         return rdata_error_t.RDATA_ERROR_USER_ABORT
 
-cdef int _handle_dim_name(const char *name, int index, void *ctx) noexcept:
+cdef int _handle_dim_name(const char *name, int index, void *ctx) noexcept with gil:
     parser = <Parser>ctx
     try:
-        Parser.__handle_dim_name(parser, name, index)
+        if parser.parse_current_table:
+            Parser.__handle_dim_name(parser, name, index)
         return rdata_error_t.RDATA_OK
     except Exception as e:
         parser._error = e
         return rdata_error_t.RDATA_ERROR_USER_ABORT
 
-cdef int _handle_row_name(const char *name, int index, void *ctx) noexcept:
+cdef int _handle_row_name(const char *name, int index, void *ctx) noexcept with gil:
     parser = <Parser>ctx
     try:
-        Parser.__handle_row_name(parser, name, index)
+        if parser.parse_current_table:
+            Parser.__handle_row_name(parser, name, index)
         return rdata_error_t.RDATA_OK
     except Exception as e:
         parser._error = e
         return rdata_error_t.RDATA_ERROR_USER_ABORT
 
 
-cdef int _handle_text_value(const char *value, int index, void *ctx) noexcept:
+cdef int _handle_text_value(const char *value, int index, void *ctx) noexcept with gil:
     parser = <Parser>ctx
     try:
         if parser.parse_current_table:
@@ -127,7 +334,138 @@ cdef int _handle_text_value(const char *value, int index, void *ctx) noexcept:
         return rdata_error_t.RDATA_ERROR_USER_ABORT
 
 
-cdef int _handle_value_label(const char *value, int index, void *ctx) noexcept:
+cdef int _handle_column_class(const char *value, int index, void *ctx) noexcept with gil:
+    parser = <Parser>ctx
+    try:
+        if parser.parse_current_table and value != NULL:
+            parser.handle_column_class(value, index)
+        return rdata_error_t.RDATA_OK
+    except Exception as e:
+        parser._error = e
+        return rdata_error_t.RDATA_ERROR_USER_ABORT
+
+
+cdef object _string_vector_to_arrow(const rdata_string_vector_t *vector):
+    # the buffers belong to librdata and are reused for the next vector, so they are copied once here
+    import pyarrow as pa
+
+    validity = None
+    if vector.null_count:
+        validity = pa.py_buffer(PyBytes_FromStringAndSize(<const char *>vector.validity, (vector.count + 7) // 8))
+    offsets = pa.py_buffer(PyBytes_FromStringAndSize(<const char *>vector.offsets, (vector.count + 1) * sizeof(int64_t)))
+    data = pa.py_buffer(PyBytes_FromStringAndSize(vector.data, vector.offsets[vector.count]))
+    return pa.Array.from_buffers(pa.large_string(), vector.count, [validity, offsets, data], vector.null_count)
+
+
+cdef object _string_vector_to_numpy(const rdata_string_vector_t *vector):
+    cdef long i
+    cdef int64_t start, end
+    cdef object[:] view
+
+    values = np.empty(vector.count, dtype=object)
+    view = values
+    for i in range(vector.count):
+        if vector.validity[i >> 3] & (1 << (i & 7)):
+            start = vector.offsets[i]
+            end = vector.offsets[i+1]
+            view[i] = PyUnicode_DecodeUTF8(vector.data + start, end - start, NULL)
+        else:
+            view[i] = np.nan
+    return values
+
+
+cdef class DeferredStrings:
+    """
+    A character vector kept as a copy of the librdata buffers, the strings are decoded only when materialize is
+    called. Used when it is not known yet if the vector is going to be needed.
+    """
+    cdef readonly long count
+    cdef long null_count
+    cdef bytes data
+    cdef bytes offsets
+    cdef bytes validity
+
+    def materialize(self, arrow_strings=False):
+        """
+        Returns a numpy object array, or a pyarrow array if arrow_strings is True
+        """
+        cdef rdata_string_vector_t vector
+        vector.count = self.count
+        vector.null_count = self.null_count
+        vector.data = self.data
+        vector.offsets = <const int64_t *><const char *>self.offsets
+        vector.validity = <const uint8_t *><const char *>self.validity
+        if arrow_strings:
+            return _string_vector_to_arrow(&vector)
+        return _string_vector_to_numpy(&vector)
+
+
+cdef DeferredStrings _string_vector_to_deferred(const rdata_string_vector_t *vector):
+    cdef DeferredStrings deferred = DeferredStrings.__new__(DeferredStrings)
+    deferred.count = vector.count
+    deferred.null_count = vector.null_count
+    deferred.data = PyBytes_FromStringAndSize(vector.data, vector.offsets[vector.count])
+    deferred.offsets = PyBytes_FromStringAndSize(<const char *>vector.offsets, (vector.count + 1) * sizeof(int64_t))
+    deferred.validity = PyBytes_FromStringAndSize(<const char *>vector.validity, (vector.count + 7) // 8)
+    return deferred
+
+
+cdef int _handle_string_vector(const rdata_string_vector_t *vector, void *ctx) noexcept with gil:
+    parser = <Parser>ctx
+    try:
+        if parser.parse_current_table:
+            Parser.__handle_string_vector(parser, vector)
+        return rdata_error_t.RDATA_OK
+    except Exception as e:
+        parser._error = e
+        return rdata_error_t.RDATA_ERROR_USER_ABORT
+
+
+cdef int _handle_object_offset(const char *name, int64_t offset, char * const *atoms, int atom_count,
+                               void *ctx) noexcept with gil:
+    parser = <Parser>ctx
+    try:
+        Parser.__handle_object_offset(parser, name, offset, atoms, atom_count)
+        return rdata_error_t.RDATA_OK
+    except Exception as e:
+        parser._error = e
+        return rdata_error_t.RDATA_ERROR_USER_ABORT
+
+
+cdef int _handle_checkpoint(const rdata_checkpoint_t *checkpoint, void *ctx) noexcept with gil:
+    parser = <Parser>ctx
+    try:
+        window = PyBytes_FromStringAndSize(<const char *>checkpoint.window, checkpoint.window_len)
+        parser.handle_checkpoint(checkpoint.uncompressed_offset, checkpoint.compressed_offset, checkpoint.bits, window)
+        return rdata_error_t.RDATA_OK
+    except Exception as e:
+        parser._error = e
+        return rdata_error_t.RDATA_ERROR_USER_ABORT
+
+
+cdef int _handle_column_filter(int index, void *ctx) noexcept with gil:
+    parser = <Parser>ctx
+    try:
+        if parser.parse_current_table and not parser.handle_column_filter(index):
+            return RDATA_HANDLER_SKIP
+        return rdata_error_t.RDATA_OK
+    except Exception as e:
+        parser._error = e
+        return rdata_error_t.RDATA_ERROR_USER_ABORT
+
+
+cdef int _handle_string_scan(long count, long null_count, int64_t data_size, void *ctx) noexcept with gil:
+    parser = <Parser>ctx
+    try:
+        if parser.parse_current_table:
+            parser.handle_string_scan(count, null_count, data_size)
+        return rdata_error_t.RDATA_OK
+    except Exception as e:
+        parser._error = e
+        return rdata_error_t.RDATA_ERROR_USER_ABORT
+
+
+cdef int _handle_value_label(const char *value, int index, void *ctx) noexcept with gil:
     parser = <Parser>ctx
     try:
         if parser.parse_current_table:
@@ -145,17 +483,36 @@ cdef class Parser:
     cdef int _row_count
     cdef int _var_count
     parse_current_table = True
-
-    cpdef parse(self, path) noexcept:
-
-        cdef rdata_error_t status
-
+    # if True character vectors are delivered as pyarrow arrays instead of numpy object arrays
+    arrow_strings = False
+    # if True the file is memory mapped instead of read with read() calls
+    use_mmap = False
+    # if True the objects are not parsed, handle_object_offset and handle_checkpoint are called instead
+    index_mode = False
+    checkpoint_span = 0
+    # if True the data of vectors is skipped, handle_column gets an empty array and the length,
+    # for character vectors handle_string_scan is called afterwards
+    scan_mode = False
+    # if True character vectors are delivered as DeferredStrings, to be decoded later only if needed
+    defer_strings = False
+    # if True handle_column_filter is called before each column of a data frame, returning False skips the column
+    filter_columns = False
+    # if more than 1 compressed files are decompressed in a background thread while parsing,
+    # bzip2 files with this number of threads
+    decompress_threads = 1
+    # (skip, limit) rows read of each column of a data frame and of its row names, limit -1 meaning all
+    row_window = None
+    # (offset, atoms, checkpoint) as collected in index mode, to parse only the object at that offset
+    start_object = None
+    cdef int _atom_count
+    cdef char **_start_atoms
+    cdef object _start_refs
+
+    cdef int _init_parser(self) except -1:
         self._this = rdata_parser_init();
         self._fd = 0
         self._error = None
-
-        if platform.system() == 'Windows':
-            rdata_set_open_handler(self._this, _handle_open)
+        self._atom_count = 0
 
         rdata_set_table_handler(self._this, _handle_table)
         rdata_set_column_handler(self._this, _handle_column)
@@ -165,10 +522,67 @@ cdef class Parser:
         rdata_set_row_name_handler(self._this, _handle_row_name)
         rdata_set_text_value_handler(self._this, _handle_text_value)
         rdata_set_value_label_handler(self._this, _handle_value_label)
+        rdata_set_string_vector_handler(self._this, _handle_string_vector)
+        rdata_set_column_class_handler(self._this, _handle_column_class)
+        rdata_set_column_data_handoff(self._this, 1)
+        if self.filter_columns:
+            rdata_set_column_filter_handler(self._this, _handle_column_filter)
+        if self.scan_mode:
+            rdata_set_scan_mode(self._this, 1, _handle_string_scan)
+        if self.decompress_threads > 1:
+            rdata_set_decompress_threads(self._this, self.decompress_threads)
+        if self.row_window is not None:
+            rdata_set_row_window(self._this, self.row_window[0], self.row_window[1])
+        if self.index_mode:
+            rdata_set_index_handlers(self._this, _handle_object_offset, _handle_checkpoint, self.checkpoint_span)
+        if self.start_object is not None:
+            self._set_start_object()
+        return 0
+
+    cdef int _set_start_object(self) except -1:
+        cdef rdata_checkpoint_t checkpoint
+        cdef const unsigned char[::1] window
+        cdef Py_ssize_t i
+
+        offset, atoms, start_checkpoint = self.start_object
+        # the encoded atoms and the window must live until the parsing is done
+        self._start_refs = [atom.encode('utf-8') for atom in atoms]
+        self._start_atoms = <char **>malloc(max(len(atoms), 1) * sizeof(char *))
+        if self._start_atoms == NULL:
+            raise MemoryError()
+        for i in range(len(atoms)):
+            self._start_atoms[i] = self._start_refs[i]
+        if start_checkpoint is None:
+            rdata_set_start_object(self._this, offset, self._start_atoms, len(atoms), NULL)
+            return 0
+
+        checkpoint.uncompressed_offset, checkpoint.compressed_offset, checkpoint.bits, window_bytes = start_checkpoint
+        self._start_refs.append(window_bytes)
+        window = window_bytes
+        checkpoint.window = &window[0]
+        checkpoint.window_len = window.shape[0]
+        rdata_set_start_object(self._this, offset, self._start_atoms, len(atoms), &checkpoint)
+        return 0
+
+    cdef _run(self, path):
 
-        status = rdata_parse(self._this, path, <void*>self)
-        #status = rdata_parse(self._this, path.encode('utf-8'), <void*>self)
+        cdef rdata_error_t status
+        cdef rdata_parser_t *c_parser = self._this
+        cdef const char *c_path
+        cdef void *c_ctx = <void*>self
+
+        # keep a reference to the encoded path while the GIL is released
+        if isinstance(path, str):
+            path = path.encode('utf-8')
+        c_path = path
+        # decompression and parsing run without the GIL, the handlers take it back
+        # when they need to hand data to python
+        with nogil:
+            status = rdata_parse(c_parser, c_path, c_ctx)
         rdata_parser_free(self._this)
+        free(self._start_atoms)
+        self._start_atoms = NULL
+        self._start_refs = None
 
         if status != RDATA_OK:
             if self._error is not None:
@@ -177,9 +591,62 @@ cdef class Parser:
                 message = rdata_error_message(status)
                 raise LibrdataError(message)
 
+    cpdef parse(self, path) noexcept:
+
+        self._init_parser()
+        if self.use_mmap:
+            rdata_mmap_io_init(self._this)
+        elif platform.system() == 'Windows':
+            rdata_set_open_handler(self._this, _handle_open)
+        self._run(path)
+
+    cpdef parse_buffer(self, data):
+        """
+        parses an object supporting the buffer protocol (bytes, bytearray, memoryview ...)
+        holding the contents of a RData or Rds file. The data is read in place, without copying.
+        """
+
+        cdef const unsigned char[::1] view = memoryview(data).cast('B')
+        cdef const void *ptr = NULL
+        if view.shape[0]:
+            ptr = &view[0]
+
+        self._init_parser()
+        rdata_memory_io_init(self._this, ptr, view.shape[0])
+        self._run("")
+
+    cpdef parse_fileobj(self, fileobj):
+        """
+        parses a binary file like object with a readinto method. The stream does not need to be
+        seekable.
+        """
+
+        cdef _FileObjectReader reader = _FileObjectReader(fileobj)
+
+        self._init_parser()
+        rdata_set_open_handler(self._this, _handle_fileobj_open)
+        rdata_set_close_handler(self._this, _handle_fileobj_close)
+        rdata_set_seek_handler(self._this, _handle_fileobj_seek)
+        rdata_set_read_handler(self._this, _handle_fileobj_read)
+        rdata_set_update_handler(self._this, _handle_fileobj_update)
+        rdata_set_io_ctx(self._this, <void *>reader)
+        try:
+            self._run("")
+        except LibrdataError:
+            # report the error raised by the file like object rather than the generic read error
+            if reader.error is not None:
+                raise reader.error
+            raise
+
     def handle_table(self, name):
         pass
 
+    def handle_object_offset(self, name, offset, new_atoms):
+        pass
+
+    def handle_checkpoint(self, uncompressed_offset, compressed_offset, bits, window):
+        pass
+
     def handle_column(self, name, data_type, data, count):
         pass
 
@@ -192,7 +659,7 @@ cdef class Parser:
     def handle_dim_name(self, name, index):
         pass
 
-    def _handle_row_name(self, name, index):
+    def handle_row_name(self, name, index):
         pass
 
     def handle_text_value(self, name, index):
@@ -201,26 +668,25 @@ cdef class Parser:
     def handle_value_label(self, name, index):
         pass
 
+    def handle_string_vector(self, values):
+        pass
+
+    def handle_column_class(self, name, index):
+        pass
+
+    def handle_string_scan(self, count, null_count, data_size):
+        pass
+
+    def handle_column_filter(self, index):
+        return True
+
     cdef __handle_table(self, const char* name) noexcept:
         if name == NULL:
             self.handle_table(None)
         else:
             self.handle_table(name)
 
-    cdef __handle_column(self, const char *name, rdata_type_t type, void *data, long count) noexcept:
-        cdef double *doubles = <double*>data
-        cdef int *ints = <int*>data
-
-        if type in [rdata_type_t.RDATA_TYPE_REAL, rdata_type_t.RDATA_TYPE_TIMESTAMP, rdata_type_t.RDATA_TYPE_DATE]:
-            array = np.empty([count], dtype=np.float64)
-            for i in range(count):
-                array[i] = doubles[i];
-        elif type == rdata_type_t.RDATA_TYPE_INT32 or type == rdata_type_t.RDATA_TYPE_LOGICAL:
-            array = np.empty([count], dtype=np.int32)
-            for i in range(count):
-                array[i] = ints[i];
-        else:
-            array = None
+    cdef __handle_column(self, const char *name, rdata_type_t type, object array, long count) noexcept:
 
         if name == NULL:
             new_name = None
@@ -229,6 +695,12 @@ cdef class Parser:
         data_type = DataType(type)
         self.handle_column(new_name, data_type, array, count)
 
+    cdef __handle_object_offset(self, const char *name, int64_t offset, char * const *atoms, int atom_count):
+        # the symbol table only grows, only the symbols added since the previous object are passed on
+        new_atoms = [atoms[i] for i in range(self._atom_count, atom_count)]
+        self._atom_count = atom_count
+        self.handle_object_offset(name, offset, new_atoms)
+
     cdef __handle_column_name(self, const char *name, int index) noexcept: 
         self.handle_column_name(name, index)
 
@@ -268,13 +740,32 @@ cdef class Parser:
     cdef __handle_value_label(self, const char *value, int index) noexcept:
         self.handle_value_label(value, index)
 
+    cdef __handle_string_vector(self, const rdata_string_vector_t *vector) noexcept:
+        if self.defer_strings:
+            self.handle_string_vector(_string_vector_to_deferred(vector))
+        elif self.arrow_strings:
+            self.handle_string_vector(_string_vector_to_arrow(vector))
+        else:
+            self.handle_string_vector(_string_vector_to_numpy(vector))
+
+
+cdef bint _on_windows = platform.system() == 'Windows'
+
 
 cdef ssize_t _handle_write(const void *data, size_t len, void *ctx) noexcept:
+    # called with whole blocks of the output buffer, written until done
     cdef int fd = deref(<int*>ctx)
-    if platform.system() == 'Windows':
-        return _write(fd, data, len)
-    else:
-        return write(fd, data, len)
+    cdef size_t done = 0
+    cdef ssize_t written
+    while done < len:
+        if _on_windows:
+            written = _write(fd, <const char *>data + done, len - done)
+        else:
+            written = write(fd, <const char *>data + done, len - done)
+        if written <= 0:
+            return -1
+        done += written
+    return done
 
 
 cdef class Column:
@@ -282,11 +773,22 @@ cdef class Column:
 
     def add_level_labels(self, labels):
         for label in labels:
-            rdata_column_add_factor(self._this, label.encode('utf-8'))
+            if rdata_column_add_factor(self._this, label.encode('utf-8')) != RDATA_OK:
+                raise PyreadrError("Only INTEGER columns have levels")
+
+    def set_ordered(self, ordered):
+        if rdata_column_set_ordered(self._this, bool(ordered)) != RDATA_OK:
+            raise PyreadrError("Only INTEGER columns can be ordered factors")
+
+    def set_timezone(self, timezone):
+        if rdata_column_set_timezone(self._this, timezone.encode('utf-8')) != RDATA_OK:
+            raise PyreadrError("Only TIMESTAMP columns have a timezone")
 
 
 cdef class Writer:
 
+    # bytes of output collected before each write, 0 writes every value as it comes
+    cdef readonly Py_ssize_t output_buffer_size
     cdef object _format
     cdef object _row_count
     cdef rdata_writer_t *_writer
@@ -294,8 +796,14 @@ cdef class Writer:
     cdef int _current_column_no
     cdef rdata_column_t* _current_column
     cdef bytes _table_name 
-
-    def __init__(self):
+    cdef bint _file_begun
+    cdef bint _table_begun
+    cdef int _tables_ended
+
+    def __init__(self, Py_ssize_t output_buffer_size=_OUTPUT_BUFFER_SIZE):
+        if output_buffer_size < 0:
+            raise PyreadrError("output_buffer_size must be a non negative integer")
+        self.output_buffer_size = output_buffer_size
         self._format = None
         self._row_count = 0
         self._writer = NULL
@@ -303,6 +811,9 @@ cdef class Writer:
         self._current_column_no = -1
         self._current_column = NULL
         self._table_name = b""
+        self._file_begun = False
+        self._table_begun = False
+        self._tables_ended = 0
 
     def open(self, path, format):
         cdef rdata_file_format_t fmt;
@@ -315,6 +826,12 @@ cdef class Writer:
             raise PyreadrError('Unsupported format')
 
         self._writer = rdata_writer_init(_handle_write, fmt)
+        rdata_set_output_buffer_size(self._writer, self.output_buffer_size)
+        self._current_column_no = -1
+        self._current_column = NULL
+        self._file_begun = False
+        self._table_begun = False
+        self._tables_ended = 0
         self._fd = _os_open(path, 'w')
 
     def set_row_count(self, row_count):
@@ -323,20 +840,70 @@ cdef class Writer:
     def set_table_name(self, name):
         self._table_name = name.encode("utf-8")
 
+    def end_table(self):
+        """
+        Ends the current table, the columns are dropped and those added next, with the values inserted after them,
+        make a new table with the row count and name set next. Only rdata files can hold more than one table. close
+        ends the last table if this was not called for it.
+        """
+        cdef rdata_error_t status
+
+        if self._writer == NULL:
+            raise PyreadrError("The writer is not open")
+        status = self._end_table()
+        if status != RDATA_OK:
+            self._raise_status(status)
+
+    cdef rdata_error_t _end_table(self):
+        cdef rdata_error_t status = RDATA_OK
+        cdef rdata_error_t end_status
+
+        self._begin_table()
+        if self._current_column_no != -1:
+            status = rdata_end_column(self._writer, self._current_column)
+        end_status = rdata_end_table(self._writer, self._row_count, self._table_name)
+        if status == RDATA_OK:
+            status = end_status
+        rdata_clear_columns(self._writer)
+        self._current_column_no = -1
+        self._current_column = NULL
+        self._table_begun = False
+        self._tables_ended += 1
+        return status
+
     def close(self):
+        cdef rdata_error_t status = RDATA_OK
+        cdef rdata_error_t end_status
+
         if self._writer != NULL:
-            if self._current_column_no != -1:
-                rdata_end_column(self._writer, self._current_column)
-            rdata_end_table(self._writer, self._row_count, self._table_name)
-            rdata_end_file(self._writer)
+            if self._table_begun or self._tables_ended == 0:
+                status = self._end_table()
+            # writes out the rest of the output buffer
+            end_status = rdata_end_file(self._writer)
+            if status == RDATA_OK:
+                status = end_status
             _os_close(self._fd)
-
-    def insert_value(self, row_no, col_no, value, dtype):
-        cdef rdata_error_t status;
-
-        if self._current_column_no == -1:
+            rdata_writer_free(self._writer)
+            self._writer = NULL
+            if status != RDATA_OK:
+                raise LibrdataError(rdata_error_message(status))
+
+    cdef int _raise_status(self, rdata_error_t status) except -1:
+        # what was buffered so far is written out before raising, as it was without the buffer
+        rdata_writer_flush(self._writer)
+        raise LibrdataError(rdata_error_message(status))
+
+    cdef int _begin_table(self) except -1:
+        if not self._file_begun:
             rdata_begin_file(self._writer, &self._fd)
-            rdata_begin_table(self._writer, self._table_name);
+            self._file_begun = True
+        if not self._table_begun:
+            rdata_begin_table(self._writer, self._table_name)
+            self._table_begun = True
+        return 0
+
+    cdef int _begin_column(self, int col_no) except -1:
+        self._begin_table()
             
         if col_no != self._current_column_no:
             if self._current_column_no != -1:
@@ -344,6 +911,95 @@ cdef class Writer:
             self._current_column = rdata_get_column(self._writer, col_no)
             rdata_begin_column(self._writer, self._current_column, self._row_count)
             self._current_column_no = col_no
+        return 0
+
+    def insert_column(self, col_no, values, dtype, missing=None):
+        """
+        Writes all the values of a column in one call. values is converted to a float64 array for NUMERIC, TIMESTAMP
+        (seconds since the epoch) and DATE (days since the epoch), an int32 array for INTEGER and LOGICAL (with NA as
+        the minimum int32 already) and an object array of str for CHARACTER, where missing is a boolean array marking
+        the NA values (computed with pd.isna if not given).
+        Numeric values are byteswapped and written by librdata a chunk at a time.
+        """
+        cdef const double[::1] doubles
+        cdef const int32_t[::1] ints
+        cdef object[:] strings
+        cdef const uint8_t[::1] na
+        cdef Py_ssize_t i
+        cdef rdata_error_t status = RDATA_OK
+
+        self._begin_column(col_no)
+
+        if dtype == "NUMERIC" or dtype == "TIMESTAMP" or dtype == "DATE":
+            doubles = np.ascontiguousarray(values, dtype=np.float64)
+            if doubles.shape[0]:
+                status = rdata_append_real_values(self._writer, &doubles[0], doubles.shape[0])
+        elif dtype == "INTEGER" or dtype == "LOGICAL":
+            ints = np.ascontiguousarray(values, dtype=np.int32)
+            if ints.shape[0]:
+                status = rdata_append_int32_values(self._writer, &ints[0], ints.shape[0])
+        elif dtype == "CHARACTER":
+            values = np.asarray(values, dtype=object)
+            strings = values if values.flags.writeable else values.copy()
+            if missing is None:
+                missing = pd.isna(values)
+            na = np.ascontiguousarray(missing, dtype=np.uint8)
+            for i in range(strings.shape[0]):
+                if na[i]:
+                    status = rdata_append_string_value(self._writer, NULL)
+                else:
+                    status = rdata_append_string_value(self._writer, PyUnicode_AsUTF8(strings[i]))
+                if status != RDATA_OK:
+                    break
+        else:
+            raise PyreadrError("Unknown data type")
+
+        if status != RDATA_OK:
+            self._raise_status(status)
+
+    def insert_strings(self, col_no, data, missing):
+        """
+        Writes the values of a CHARACTER column in one call from data, a uint8 buffer with the utf-8 encoded strings
+        one after the other, each terminated by a NUL byte (an empty string for missing values), and missing, a
+        boolean array marking the NA values. The strings go to librdata in place, without python objects, so that
+        data can be a memory mapped file.
+        """
+        cdef const uint8_t[::1] buf = np.ascontiguousarray(data, dtype=np.uint8)
+        cdef const uint8_t[::1] na = np.ascontiguousarray(missing, dtype=np.uint8)
+        cdef const char *ptr = NULL
+        cdef const char *end = NULL
+        cdef Py_ssize_t i
+        cdef rdata_error_t status = RDATA_OK
+
+        if na.shape[0] and (buf.shape[0] == 0 or buf[buf.shape[0] - 1] != 0):
+            raise PyreadrError("The strings must be NUL terminated")
+        self._begin_column(col_no)
+        if buf.shape[0]:
+            ptr = <const char *>&buf[0]
+            end = ptr + buf.shape[0]
+
+        for i in range(na.shape[0]):
+            if ptr >= end:
+                raise PyreadrError("There are fewer strings than values")
+            if na[i]:
+                status = rdata_append_string_value(self._writer, NULL)
+            else:
+                status = rdata_append_string_value(self._writer, ptr)
+            if status != RDATA_OK:
+                break
+            ptr += strlen(ptr) + 1
+
+        if status != RDATA_OK:
+            self._raise_status(status)
+
+    def insert_value(self, row_no, col_no, value, dtype):
+        """
+        Writes one value, values must come column by column and in row order. Kept for compatibility, insert_column
+        writes a whole column much faster.
+        """
+        cdef rdata_error_t status;
+
+        self._begin_column(col_no)
 
         status = RDATA_OK
         
@@ -364,7 +1020,7 @@ cdef class Writer:
             raise PyreadrError("Unknown data type")
         
         if status != RDATA_OK:
-            raise LibrdataError(rdata_error_message(status))
+            self._raise_status(status)
             
 
     def add_column(self, name, dtype):
@@ -379,6 +1035,10 @@ cdef class Writer:
             data_type = RDATA_TYPE_INT32
         elif dtype == "LOGICAL":
             data_type = RDATA_TYPE_LOGICAL
+        elif dtype == "TIMESTAMP":
+            data_type = RDATA_TYPE_TIMESTAMP
+        elif dtype == "DATE":
+            data_type = RDATA_TYPE_DATE
         else:
             raise PyreadrError("Unknown data type: %s" % dtype)
 
@@ -40,12 +40,51 @@ typedef enum rdata_file_format_e {
 
 const char *rdata_error_message(rdata_error_t error_code);
 
+#define RDATA_HANDLER_SKIP  -1
+
 typedef int (*rdata_column_handler)(const char *name, rdata_type_t type,
         void *data, long count, void *ctx);
+/* The table handler may return RDATA_HANDLER_SKIP to have the object skipped
+ * without any further callbacks; any other non zero value aborts parsing. */
 typedef int (*rdata_table_handler)(const char *name, void *ctx);
 typedef int (*rdata_text_value_handler)(const char *value, int index, void *ctx);
 typedef int (*rdata_column_name_handler)(const char *value, int index, void *ctx);
 typedef void (*rdata_error_handler)(const char *error_message, void *ctx);
+
+/* A whole character vector: the non missing values are stored one after the
+ * other in data (utf-8, not null terminated) and value i spans
+ * data[offsets[i]] to data[offsets[i+1]]. Bit i of validity (least significant
+ * bit first) is 0 if value i is NA. */
+typedef struct rdata_string_vector_s {
+    long                count;
+    long                null_count;
+    const char         *data;
+    const int64_t      *offsets;
+    const uint8_t      *validity;
+} rdata_string_vector_t;
+
+typedef int (*rdata_string_vector_handler)(const rdata_string_vector_t *vector, void *ctx);
+
+/* A point of a gzip compressed stream where decompression can resume: the
+ * uncompressed offset of a deflate block boundary, the offset of the first
+ * compressed byte after it, the number of bits of the block that are in the
+ * previous byte and the (up to 32KB) uncompressed data that precedes it. */
+typedef struct rdata_checkpoint_s {
+    int64_t             uncompressed_offset;
+    int64_t             compressed_offset;
+    int                 bits;
+    const void         *window;
+    size_t              window_len;
+} rdata_checkpoint_t;
+
+/* atoms is the symbol table at the start of the object, which is needed to
+ * parse the object on its own later. */
+typedef int (*rdata_object_offset_handler)(const char *name, int64_t offset,
+        char * const *atoms, int atom_count, void *ctx);
+typedef int (*rdata_checkpoint_handler)(const rdata_checkpoint_t *checkpoint, void *ctx);
+/* data_size is the total length in bytes of the non missing strings */
+typedef int (*rdata_string_scan_handler)(long count, long null_count, int64_t data_size, void *ctx);
+typedef int (*rdata_column_filter_handler)(int index, void *ctx);
 typedef int (*rdata_progress_handler)(double progress, void *ctx);
 
 #if defined _WIN32 || defined __CYGWIN__
@@ -66,6 +105,9 @@ typedef int (*rdata_open_handler)(const char *path, void *io_ctx);
 typedef int (*rdata_close_handler)(void *io_ctx);
 typedef rdata_off_t (*rdata_seek_handler)(rdata_off_t offset, rdata_io_flags_t whence, void *io_ctx);
 typedef ssize_t (*rdata_read_handler)(void *buf, size_t nbyte, void *io_ctx);
+/* Optional: returns a pointer to the next nbyte bytes of input and advances
+ * past them, or NULL if they cannot be accessed directly. */
+typedef const void *(*rdata_peek_handler)(size_t nbyte, void *io_ctx);
 typedef rdata_error_t (*rdata_update_handler)(long file_size, rdata_progress_handler progress_handler, void *user_ctx, void *io_ctx);
 
 typedef struct rdata_io_s {
@@ -73,6 +115,7 @@ typedef struct rdata_io_s {
     rdata_close_handler         close;
     rdata_seek_handler          seek;
     rdata_read_handler          read;
+    rdata_peek_handler          peek;
     rdata_update_handler        update;
     void                          *io_ctx;
     int                            external_io;
@@ -85,10 +128,34 @@ typedef struct rdata_parser_s {
     rdata_column_name_handler   row_name_handler;
     rdata_text_value_handler    text_value_handler;
     rdata_text_value_handler    value_label_handler;
+    rdata_text_value_handler    column_class_handler;
     rdata_column_handler        dim_handler;
     rdata_text_value_handler    dim_name_handler;
+    rdata_string_vector_handler string_vector_handler;
+    rdata_column_filter_handler column_filter_handler;
     rdata_error_handler         error_handler;
     rdata_io_t                 *io;
+    int                         column_data_handoff;
+
+    rdata_object_offset_handler object_offset_handler;
+    rdata_checkpoint_handler    checkpoint_handler;
+    int64_t                     checkpoint_span;
+
+    int                         scan_mode;
+    rdata_string_scan_handler   string_scan_handler;
+
+    int                         decompress_threads;
+
+    int                         has_row_window;
+    int64_t                     row_skip;
+    int64_t                     row_limit;
+
+    int                         has_start_object;
+    int64_t                     start_offset;
+    char * const               *start_atoms;
+    int                         start_atom_count;
+    int                         has_start_checkpoint;
+    rdata_checkpoint_t          start_checkpoint;
 } rdata_parser_t;
 
 rdata_parser_t *rdata_parser_init(void);
@@ -100,15 +167,62 @@ rdata_error_t rdata_set_column_name_handler(rdata_parser_t *parser, rdata_column
 rdata_error_t rdata_set_row_name_handler(rdata_parser_t *parser, rdata_column_name_handler row_name_handler);
 rdata_error_t rdata_set_text_value_handler(rdata_parser_t *parser, rdata_text_value_handler text_value_handler);
 rdata_error_t rdata_set_value_label_handler(rdata_parser_t *parser, rdata_text_value_handler value_label_handler);
+/* Called with each element of the class attribute of a vector, before the
+ * vector itself is passed to the column handler. */
+rdata_error_t rdata_set_column_class_handler(rdata_parser_t *parser, rdata_text_value_handler column_class_handler);
 rdata_error_t rdata_set_dim_handler(rdata_parser_t *parser, rdata_column_handler dim_handler);
 rdata_error_t rdata_set_dim_name_handler(rdata_parser_t *parser, rdata_text_value_handler dim_name_handler);
+/* If set, character vectors with data (not names, levels etc.) are passed
+ * to this handler in one call instead of calling the text value handler
+ * once per element. */
+rdata_error_t rdata_set_string_vector_handler(rdata_parser_t *parser, rdata_string_vector_handler string_vector_handler);
+/* If set, called with the position of each column of a data frame before it
+ * is read. Returning RDATA_HANDLER_SKIP skips the column without any further
+ * callbacks (the names attribute still lists all the columns); any other non
+ * zero value aborts parsing. */
+rdata_error_t rdata_set_column_filter_handler(rdata_parser_t *parser, rdata_column_filter_handler column_filter_handler);
 rdata_error_t rdata_set_error_handler(rdata_parser_t *parser, rdata_error_handler error_handler);
 rdata_error_t rdata_set_open_handler(rdata_parser_t *parser, rdata_open_handler open_handler);
 rdata_error_t rdata_set_close_handler(rdata_parser_t *parser, rdata_close_handler close_handler);
 rdata_error_t rdata_set_seek_handler(rdata_parser_t *parser, rdata_seek_handler seek_handler);
 rdata_error_t rdata_set_read_handler(rdata_parser_t *parser, rdata_read_handler read_handler);
+rdata_error_t rdata_set_peek_handler(rdata_parser_t *parser, rdata_peek_handler peek_handler);
 rdata_error_t rdata_set_update_handler(rdata_parser_t *parser, rdata_update_handler update_handler);
 rdata_error_t rdata_set_io_ctx(rdata_parser_t *parser, void *io_ctx);
+/* If set, the column handler takes ownership of the data buffer it receives
+ * and is responsible for calling free() on it, whatever it returns. */
+rdata_error_t rdata_set_column_data_handoff(rdata_parser_t *parser, int handoff);
+/* Scan mode: the data of vectors is skipped instead of read. The column
+ * handler is called with data NULL and the length of the vector, and for
+ * character vectors the string scan handler is called after it with the
+ * number of missing values and the size of the strings. Attributes (names,
+ * levels, class, dim ...) are read as usual. */
+rdata_error_t rdata_set_scan_mode(rdata_parser_t *parser, int scan_mode, rdata_string_scan_handler string_scan_handler);
+/* If 2 or more, compressed files are decompressed by a background thread
+ * into a ring of blocks while the parsing goes on in the calling thread, and
+ * the blocks of bzip2 files are decompressed by this number of threads. The
+ * io handlers are then called from the background thread. Ignored in index
+ * mode. */
+rdata_error_t rdata_set_decompress_threads(rdata_parser_t *parser, int decompress_threads);
+/* Row window: of each column of a data frame (and of character row names)
+ * the first skip rows are skipped and at most limit rows are read, limit -1
+ * meaning all of them. The column handler, the text value handler etc. see
+ * the rows in the window only. Other objects are read in full. */
+rdata_error_t rdata_set_row_window(rdata_parser_t *parser, int64_t skip, int64_t limit);
+/* Index mode, for RData files: the objects are skipped instead of parsed and
+ * the object offset handler is called with the uncompressed offset of each
+ * of them. For gzip compressed files the checkpoint handler is called at the
+ * first deflate block boundary after every checkpoint_span uncompressed
+ * bytes. */
+rdata_error_t rdata_set_index_handlers(rdata_parser_t *parser, rdata_object_offset_handler object_offset_handler,
+        rdata_checkpoint_handler checkpoint_handler, int64_t checkpoint_span);
+/* Parse only the object of a RData file at the given uncompressed offset,
+ * with the symbol table as reported by the object offset handler. If
+ * checkpoint is not NULL, a gzip compressed stream is resumed there instead
+ * of decompressing from the beginning. atoms and the checkpoint window must
+ * stay valid until rdata_parse returns. */
+rdata_error_t rdata_set_start_object(rdata_parser_t *parser, int64_t offset, char * const *atoms, int atom_count,
+        const rdata_checkpoint_t *checkpoint);
 /* rdata_parse works on RData and RDS. The table handler will be called once
  * per data frame in RData files, and zero times on RDS files. */
 rdata_error_t rdata_parse(rdata_parser_t *parser, const char *filename, void *user_ctx);
@@ -122,9 +236,13 @@ typedef struct rdata_column_s {
     int             index;
     char            name[256];
     char            label[1024];
+    /* tzone attribute of timestamp columns, none if empty */
+    char            timezone[256];
 
     int32_t         factor_count;
     char          **factor;
+    /* factor with class c("ordered", "factor") */
+    int             ordered;
 } rdata_column_t;
 
 typedef struct rdata_writer_s {
@@ -141,17 +259,36 @@ typedef struct rdata_writer_s {
     rdata_column_t    **columns;
     int32_t             columns_count;
     int32_t             columns_capacity;
+
+    /* output collected here and handed to data_writer when full */
+    char               *output_buffer;
+    size_t              output_buffer_size;
+    size_t              output_buffer_len;
 } rdata_writer_t;
 
+#define RDATA_DEFAULT_OUTPUT_BUFFER_SIZE (1024*1024)
+
 rdata_writer_t *rdata_writer_init(rdata_data_writer write_callback, rdata_file_format_t format);
 void rdata_writer_free(rdata_writer_t *writer);
+/* The output is collected in a buffer of this size (by default
+ * RDATA_DEFAULT_OUTPUT_BUFFER_SIZE) and the data writer called once it is
+ * full, and by rdata_end_file. 0 calls the data writer for every value. To
+ * be set before rdata_begin_file. */
+rdata_error_t rdata_set_output_buffer_size(rdata_writer_t *writer, size_t size);
+/* Hands the buffered output to the data writer, rdata_end_file does it. */
+rdata_error_t rdata_writer_flush(rdata_writer_t *writer);
 
 rdata_column_t *rdata_add_column(rdata_writer_t *writer, const char *name, rdata_type_t type);
 
 rdata_error_t rdata_column_set_label(rdata_column_t *column, const char *label);
 rdata_error_t rdata_column_add_factor(rdata_column_t *column, const char *factor);
+rdata_error_t rdata_column_set_ordered(rdata_column_t *column, int ordered);
+rdata_error_t rdata_column_set_timezone(rdata_column_t *column, const char *timezone);
 
 rdata_column_t *rdata_get_column(rdata_writer_t *writer, int32_t j);
+/* Drops all the columns, to add those of the next table after rdata_end_table
+ * (workspaces can hold many tables). */
+void rdata_clear_columns(rdata_writer_t *writer);
 
 rdata_error_t rdata_begin_file(rdata_writer_t *writer, void *ctx);
 rdata_error_t rdata_begin_table(rdata_writer_t *writer, const char *variable_name);
@@ -159,6 +296,11 @@ rdata_error_t rdata_begin_column(rdata_writer_t *writer, rdata_column_t *column,
 
 rdata_error_t rdata_append_real_value(rdata_writer_t *writer, double value);
 rdata_error_t rdata_append_int32_value(rdata_writer_t *writer, int32_t value);
+/* Append count values at once, byteswapped a chunk at a time. Real values
+ * serve timestamp and date columns as well (seconds or days since the epoch)
+ * and int32 values logical columns (NA is INT32_MIN). */
+rdata_error_t rdata_append_real_values(rdata_writer_t *writer, const double *values, int32_t count);
+rdata_error_t rdata_append_int32_values(rdata_writer_t *writer, const int32_t *values, int32_t count);
 rdata_error_t rdata_append_timestamp_value(rdata_writer_t *writer, time_t value);
 rdata_error_t rdata_append_date_value(rdata_writer_t *writer, struct tm *value);
 rdata_error_t rdata_append_logical_value(rdata_writer_t *writer, int value);
@@ -8,6 +8,14 @@
 
 #include "rdata_bits.h"
 
+#if (defined(__GNUC__) || defined(__clang__)) && (defined(__x86_64__) || defined(__i386__))
+#include <immintrin.h>
+#define RDATA_BYTESWAP_X86 1
+#elif defined(__aarch64__) || defined(__ARM_NEON)
+#include <arm_neon.h>
+#define RDATA_BYTESWAP_NEON 1
+#endif
+
 int machine_is_little_endian() {
     int test_byte_order = 1;
     return ((char *)&test_byte_order)[0];
@@ -43,3 +51,101 @@ double byteswap_double(double num) {
     memcpy(&num, &answer, 8);
     return num;
 }
+
+static void byteswap4_copy_scalar(unsigned char *out, const unsigned char *in, size_t count) {
+    size_t i;
+    for (i=0; i<count; i++) {
+        uint32_t value;
+        memcpy(&value, in + 4*i, 4);
+        value = byteswap4(value);
+        memcpy(out + 4*i, &value, 4);
+    }
+}
+
+static void byteswap8_copy_scalar(unsigned char *out, const unsigned char *in, size_t count) {
+    size_t i;
+    for (i=0; i<count; i++) {
+        uint64_t value;
+        memcpy(&value, in + 8*i, 8);
+        value = byteswap8(value);
+        memcpy(out + 8*i, &value, 8);
+    }
+}
+
+#if RDATA_BYTESWAP_X86
+/* Byte shuffles reversing each 4 and 8 byte element of a 16 byte lane. The
+ * whole buffer goes through the shuffle 16 or 32 bytes at a time and the
+ * tail through the scalar loop. */
+#define BYTESWAP4_MASK 12, 13, 14, 15, 8, 9, 10, 11, 4, 5, 6, 7, 0, 1, 2, 3
+#define BYTESWAP8_MASK 8, 9, 10, 11, 12, 13, 14, 15, 0, 1, 2, 3, 4, 5, 6, 7
+
+__attribute__((target("ssse3")))
+static size_t byteswap_copy_ssse3(unsigned char *out, const unsigned char *in, size_t len, int elem_size) {
+    __m128i mask = elem_size == 4 ?
+        _mm_set_epi8(BYTESWAP4_MASK) : _mm_set_epi8(BYTESWAP8_MASK);
+    size_t i;
+    for (i=0; i+16<=len; i+=16) {
+        __m128i value = _mm_loadu_si128((const __m128i *)(in + i));
+        _mm_storeu_si128((__m128i *)(out + i), _mm_shuffle_epi8(value, mask));
+    }
+    return i;
+}
+
+__attribute__((target("avx2")))
+static size_t byteswap_copy_avx2(unsigned char *out, const unsigned char *in, size_t len, int elem_size) {
+    __m256i mask = elem_size == 4 ?
+        _mm256_set_epi8(BYTESWAP4_MASK, BYTESWAP4_MASK) : _mm256_set_epi8(BYTESWAP8_MASK, BYTESWAP8_MASK);
+    size_t i;
+    for (i=0; i+32<=len; i+=32) {
+        __m256i value = _mm256_loadu_si256((const __m256i *)(in + i));
+        _mm256_storeu_si256((__m256i *)(out + i), _mm256_shuffle_epi8(value, mask));
+    }
+    return i;
+}
+
+static int byteswap_simd_level = -1;
+
+/* 2 with avx2, 1 with ssse3, 0 otherwise. The result is the same from every
+ * thread, so the unsynchronized caching is harmless. */
+static int byteswap_simd(void) {
+    if (byteswap_simd_level == -1) {
+        __builtin_cpu_init();
+        byteswap_simd_level = __builtin_cpu_supports("avx2") ? 2 : __builtin_cpu_supports("ssse3") ? 1 : 0;
+    }
+    return byteswap_simd_level;
+}
+#endif
+
+/* Number of bytes swapped with vector instructions, the rest is left to the
+ * scalar loop. */
+static size_t byteswap_copy_vector(unsigned char *out, const unsigned char *in, size_t len, int elem_size) {
+#if RDATA_BYTESWAP_X86
+    int level = byteswap_simd();
+    if (level == 2)
+        return byteswap_copy_avx2(out, in, len, elem_size);
+    if (level == 1)
+        return byteswap_copy_ssse3(out, in, len, elem_size);
+#elif RDATA_BYTESWAP_NEON
+    size_t i;
+    for (i=0; i+16<=len; i+=16) {
+        uint8x16_t value = vld1q_u8(in + i);
+        vst1q_u8(out + i, elem_size == 4 ? vrev32q_u8(value) : vrev64q_u8(value));
+    }
+    return i;
+#endif
+    return 0;
+}
+
+void byteswap4_copy(void *dst, const void *src, size_t count) {
+    const unsigned char *in = (const unsigned char *)src;
+    unsigned char *out = (unsigned char *)dst;
+    size_t done = byteswap_copy_vector(out, in, 4*count, 4);
+    byteswap4_copy_scalar(out + done, in + done, count - done/4);
+}
+
+void byteswap8_copy(void *dst, const void *src, size_t count) {
+    const unsigned char *in = (const unsigned char *)src;
+    unsigned char *out = (unsigned char *)dst;
+    size_t done = byteswap_copy_vector(out, in, 8*count, 8);
+    byteswap8_copy_scalar(out + done, in + done, count - done/8);
+}
@@ -11,3 +11,8 @@ uint64_t byteswap8(uint64_t num);
 
 float byteswap_float(float num);
 double byteswap_double(double num);
+
+/* Copy count elements from src to dst reversing the byte order of each one.
+ * src and dst may be the same buffer and do not need to be aligned. */
+void byteswap4_copy(void *dst, const void *src, size_t count);
+void byteswap8_copy(void *dst, const void *src, size_t count);
@@ -0,0 +1,485 @@
+//
+//  rdata_bzip2.c
+//
+
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <sys/types.h>
+
+#include "rdata.h"
+
+#if HAVE_BZIP2
+
+#include <bzlib.h>
+
+#include "rdata_thread.h"
+#include "rdata_bzip2.h"
+
+#define BZ_BLOCK_MAGIC      0x314159265359ULL
+#define BZ_EOS_MAGIC        0x177245385090ULL
+#define BZ_MAGIC_MASK       0xFFFFFFFFFFFFULL
+#define BZ_MAGIC_BITS       48
+/* end of stream magic and combined crc */
+#define BZ_EOS_BITS         80
+/* end of stream, padding and the header of the next stream */
+#define BZ_STREAM_GAP_BITS  (BZ_EOS_BITS + 7 + 32)
+#define BZ_READ_SIZE        (1024*1024)
+/* a block holds at most 900kB of data, which can grow by 1% and 600 bytes
+ * when compressed */
+#define BZ_MAX_BLOCK_SIZE   (1000*1000)
+#define BZ_OUTPUT_SIZE      (1024*1024)
+
+typedef enum bz_job_state_e {
+    BZ_JOB_PENDING,
+    BZ_JOB_RUNNING,
+    BZ_JOB_DONE,
+    BZ_JOB_FAILED
+} bz_job_state_t;
+
+typedef struct bz_job_s {
+    bz_job_state_t   state;
+    /* bits of the block in the compressed data, from its magic number on */
+    int64_t          start_bit;
+    int64_t          end_bit;
+    /* block size of the stream, '1' to '9' */
+    char             level;
+    /* the block as a bzip2 stream of its own */
+    unsigned char   *input;
+    size_t           input_len;
+    char            *output;
+    size_t           output_len;
+} bz_job_t;
+
+struct rdata_bz_parallel_s {
+    rdata_io_t      *io;
+
+    /* compressed data from the oldest block still needed on, the bit
+     * offsets are relative to the beginning of this buffer */
+    unsigned char   *data;
+    size_t           data_len;
+    size_t           data_capacity;
+    int64_t          scan_bit;
+    /* the last magic number found, a block or the end of a stream */
+    int64_t          block_start;
+    int              block_is_eos;
+    char             level;
+    int              input_eof;
+    /* the values the second byte of a magic number can take, at any shift */
+    unsigned char    magic_byte[256];
+
+    /* ring of blocks in file order, the one at head is being returned */
+    bz_job_t        *jobs;
+    int              max_jobs;
+    int              head;
+    int              count;
+    size_t           output_pos;
+
+    rdata_thread_t  *threads;
+    int              thread_count;
+    rdata_mutex_t    lock;
+    rdata_cond_t     work;
+    rdata_cond_t     done;
+    int              stop;
+};
+
+/* Decompresses a single block stream. */
+static int bz_decode(bz_job_t *job) {
+    bz_stream strm;
+    size_t capacity = BZ_OUTPUT_SIZE;
+    int result = BZ_OK;
+
+    memset(&strm, 0, sizeof(strm));
+    if (BZ2_bzDecompressInit(&strm, 0, 0) != BZ_OK)
+        return -1;
+
+    job->output_len = 0;
+    if ((job->output = malloc(capacity)) == NULL)
+        goto error;
+
+    strm.next_in = (char *)job->input;
+    strm.avail_in = job->input_len;
+    while (1) {
+        if (job->output_len == capacity) {
+            char *output = realloc(job->output, 2 * capacity);
+            if (output == NULL)
+                goto error;
+            job->output = output;
+            capacity *= 2;
+        }
+        strm.next_out = job->output + job->output_len;
+        strm.avail_out = capacity - job->output_len;
+        result = BZ2_bzDecompress(&strm);
+        job->output_len = capacity - strm.avail_out;
+        if (result == BZ_STREAM_END)
+            break;
+        if (result != BZ_OK || (strm.avail_in == 0 && strm.avail_out != 0))
+            goto error;
+    }
+
+    BZ2_bzDecompressEnd(&strm);
+    return 0;
+
+error:
+    BZ2_bzDecompressEnd(&strm);
+    free(job->output);
+    job->output = NULL;
+    job->output_len = 0;
+    return -1;
+}
+
+static void *bz_worker(void *arg) {
+    rdata_bz_parallel_t *bz = (rdata_bz_parallel_t *)arg;
+    int i;
+
+    rdata_mutex_lock(&bz->lock);
+    while (!bz->stop) {
+        bz_job_t *job = NULL;
+        /* the oldest block first */
+        for (i=0; i<bz->count; i++) {
+            bz_job_t *candidate = &bz->jobs[(bz->head + i) % bz->max_jobs];
+            if (candidate->state == BZ_JOB_PENDING) {
+                job = candidate;
+                break;
+            }
+        }
+        if (job == NULL) {
+            rdata_cond_wait(&bz->work, &bz->lock);
+            continue;
+        }
+        job->state = BZ_JOB_RUNNING;
+        rdata_mutex_unlock(&bz->lock);
+
+        int failed = bz_decode(job);
+
+        rdata_mutex_lock(&bz->lock);
+        job->state = failed ? BZ_JOB_FAILED : BZ_JOB_DONE;
+        rdata_cond_broadcast(&bz->done);
+    }
+    rdata_mutex_unlock(&bz->lock);
+    return NULL;
+}
+
+static uint64_t bz_get_bits(const unsigned char *data, int64_t bit, int count) {
+    uint64_t value = 0;
+    int i;
+    for (i=0; i<count; i++, bit++)
+        value = (value << 1) | ((data[bit / 8] >> (7 - bit % 8)) & 1);
+    return value;
+}
+
+static void bz_put_bits(unsigned char *out, size_t *bit, uint64_t value, int count) {
+    int i;
+    for (i=count-1; i>=0; i--, (*bit)++) {
+        if ((value >> i) & 1) {
+            out[*bit / 8] |= 0x80 >> (*bit % 8);
+        }
+    }
+}
+
+/* Looks for the next block or end of stream magic from scan_bit on. Returns
+ * its bit offset, or -1 if there is none in the data read so far, scan_bit
+ * is then moved to the first position that could not be tested. */
+static int64_t bz_find_magic(rdata_bz_parallel_t *bz, uint64_t *magic) {
+    int64_t total_bits = 8 * (int64_t)bz->data_len;
+    int64_t byte = bz->scan_bit / 8;
+    int shift = bz->scan_bit % 8;
+    uint64_t window = 0;
+    int i;
+
+    if (bz->scan_bit + BZ_MAGIC_BITS > total_bits)
+        return -1;
+
+    for (i=0; i<8; i++) {
+        window <<= 8;
+        if (byte + i < (int64_t)bz->data_len)
+            window |= bz->data[byte + i];
+    }
+    while (1) {
+        /* most bytes are ruled out for all the shifts at once */
+        if (shift == 0 && 8 * byte + 7 + BZ_MAGIC_BITS <= total_bits && !bz->magic_byte[bz->data[byte + 1]])
+            shift = 8;
+        for (; shift<8; shift++) {
+            int64_t bit = 8 * byte + shift;
+            if (bit + BZ_MAGIC_BITS > total_bits) {
+                bz->scan_bit = bit;
+                return -1;
+            }
+            uint64_t value = (window >> (64 - BZ_MAGIC_BITS - shift)) & BZ_MAGIC_MASK;
+            if (value == BZ_BLOCK_MAGIC || value == BZ_EOS_MAGIC) {
+                *magic = value;
+                return bit;
+            }
+        }
+        shift = 0;
+        byte++;
+        window <<= 8;
+        if (byte + 7 < (int64_t)bz->data_len)
+            window |= bz->data[byte + 7];
+    }
+}
+
+/* Reads more compressed data, dropping the bytes no longer needed. */
+static int bz_read_input(rdata_bz_parallel_t *bz) {
+    int64_t keep_bit = bz->block_start >= 0 ? bz->block_start : bz->scan_bit;
+    int i;
+
+    if (bz->count)
+        keep_bit = bz->jobs[bz->head].start_bit;
+
+    size_t drop = keep_bit / 8;
+    if (drop) {
+        memmove(bz->data, bz->data + drop, bz->data_len - drop);
+        bz->data_len -= drop;
+        bz->scan_bit -= 8 * (int64_t)drop;
+        if (bz->block_start >= 0)
+            bz->block_start -= 8 * (int64_t)drop;
+        for (i=0; i<bz->count; i++) {
+            bz_job_t *job = &bz->jobs[(bz->head + i) % bz->max_jobs];
+            job->start_bit -= 8 * (int64_t)drop;
+            job->end_bit -= 8 * (int64_t)drop;
+        }
+    }
+
+    /* no magic number where the next block had to start: corrupt or not
+     * bzip2 data, fail instead of buffering the rest of the file */
+    if (bz->block_start >= 0 && bz->data_len - bz->block_start / 8 > 2 * BZ_MAX_BLOCK_SIZE)
+        return -1;
+
+    if (bz->data_len + BZ_READ_SIZE > bz->data_capacity) {
+        size_t capacity = bz->data_len + BZ_READ_SIZE;
+        unsigned char *data = realloc(bz->data, capacity);
+        if (data == NULL)
+            return -1;
+        bz->data = data;
+        bz->data_capacity = capacity;
+    }
+
+    ssize_t bytes_read = bz->io->read(bz->data + bz->data_len, BZ_READ_SIZE, bz->io->io_ctx);
+    if (bytes_read < 0)
+        return -1;
+    if (bytes_read == 0)
+        bz->input_eof = 1;
+    bz->data_len += bytes_read;
+    return 0;
+}
+
+/* Copies the bits of the block to a stream of its own: a header, the block
+ * and the end of stream marker, with the crc of the block as the combined
+ * crc of the stream. */
+static int bz_make_input(rdata_bz_parallel_t *bz, bz_job_t *job) {
+    int64_t bits = job->end_bit - job->start_bit;
+    int64_t full_bytes = bits / 8;
+    int shift = job->start_bit % 8;
+    const unsigned char *src = bz->data + job->start_bit / 8;
+    uint32_t crc = bz_get_bits(bz->data, job->start_bit + BZ_MAGIC_BITS, 32);
+    size_t bit = 0;
+    int64_t i;
+
+    job->input_len = 4 + (bits + BZ_EOS_BITS + 7) / 8;
+    if ((job->input = calloc(1, job->input_len)) == NULL)
+        return -1;
+
+    memcpy(job->input, "BZh", 3);
+    job->input[3] = job->level;
+    for (i=0; i<full_bytes; i++) {
+        job->input[4 + i] = shift ? (src[i] << shift) | (src[i + 1] >> (8 - shift)) : src[i];
+    }
+    bit = 8 * (4 + full_bytes);
+    bz_put_bits(job->input, &bit, bz_get_bits(bz->data, job->start_bit + 8 * full_bytes, bits % 8), bits % 8);
+    bz_put_bits(job->input, &bit, BZ_EOS_MAGIC, BZ_MAGIC_BITS);
+    bz_put_bits(job->input, &bit, crc, 32);
+    return 0;
+}
+
+static void bz_free_job(bz_job_t *job) {
+    free(job->input);
+    free(job->output);
+    memset(job, 0, sizeof(bz_job_t));
+}
+
+/* Queues blocks until the ring is full or the data ends. */
+static int bz_fill_jobs(rdata_bz_parallel_t *bz) {
+    while (bz->count < bz->max_jobs) {
+        uint64_t magic = 0;
+        int64_t bit = bz_find_magic(bz, &magic);
+        if (bit == -1) {
+            /* a block cut short at the end is not returned, as with the
+             * sequential reader the output just ends there */
+            if (bz->input_eof)
+                return 0;
+            if (bz_read_input(bz) != 0)
+                return -1;
+            continue;
+        }
+
+        /* the bits after the end of a stream are a block too, unless they are
+         * just the header of the next stream: if the end of stream was a false
+         * one in the middle of a block, it is merged with the block before */
+        if (bz->block_start >= 0 &&
+                !(bz->block_is_eos && bit - bz->block_start <= BZ_STREAM_GAP_BITS)) {
+            bz_job_t job;
+            memset(&job, 0, sizeof(job));
+            job.start_bit = bz->block_start;
+            job.end_bit = bit;
+            job.level = bz->level;
+            job.state = BZ_JOB_PENDING;
+            if (bz_make_input(bz, &job) != 0)
+                return -1;
+
+            rdata_mutex_lock(&bz->lock);
+            bz->jobs[(bz->head + bz->count) % bz->max_jobs] = job;
+            bz->count++;
+            rdata_cond_signal(&bz->work);
+            rdata_mutex_unlock(&bz->lock);
+        }
+
+        /* the first block of a stream comes after the header, with the block
+         * size: the decompressor allocates as much memory as it says */
+        if (magic == BZ_BLOCK_MAGIC && bit >= 32 && bz_get_bits(bz->data, bit - 32, 24) == 0x425A68) {
+            char level = bz_get_bits(bz->data, bit - 8, 8);
+            if (level >= '1' && level <= '9')
+                bz->level = level;
+        }
+        bz->block_start = bit;
+        bz->block_is_eos = (magic == BZ_EOS_MAGIC);
+        bz->scan_bit = bit + (bz->block_is_eos ? BZ_EOS_BITS : BZ_MAGIC_BITS);
+    }
+    return 0;
+}
+
+/* The block at head did not decompress: its magic number was a false one
+ * in the middle of the previous block, or the data is corrupt. It is
+ * merged with the next block and decompressed again here. */
+static int bz_merge_head(rdata_bz_parallel_t *bz) {
+    if (bz->count < 2)
+        return -1;
+
+    bz_job_t *job = &bz->jobs[bz->head];
+    bz_job_t *next = &bz->jobs[(bz->head + 1) % bz->max_jobs];
+
+    rdata_mutex_lock(&bz->lock);
+    while (next->state == BZ_JOB_RUNNING)
+        rdata_cond_wait(&bz->done, &bz->lock);
+    /* the merged block takes the place of the next one */
+    next->state = BZ_JOB_RUNNING;
+    rdata_mutex_unlock(&bz->lock);
+
+    next->start_bit = job->start_bit;
+    free(next->input);
+    free(next->output);
+    next->output = NULL;
+    next->output_len = 0;
+    if (bz_make_input(bz, next) != 0)
+        return -1;
+    int failed = bz_decode(next);
+
+    rdata_mutex_lock(&bz->lock);
+    next->state = failed ? BZ_JOB_FAILED : BZ_JOB_DONE;
+    bz_free_job(job);
+    bz->head = (bz->head + 1) % bz->max_jobs;
+    bz->count--;
+    rdata_mutex_unlock(&bz->lock);
+    return 0;
+}
+
+ssize_t rdata_bz_parallel_read(rdata_bz_parallel_t *bz, void *buffer, size_t len) {
+    size_t bytes_copied = 0;
+
+    while (bytes_copied < len) {
+        if (bz_fill_jobs(bz) != 0)
+            return -1;
+        if (bz->count == 0)
+            break;
+
+        bz_job_t *job = &bz->jobs[bz->head];
+        rdata_mutex_lock(&bz->lock);
+        while (job->state == BZ_JOB_PENDING || job->state == BZ_JOB_RUNNING)
+            rdata_cond_wait(&bz->done, &bz->lock);
+        bz_job_state_t state = job->state;
+        rdata_mutex_unlock(&bz->lock);
+
+        if (state == BZ_JOB_FAILED) {
+            /* make sure the next block is queued */
+            if (bz->count < 2 && bz_fill_jobs(bz) != 0)
+                return -1;
+            if (bz_merge_head(bz) != 0)
+                return -1;
+            continue;
+        }
+
+        size_t available = job->output_len - bz->output_pos;
+        size_t chunk = len - bytes_copied < available ? len - bytes_copied : available;
+        memcpy((char *)buffer + bytes_copied, job->output + bz->output_pos, chunk);
+        bytes_copied += chunk;
+        bz->output_pos += chunk;
+
+        if (bz->output_pos == job->output_len) {
+            rdata_mutex_lock(&bz->lock);
+            bz_free_job(job);
+            bz->head = (bz->head + 1) % bz->max_jobs;
+            bz->count--;
+            rdata_mutex_unlock(&bz->lock);
+            bz->output_pos = 0;
+        }
+    }
+
+    return bytes_copied;
+}
+
+rdata_bz_parallel_t *rdata_bz_parallel_init(rdata_io_t *io, int threads) {
+    int i;
+    rdata_bz_parallel_t *bz = calloc(1, sizeof(rdata_bz_parallel_t));
+    if (bz == NULL)
+        return NULL;
+
+    bz->io = io;
+    bz->block_start = -1;
+    bz->level = '9';
+    for (i=0; i<8; i++) {
+        bz->magic_byte[((BZ_BLOCK_MAGIC << (64 - BZ_MAGIC_BITS - i)) >> 48) & 0xFF] = 1;
+        bz->magic_byte[((BZ_EOS_MAGIC << (64 - BZ_MAGIC_BITS - i)) >> 48) & 0xFF] = 1;
+    }
+    /* enough blocks queued to keep all the threads busy */
+    bz->max_jobs = 2 * threads;
+    rdata_mutex_init(&bz->lock);
+    rdata_cond_init(&bz->work);
+    rdata_cond_init(&bz->done);
+    if ((bz->jobs = calloc(bz->max_jobs, sizeof(bz_job_t))) == NULL ||
+            (bz->threads = calloc(threads, sizeof(rdata_thread_t))) == NULL) {
+        rdata_bz_parallel_free(bz);
+        return NULL;
+    }
+    for (bz->thread_count=0; bz->thread_count<threads; bz->thread_count++) {
+        if (rdata_thread_create(&bz->threads[bz->thread_count], &bz_worker, bz) != 0) {
+            rdata_bz_parallel_free(bz);
+            return NULL;
+        }
+    }
+    return bz;
+}
+
+void rdata_bz_parallel_free(rdata_bz_parallel_t *bz) {
+    int i;
+
+    rdata_mutex_lock(&bz->lock);
+    bz->stop = 1;
+    rdata_cond_broadcast(&bz->work);
+    rdata_mutex_unlock(&bz->lock);
+    for (i=0; i<bz->thread_count; i++)
+        rdata_thread_join(bz->threads[i]);
+
+    if (bz->jobs) {
+        for (i=0; i<bz->max_jobs; i++)
+            bz_free_job(&bz->jobs[i]);
+    }
+    rdata_cond_destroy(&bz->work);
+    rdata_cond_destroy(&bz->done);
+    rdata_mutex_destroy(&bz->lock);
+    free(bz->jobs);
+    free(bz->threads);
+    free(bz->data);
+    free(bz);
+}
+
+#endif /* HAVE_BZIP2 */
@@ -0,0 +1,12 @@
+
+/* Block parallel bzip2 decompression. The blocks of a bzip2 stream start at
+ * a 48 bit magic number (not byte aligned) and can be decompressed
+ * independently, each is turned into a stream of its own and decompressed
+ * by a pool of threads, the output is returned in order. */
+typedef struct rdata_bz_parallel_s rdata_bz_parallel_t;
+
+/* Reads the compressed data from io, from its current position on. */
+rdata_bz_parallel_t *rdata_bz_parallel_init(rdata_io_t *io, int threads);
+/* Like read(): returns len bytes except at the end of the data, or -1. */
+ssize_t rdata_bz_parallel_read(rdata_bz_parallel_t *bz, void *buffer, size_t len);
+void rdata_bz_parallel_free(rdata_bz_parallel_t *bz);
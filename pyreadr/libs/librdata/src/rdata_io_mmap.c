@@ -0,0 +1,225 @@
+#include <fcntl.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/stat.h>
+
+#if defined _WIN32 || defined __CYGWIN__
+#include <windows.h>
+#else
+#include <sys/mman.h>
+#include <unistd.h>
+#endif
+
+#include "rdata.h"
+#include "rdata_io_mmap.h"
+
+/* Memory mapped io: the whole file is mapped read only and reads are served
+ * from the mapping with memcpy, so that the many small reads of headers and
+ * lengths do not need a system call each. The same handlers serve input that
+ * is already in memory. */
+
+#if defined _WIN32 || defined __CYGWIN__
+
+static int rdata_mmap_map_file(const char *path, rdata_mmap_io_ctx_t *ctx) {
+    int retval = -1;
+    HANDLE file = INVALID_HANDLE_VALUE;
+    HANDLE mapping = NULL;
+    LARGE_INTEGER size;
+    wchar_t *wpath = NULL;
+
+    /* paths come as utf-8 */
+    int wlen = MultiByteToWideChar(CP_UTF8, 0, path, -1, NULL, 0);
+    if (wlen == 0)
+        goto cleanup;
+    if ((wpath = malloc(wlen * sizeof(wchar_t))) == NULL)
+        goto cleanup;
+    MultiByteToWideChar(CP_UTF8, 0, path, -1, wpath, wlen);
+
+    file = CreateFileW(wpath, GENERIC_READ, FILE_SHARE_READ, NULL, OPEN_EXISTING,
+            FILE_ATTRIBUTE_NORMAL | FILE_FLAG_SEQUENTIAL_SCAN, NULL);
+    if (file == INVALID_HANDLE_VALUE)
+        goto cleanup;
+    if (!GetFileSizeEx(file, &size))
+        goto cleanup;
+
+    ctx->size = (size_t)size.QuadPart;
+    if (ctx->size) {
+        if ((mapping = CreateFileMappingW(file, NULL, PAGE_READONLY, 0, 0, NULL)) == NULL)
+            goto cleanup;
+        if ((ctx->data = MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0)) == NULL)
+            goto cleanup;
+    }
+    retval = 0;
+
+cleanup:
+    /* the view keeps the file mapped after the handles are closed */
+    if (mapping)
+        CloseHandle(mapping);
+    if (file != INVALID_HANDLE_VALUE)
+        CloseHandle(file);
+    if (wpath)
+        free(wpath);
+
+    return retval;
+}
+
+static void rdata_mmap_unmap_file(rdata_mmap_io_ctx_t *ctx) {
+    UnmapViewOfFile(ctx->data);
+}
+
+#else
+
+static int rdata_mmap_map_file(const char *path, rdata_mmap_io_ctx_t *ctx) {
+    struct stat st;
+    void *data = NULL;
+    int fd = open(path, O_RDONLY);
+    if (fd == -1)
+        return -1;
+
+    if (fstat(fd, &st) == -1) {
+        close(fd);
+        return -1;
+    }
+
+    ctx->size = st.st_size;
+    if (ctx->size) {
+        data = mmap(NULL, ctx->size, PROT_READ, MAP_PRIVATE, fd, 0);
+        if (data == MAP_FAILED) {
+            close(fd);
+            return -1;
+        }
+#ifdef MADV_SEQUENTIAL
+        madvise(data, ctx->size, MADV_SEQUENTIAL);
+#endif
+        ctx->data = data;
+    }
+    /* the mapping stays valid after the file is closed */
+    close(fd);
+
+    return 0;
+}
+
+static void rdata_mmap_unmap_file(rdata_mmap_io_ctx_t *ctx) {
+    munmap((void *)ctx->data, ctx->size);
+}
+
+#endif
+
+int rdata_mmap_open_handler(const char *path, void *io_ctx) {
+    rdata_mmap_io_ctx_t *ctx = (rdata_mmap_io_ctx_t *)io_ctx;
+
+    if (ctx->in_memory) {
+        ctx->pos = 0;
+        return 0;
+    }
+
+    ctx->data = NULL;
+    ctx->size = 0;
+    ctx->pos = 0;
+    if (rdata_mmap_map_file(path, ctx) == -1)
+        return -1;
+
+    ctx->owns_mapping = 1;
+    return 0;
+}
+
+int rdata_mmap_close_handler(void *io_ctx) {
+    rdata_mmap_io_ctx_t *ctx = (rdata_mmap_io_ctx_t *)io_ctx;
+    if (ctx->in_memory) {
+        ctx->pos = 0;
+        return 0;
+    }
+    if (ctx->owns_mapping && ctx->data)
+        rdata_mmap_unmap_file(ctx);
+
+    ctx->data = NULL;
+    ctx->size = 0;
+    ctx->pos = 0;
+    ctx->owns_mapping = 0;
+    return 0;
+}
+
+rdata_off_t rdata_mmap_seek_handler(rdata_off_t offset,
+        rdata_io_flags_t whence, void *io_ctx) {
+    rdata_mmap_io_ctx_t *ctx = (rdata_mmap_io_ctx_t *)io_ctx;
+    rdata_off_t newpos = 0;
+    switch(whence) {
+        case RDATA_SEEK_SET:
+            newpos = offset;
+            break;
+        case RDATA_SEEK_CUR:
+            newpos = ctx->pos + offset;
+            break;
+        case RDATA_SEEK_END:
+            newpos = ctx->size + offset;
+            break;
+        default:
+            return -1;
+    }
+    if (newpos < 0 || (size_t)newpos > ctx->size)
+        return -1;
+
+    ctx->pos = newpos;
+    return newpos;
+}
+
+ssize_t rdata_mmap_read_handler(void *buf, size_t nbyte, void *io_ctx) {
+    rdata_mmap_io_ctx_t *ctx = (rdata_mmap_io_ctx_t *)io_ctx;
+    size_t available = ctx->size - ctx->pos;
+    if (nbyte > available)
+        nbyte = available;
+
+    if (nbyte) {
+        memcpy(buf, ctx->data + ctx->pos, nbyte);
+        ctx->pos += nbyte;
+    }
+    return nbyte;
+}
+
+const void *rdata_mmap_peek_handler(size_t nbyte, void *io_ctx) {
+    rdata_mmap_io_ctx_t *ctx = (rdata_mmap_io_ctx_t *)io_ctx;
+    const char *ptr = NULL;
+    if (nbyte > ctx->size - ctx->pos)
+        return NULL;
+
+    ptr = ctx->data + ctx->pos;
+    ctx->pos += nbyte;
+    return ptr;
+}
+
+rdata_error_t rdata_mmap_update_handler(long file_size,
+        rdata_progress_handler progress_handler, void *user_ctx,
+        void *io_ctx) {
+    if (!progress_handler)
+        return RDATA_OK;
+
+    rdata_mmap_io_ctx_t *ctx = (rdata_mmap_io_ctx_t *)io_ctx;
+
+    if (progress_handler(1.0 * ctx->pos / file_size, user_ctx))
+        return RDATA_ERROR_USER_ABORT;
+
+    return RDATA_OK;
+}
+
+void rdata_mmap_io_init(rdata_parser_t *parser) {
+    rdata_set_open_handler(parser, rdata_mmap_open_handler);
+    rdata_set_close_handler(parser, rdata_mmap_close_handler);
+    rdata_set_seek_handler(parser, rdata_mmap_seek_handler);
+    rdata_set_read_handler(parser, rdata_mmap_read_handler);
+    rdata_set_peek_handler(parser, rdata_mmap_peek_handler);
+    rdata_set_update_handler(parser, rdata_mmap_update_handler);
+
+    rdata_mmap_io_ctx_t *io_ctx = calloc(1, sizeof(rdata_mmap_io_ctx_t));
+    rdata_set_io_ctx(parser, (void*) io_ctx);
+    /* owned by the parser, freed in rdata_parser_free */
+    parser->io->external_io = 0;
+}
+
+void rdata_memory_io_init(rdata_parser_t *parser, const void *data, size_t size) {
+    rdata_mmap_io_init(parser);
+
+    rdata_mmap_io_ctx_t *io_ctx = (rdata_mmap_io_ctx_t *)parser->io->io_ctx;
+    io_ctx->data = data;
+    io_ctx->size = size;
+    io_ctx->in_memory = 1;
+}
@@ -0,0 +1,19 @@
+
+typedef struct rdata_mmap_io_ctx_s {
+    const char       *data;
+    size_t            size;
+    size_t            pos;
+    int               owns_mapping;
+    int               in_memory;
+} rdata_mmap_io_ctx_t;
+
+int rdata_mmap_open_handler(const char *path, void *io_ctx);
+int rdata_mmap_close_handler(void *io_ctx);
+rdata_off_t rdata_mmap_seek_handler(rdata_off_t offset, rdata_io_flags_t whence, void *io_ctx);
+ssize_t rdata_mmap_read_handler(void *buf, size_t nbytes, void *io_ctx);
+const void *rdata_mmap_peek_handler(size_t nbytes, void *io_ctx);
+rdata_error_t rdata_mmap_update_handler(long file_size, rdata_progress_handler progress_handler, void *user_ctx, void *io_ctx);
+void rdata_mmap_io_init(rdata_parser_t *parser);
+/* The input is a buffer in memory, which must stay valid until rdata_parse
+ * returns. The path given to rdata_parse is ignored. */
+void rdata_memory_io_init(rdata_parser_t *parser, const void *data, size_t size);
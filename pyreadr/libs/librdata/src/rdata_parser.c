@@ -2,6 +2,7 @@
 #include <stdlib.h>
 #include "rdata.h"
 #include "rdata_io_unistd.h"
+#include "rdata_io_mmap.h"
 
 rdata_parser_t *rdata_parser_init() {
     rdata_parser_t *parser = calloc(1, sizeof(rdata_parser_t));
@@ -12,8 +13,11 @@ rdata_parser_t *rdata_parser_init() {
 
 void rdata_parser_free(rdata_parser_t *parser) {
     if (parser) {
-        if (parser->io)
+        if (parser->io) {
+            if (!parser->io->external_io)
+                free(parser->io->io_ctx);
             free(parser->io);
+        }
         free(parser);
     }
 }
@@ -48,6 +52,11 @@ rdata_error_t rdata_set_value_label_handler(rdata_parser_t *parser, rdata_text_v
     return RDATA_OK;
 }
 
+rdata_error_t rdata_set_column_class_handler(rdata_parser_t *parser, rdata_text_value_handler column_class_handler) {
+    parser->column_class_handler = column_class_handler;
+    return RDATA_OK;
+}
+
 rdata_error_t rdata_set_dim_handler(rdata_parser_t *parser, rdata_column_handler dim_handler) {
     parser->dim_handler = dim_handler;
     return RDATA_OK;
@@ -58,6 +67,16 @@ rdata_error_t rdata_set_dim_name_handler(rdata_parser_t *parser, rdata_text_valu
     return RDATA_OK;
 }
 
+rdata_error_t rdata_set_string_vector_handler(rdata_parser_t *parser, rdata_string_vector_handler string_vector_handler) {
+    parser->string_vector_handler = string_vector_handler;
+    return RDATA_OK;
+}
+
+rdata_error_t rdata_set_column_filter_handler(rdata_parser_t *parser, rdata_column_filter_handler column_filter_handler) {
+    parser->column_filter_handler = column_filter_handler;
+    return RDATA_OK;
+}
+
 rdata_error_t rdata_set_error_handler(rdata_parser_t *parser, rdata_error_handler error_handler) {
     parser->error_handler = error_handler;
     return RDATA_OK;
@@ -83,6 +102,11 @@ rdata_error_t rdata_set_read_handler(rdata_parser_t *parser, rdata_read_handler
     return RDATA_OK;
 }
 
+rdata_error_t rdata_set_peek_handler(rdata_parser_t *parser, rdata_peek_handler peek_handler) {
+    parser->io->peek = peek_handler;
+    return RDATA_OK;
+}
+
 rdata_error_t rdata_set_update_handler(rdata_parser_t *parser, rdata_update_handler update_handler) {
     parser->io->update = update_handler;
     return RDATA_OK;
@@ -97,3 +121,48 @@ rdata_error_t rdata_set_io_ctx(rdata_parser_t *parser, void *io_ctx) {
 
     return RDATA_OK;
 }
+
+rdata_error_t rdata_set_column_data_handoff(rdata_parser_t *parser, int handoff) {
+    parser->column_data_handoff = handoff;
+    return RDATA_OK;
+}
+
+rdata_error_t rdata_set_scan_mode(rdata_parser_t *parser, int scan_mode, rdata_string_scan_handler string_scan_handler) {
+    parser->scan_mode = scan_mode;
+    parser->string_scan_handler = string_scan_handler;
+    return RDATA_OK;
+}
+
+rdata_error_t rdata_set_decompress_threads(rdata_parser_t *parser, int decompress_threads) {
+    parser->decompress_threads = decompress_threads;
+    return RDATA_OK;
+}
+
+rdata_error_t rdata_set_row_window(rdata_parser_t *parser, int64_t skip, int64_t limit) {
+    parser->has_row_window = 1;
+    parser->row_skip = skip;
+    parser->row_limit = limit;
+    return RDATA_OK;
+}
+
+rdata_error_t rdata_set_index_handlers(rdata_parser_t *parser, rdata_object_offset_handler object_offset_handler,
+        rdata_checkpoint_handler checkpoint_handler, int64_t checkpoint_span) {
+    parser->object_offset_handler = object_offset_handler;
+    parser->checkpoint_handler = checkpoint_handler;
+    parser->checkpoint_span = checkpoint_span;
+    return RDATA_OK;
+}
+
+rdata_error_t rdata_set_start_object(rdata_parser_t *parser, int64_t offset, char * const *atoms, int atom_count,
+        const rdata_checkpoint_t *checkpoint) {
+    parser->has_start_object = 1;
+    parser->start_offset = offset;
+    parser->start_atoms = atoms;
+    parser->start_atom_count = atom_count;
+    parser->has_start_checkpoint = 0;
+    if (checkpoint) {
+        parser->has_start_checkpoint = 1;
+        parser->start_checkpoint = *checkpoint;
+    }
+    return RDATA_OK;
+}
@@ -31,11 +31,18 @@
 
 #include "rdata.h"
 #include "rdata_internal.h"
+#include "rdata_thread.h"
+#include "rdata_bzip2.h"
 
 #define RDATA_CLASS_POSIXCT 0x01
 #define RDATA_CLASS_DATE    0x02
 
 #define STREAM_BUFFER_SIZE   65536
+#define Z_WINDOW_SIZE        32768
+#define SKIP_BUFFER_SIZE     65536
+#define READ_BUFFER_SIZE     65536
+#define PIPELINE_BLOCK_SIZE  (1024*1024)
+#define PIPELINE_BLOCKS          4
 #define MAX_ARRAY_DIMENSIONS     3
 
 /* ICONV_CONST defined by autotools during configure according
@@ -50,6 +57,34 @@ typedef struct rdata_atom_table_s {
     char **data;
 } rdata_atom_table_t;
 
+typedef struct rdata_string_arena_s {
+    char                        *data;
+    size_t                       data_capacity;
+    int64_t                     *offsets;
+    size_t                       offsets_capacity;
+    uint8_t                     *validity;
+    size_t                       validity_capacity;
+} rdata_string_arena_t;
+
+/* Ring of blocks that a background thread fills with decompressed data while
+ * the parser consumes them. The block at tail belongs to the parser while
+ * count > 0, the block at head to the thread while count < PIPELINE_BLOCKS. */
+typedef struct rdata_pipeline_s {
+    rdata_thread_t               thread;
+    rdata_mutex_t                lock;
+    rdata_cond_t                 filled;
+    rdata_cond_t                 emptied;
+    char                        *blocks[PIPELINE_BLOCKS];
+    size_t                       lengths[PIPELINE_BLOCKS];
+    int                          head;
+    int                          tail;
+    int                          count;
+    size_t                       pos;
+    int                          eof;
+    int                          error;
+    int                          stop;
+} rdata_pipeline_t;
+
 typedef struct rdata_ctx_s {
     int                          machine_needs_byteswap;
     rdata_table_handler          table_handler;
@@ -58,12 +93,17 @@ typedef struct rdata_ctx_s {
     rdata_column_name_handler    row_name_handler;
     rdata_text_value_handler     text_value_handler;
     rdata_text_value_handler     value_label_handler;
+    rdata_text_value_handler     column_class_handler;
     rdata_column_handler         dim_handler;
     rdata_text_value_handler     dim_name_handler;
+    rdata_string_vector_handler  string_vector_handler;
+    rdata_column_filter_handler  column_filter_handler;
     rdata_error_handler       error_handler;
     void                        *user_ctx;
+    int                          column_data_handoff;
 #if HAVE_BZIP2
     bz_stream                   *bz_strm;
+    rdata_bz_parallel_t         *bz_parallel;
 #endif
 #if HAVE_APPLE_COMPRESSION
     compression_stream          *compression_strm;
@@ -75,6 +115,15 @@ typedef struct rdata_ctx_s {
     lzma_stream                 *lzma_strm;
 #endif
     void                        *strm_buffer;
+    /* scratch buffer that skipped compressed data is decompressed into */
+    void                        *skip_buffer;
+    int                          decompress_threads;
+    rdata_pipeline_t            *pipeline;
+    /* decompressed (or read) data ahead of the parser, for the small reads of
+     * headers, lengths and short strings */
+    char                        *read_buffer;
+    size_t                       read_buffer_pos;
+    size_t                       read_buffer_len;
     rdata_io_t               *io;
     size_t                       bytes_read;
     
@@ -82,15 +131,37 @@ typedef struct rdata_ctx_s {
     unsigned int                 column_class;
 
     iconv_t                      converter;
+    rdata_string_arena_t         string_arena;
 
     int32_t                      dims[MAX_ARRAY_DIMENSIONS];
     bool                         is_dimnames;
+
+    rdata_object_offset_handler  object_offset_handler;
+    rdata_checkpoint_handler     checkpoint_handler;
+    int64_t                      checkpoint_span;
+    int64_t                      last_checkpoint;
+    int64_t                      compressed_read;
+
+    int                          scan_mode;
+    rdata_string_scan_handler    string_scan_handler;
+
+    int                          has_row_window;
+    int64_t                      row_skip;
+    int64_t                      row_limit;
+    int                          row_window_pending;
+
+    int                          has_start_object;
+    int64_t                      start_offset;
+    char * const                *start_atoms;
+    int                          start_atom_count;
+    const rdata_checkpoint_t    *start_checkpoint;
 } rdata_ctx_t;
 
-static int atom_table_add(rdata_atom_table_t *table, char *key);
+static int atom_table_add(rdata_atom_table_t *table, const char *key);
 static char *atom_table_lookup(rdata_atom_table_t *table, int index);
 
 static rdata_error_t read_environment(const char *table_name, rdata_ctx_t *ctx);
+static rdata_error_t read_start_object(rdata_ctx_t *ctx);
 static rdata_error_t read_toplevel_object(const char *table_name, const char *key, rdata_ctx_t *ctx);
 static rdata_error_t read_sexptype_header(rdata_sexptype_info_t *header, rdata_ctx_t *ctx);
 static rdata_error_t read_length(int32_t *outLength, rdata_ctx_t *ctx);
@@ -98,9 +169,13 @@ static rdata_error_t read_string_vector_n(int attributes, int32_t length, rdata_
         void *callback_ctx, rdata_ctx_t *ctx);
 static rdata_error_t read_string_vector(int attributes, rdata_text_value_handler text_value_handler, 
         void *callback_ctx, rdata_ctx_t *ctx);
+static rdata_error_t read_string_vector_window(int attributes, int32_t length, int32_t first, int32_t count,
+        rdata_text_value_handler text_value_handler, void *callback_ctx, rdata_ctx_t *ctx);
+static rdata_error_t read_string_column(int attributes, int32_t length, int32_t first, int32_t count,
+        rdata_ctx_t *ctx);
 static rdata_error_t read_value_vector(rdata_sexptype_header_t header, const char *name, rdata_ctx_t *ctx);
 static rdata_error_t read_value_vector_cb(rdata_sexptype_header_t header, const char *name,
-        rdata_column_handler column_handler, void *user_ctx, rdata_ctx_t *ctx);
+        rdata_column_handler column_handler, int handoff, void *user_ctx, rdata_ctx_t *ctx);
 static rdata_error_t read_character_string(char **key, rdata_ctx_t *ctx);
 static rdata_error_t read_generic_list(int attributes, rdata_ctx_t *ctx);
 static rdata_error_t read_altrep_vector(const char *name, rdata_ctx_t *ctx);
@@ -122,7 +197,7 @@ static void *rdata_realloc(void *buf, size_t len) {
     return realloc(buf, len);
 }
 
-static int atom_table_add(rdata_atom_table_t *table, char *key) {
+static int atom_table_add(rdata_atom_table_t *table, const char *key) {
     table->data = realloc(table->data, sizeof(char *) * (table->count + 1));
     table->data[table->count++] = strdup(key);
     return table->count;
@@ -239,17 +314,45 @@ static ssize_t read_st_compression(rdata_ctx_t *ctx, void *buffer, size_t len) {
 #endif /* HAVE_APPLE_COMPRESSION */
 
 #if HAVE_ZLIB
+/* Called in index mode when inflate stops at a block boundary, uncompressed
+ * is the offset of the boundary in the uncompressed stream. */
+static int z_checkpoint(rdata_ctx_t *ctx, int64_t uncompressed) {
+    unsigned char window[Z_WINDOW_SIZE];
+    uInt window_len = sizeof(window);
+    rdata_checkpoint_t checkpoint;
+
+    if (uncompressed - ctx->last_checkpoint < ctx->checkpoint_span)
+        return 0;
+
+    if (inflateGetDictionary(ctx->z_strm, window, &window_len) != Z_OK)
+        return -1;
+
+    checkpoint.uncompressed_offset = uncompressed;
+    checkpoint.compressed_offset = ctx->compressed_read - ctx->z_strm->avail_in;
+    checkpoint.bits = ctx->z_strm->data_type & 7;
+    checkpoint.window = window;
+    checkpoint.window_len = window_len;
+    ctx->last_checkpoint = uncompressed;
+
+    if (ctx->checkpoint_handler(&checkpoint, ctx->user_ctx))
+        return -1;
+
+    return 0;
+}
+
 static ssize_t read_st_z(rdata_ctx_t *ctx, void *buffer, size_t len) {
     ssize_t bytes_written = 0;
     int error = 0;
     int result = Z_OK;
+    /* in index mode inflate stops at each block boundary */
+    int flush = ctx->checkpoint_handler ? Z_BLOCK : Z_SYNC_FLUSH;
     while (1) {
         long start_out = ctx->z_strm->total_out;
 
         ctx->z_strm->next_out = (unsigned char *)buffer + bytes_written;
         ctx->z_strm->avail_out = len - bytes_written;
 
-        result = inflate(ctx->z_strm, Z_SYNC_FLUSH);
+        result = inflate(ctx->z_strm, flush);
 
         if (result != Z_OK && result != Z_STREAM_END) {
             error = -1;
@@ -261,6 +364,15 @@ static ssize_t read_st_z(rdata_ctx_t *ctx, void *buffer, size_t len) {
         if (result == Z_STREAM_END)
             break;
 
+        /* a block boundary, but not the end of the last block */
+        if (ctx->checkpoint_handler &&
+                (ctx->z_strm->data_type & 128) && !(ctx->z_strm->data_type & 64)) {
+            if (z_checkpoint(ctx, ctx->bytes_read + bytes_written) != 0) {
+                error = -1;
+                break;
+            }
+        }
+
         if (ctx->z_strm->avail_in == 0) {
             int bytes_read = 0;
             bytes_read = ctx->io->read(ctx->strm_buffer, STREAM_BUFFER_SIZE, ctx->io->io_ctx);
@@ -273,6 +385,7 @@ static ssize_t read_st_z(rdata_ctx_t *ctx, void *buffer, size_t len) {
 
             ctx->z_strm->next_in = ctx->strm_buffer;
             ctx->z_strm->avail_in = bytes_read;
+            ctx->compressed_read += bytes_read;
         }
         if (bytes_written == len)
             break;
@@ -332,14 +445,14 @@ static ssize_t read_st_lzma(rdata_ctx_t *ctx, void *buffer, size_t len) {
 }
 #endif /* HAVE_LZMA */
 
-static ssize_t read_st(rdata_ctx_t *ctx, void *buffer, size_t len) {
+/* Decompresses (or reads, for uncompressed files) the next len bytes. */
+static ssize_t read_st_stream(rdata_ctx_t *ctx, void *buffer, size_t len) {
     ssize_t bytes_read = 0;
 
-    if (len == 0)
-        return 0;
-
 #if HAVE_BZIP2
-    if (ctx->bz_strm) {
+    if (ctx->bz_parallel) {
+        bytes_read = rdata_bz_parallel_read(ctx->bz_parallel, buffer, len);
+    } else if (ctx->bz_strm) {
         bytes_read = read_st_bzip2(ctx, buffer, len);
     } else
 #endif
@@ -362,17 +475,206 @@ static ssize_t read_st(rdata_ctx_t *ctx, void *buffer, size_t len) {
         bytes_read = ctx->io->read(buffer, len, ctx->io->io_ctx);
     }
 
-    if (bytes_read > 0) {
-        ctx->bytes_read += bytes_read;
+    return bytes_read;
+}
+
+static int stream_is_compressed(rdata_ctx_t *ctx);
+
+static void *pipeline_thread(void *arg) {
+    rdata_ctx_t *ctx = (rdata_ctx_t *)arg;
+    rdata_pipeline_t *pipeline = ctx->pipeline;
+
+    while (1) {
+        rdata_mutex_lock(&pipeline->lock);
+        while (pipeline->count == PIPELINE_BLOCKS && !pipeline->stop)
+            rdata_cond_wait(&pipeline->emptied, &pipeline->lock);
+        int head = pipeline->head;
+        int stop = pipeline->stop;
+        rdata_mutex_unlock(&pipeline->lock);
+        if (stop)
+            break;
+
+        /* the decompressors fill the block unless the stream ends */
+        ssize_t bytes_read = read_st_stream(ctx, pipeline->blocks[head], PIPELINE_BLOCK_SIZE);
+
+        rdata_mutex_lock(&pipeline->lock);
+        if (bytes_read < 0) {
+            pipeline->error = 1;
+        } else {
+            pipeline->lengths[head] = bytes_read;
+            pipeline->head = (head + 1) % PIPELINE_BLOCKS;
+            pipeline->count++;
+            if (bytes_read < PIPELINE_BLOCK_SIZE)
+                pipeline->eof = 1;
+        }
+        stop = pipeline->error || pipeline->eof;
+        rdata_cond_signal(&pipeline->filled);
+        rdata_mutex_unlock(&pipeline->lock);
+        if (stop)
+            break;
     }
+    return NULL;
+}
 
-    return bytes_read;
+static void stop_pipeline(rdata_ctx_t *ctx) {
+    rdata_pipeline_t *pipeline = ctx->pipeline;
+    int i;
+    if (pipeline == NULL)
+        return;
+
+    rdata_mutex_lock(&pipeline->lock);
+    pipeline->stop = 1;
+    rdata_cond_signal(&pipeline->emptied);
+    rdata_mutex_unlock(&pipeline->lock);
+    rdata_thread_join(pipeline->thread);
+
+    rdata_cond_destroy(&pipeline->filled);
+    rdata_cond_destroy(&pipeline->emptied);
+    rdata_mutex_destroy(&pipeline->lock);
+    for (i=0; i<PIPELINE_BLOCKS; i++)
+        free(pipeline->blocks[i]);
+    free(pipeline);
+    ctx->pipeline = NULL;
 }
 
-static int lseek_st(rdata_ctx_t *ctx, size_t len) {
-    if (0
+/* From here on a background thread decompresses ahead of the parser, if
+ * enabled and the file is compressed. Not in index mode, which needs the
+ * state of the decompressor at each block boundary. */
+static rdata_error_t start_pipeline(rdata_ctx_t *ctx) {
+    rdata_pipeline_t *pipeline = NULL;
+    int i;
+
+    if (ctx->decompress_threads < 2 || ctx->pipeline || ctx->checkpoint_handler || !stream_is_compressed(ctx))
+        return RDATA_OK;
+
+    if ((pipeline = calloc(1, sizeof(rdata_pipeline_t))) == NULL)
+        return RDATA_ERROR_MALLOC;
+    for (i=0; i<PIPELINE_BLOCKS; i++) {
+        if ((pipeline->blocks[i] = malloc(PIPELINE_BLOCK_SIZE)) == NULL)
+            goto error;
+    }
+    rdata_mutex_init(&pipeline->lock);
+    rdata_cond_init(&pipeline->filled);
+    rdata_cond_init(&pipeline->emptied);
+
+    ctx->pipeline = pipeline;
+    if (rdata_thread_create(&pipeline->thread, &pipeline_thread, ctx) != 0) {
+        ctx->pipeline = NULL;
+        rdata_cond_destroy(&pipeline->filled);
+        rdata_cond_destroy(&pipeline->emptied);
+        rdata_mutex_destroy(&pipeline->lock);
+        goto error;
+    }
+    return RDATA_OK;
+
+error:
+    for (i=0; i<PIPELINE_BLOCKS; i++)
+        free(pipeline->blocks[i]);
+    free(pipeline);
+    return RDATA_ERROR_MALLOC;
+}
+
+static ssize_t read_st_pipeline(rdata_ctx_t *ctx, void *buffer, size_t len) {
+    rdata_pipeline_t *pipeline = ctx->pipeline;
+    size_t bytes_copied = 0;
+
+    while (bytes_copied < len) {
+        rdata_mutex_lock(&pipeline->lock);
+        while (pipeline->count == 0 && !pipeline->eof && !pipeline->error)
+            rdata_cond_wait(&pipeline->filled, &pipeline->lock);
+        int count = pipeline->count;
+        int error = pipeline->error;
+        rdata_mutex_unlock(&pipeline->lock);
+        if (count == 0) {
+            if (error)
+                return -1;
+            break;
+        }
+
+        int tail = pipeline->tail;
+        size_t available = pipeline->lengths[tail] - pipeline->pos;
+        size_t chunk = len - bytes_copied < available ? len - bytes_copied : available;
+        memcpy((char *)buffer + bytes_copied, pipeline->blocks[tail] + pipeline->pos, chunk);
+        bytes_copied += chunk;
+        pipeline->pos += chunk;
+
+        if (pipeline->pos == pipeline->lengths[tail]) {
+            rdata_mutex_lock(&pipeline->lock);
+            pipeline->tail = (tail + 1) % PIPELINE_BLOCKS;
+            pipeline->count--;
+            pipeline->pos = 0;
+            rdata_cond_signal(&pipeline->emptied);
+            rdata_mutex_unlock(&pipeline->lock);
+        }
+    }
+
+    return bytes_copied;
+}
+
+static ssize_t read_st_unbuffered(rdata_ctx_t *ctx, void *buffer, size_t len) {
+    if (ctx->pipeline)
+        return read_st_pipeline(ctx, buffer, len);
+
+    return read_st_stream(ctx, buffer, len);
+}
+
+/* With direct access to the input (peek) there is nothing to gain. */
+static int read_buffer_enabled(rdata_ctx_t *ctx) {
+    return ctx->io->peek == NULL || stream_is_compressed(ctx);
+}
+
+static void discard_read_buffer(rdata_ctx_t *ctx) {
+    ctx->read_buffer_pos = 0;
+    ctx->read_buffer_len = 0;
+}
+
+/* Small reads are served from the read buffer, which is refilled a block at
+ * a time once empty, so that the stream below is always at offset bytes_read
+ * when called (index mode checkpoints rely on it). Large reads go to the
+ * stream directly once the buffer is empty. */
+static ssize_t read_st(rdata_ctx_t *ctx, void *buffer, size_t len) {
+    size_t bytes_copied = 0;
+    ssize_t bytes_read = 0;
+
+    while (bytes_copied < len) {
+        size_t available = ctx->read_buffer_len - ctx->read_buffer_pos;
+        if (available) {
+            size_t chunk = len - bytes_copied < available ? len - bytes_copied : available;
+            memcpy((char *)buffer + bytes_copied, ctx->read_buffer + ctx->read_buffer_pos, chunk);
+            ctx->read_buffer_pos += chunk;
+            ctx->bytes_read += chunk;
+            bytes_copied += chunk;
+            continue;
+        }
+
+        if (len - bytes_copied >= READ_BUFFER_SIZE / 2 || !read_buffer_enabled(ctx)) {
+            bytes_read = read_st_unbuffered(ctx, (char *)buffer + bytes_copied, len - bytes_copied);
+            if (bytes_read > 0) {
+                ctx->bytes_read += bytes_read;
+                bytes_copied += bytes_read;
+            }
+            break;
+        }
+
+        if (ctx->read_buffer == NULL && (ctx->read_buffer = malloc(READ_BUFFER_SIZE)) == NULL)
+            return -1;
+        if ((bytes_read = read_st_unbuffered(ctx, ctx->read_buffer, READ_BUFFER_SIZE)) <= 0)
+            break;
+        ctx->read_buffer_pos = 0;
+        ctx->read_buffer_len = bytes_read;
+    }
+
+    if (bytes_copied == 0 && bytes_read < 0)
+        return bytes_read;
+
+    return bytes_copied;
+}
+
+static int stream_is_compressed(rdata_ctx_t *ctx) {
+    return (0
 #if HAVE_BZIP2
             || ctx->bz_strm
+            || ctx->bz_parallel
 #endif
 #if HAVE_APPLE_COMPRESSION
             || ctx->compression_strm
@@ -383,25 +685,64 @@ static int lseek_st(rdata_ctx_t *ctx, size_t len) {
 #if HAVE_LZMA
             || ctx->lzma_strm
 #endif
-            ) {
-        int retval = 0;
-        char *buf = rdata_malloc(len);
-        if (buf == NULL) {
-            retval = -1;
-        } else if (read_st(ctx, buf, len) != len) {
-            retval = -1;
+            );
+}
+
+/* Direct access to the next len bytes of uncompressed input, if the io
+ * supports it (memory mapped or in memory input); NULL otherwise. */
+static const void *peek_st(rdata_ctx_t *ctx, size_t len) {
+    const void *ptr = NULL;
+    if (len == 0 || ctx->io->peek == NULL || stream_is_compressed(ctx))
+        return NULL;
+
+    if ((ptr = ctx->io->peek(len, ctx->io->io_ctx)) != NULL)
+        ctx->bytes_read += len;
+
+    return ptr;
+}
+
+static int lseek_st(rdata_ctx_t *ctx, size_t len) {
+    if (stream_is_compressed(ctx)) {
+        /* decompress into the scratch buffer, whatever the size of the skipped data */
+        if (ctx->skip_buffer == NULL && (ctx->skip_buffer = malloc(SKIP_BUFFER_SIZE)) == NULL)
+            return -1;
+
+        while (len > 0) {
+            size_t chunk = len > SKIP_BUFFER_SIZE ? SKIP_BUFFER_SIZE : len;
+            if (read_st(ctx, ctx->skip_buffer, chunk) != (ssize_t)chunk)
+                return -1;
+            len -= chunk;
         }
-        if (buf)
-            free(buf);
+        return 0;
+    }
 
-        return retval;
+    size_t available = ctx->read_buffer_len - ctx->read_buffer_pos;
+    if (available) {
+        size_t chunk = len < available ? len : available;
+        ctx->read_buffer_pos += chunk;
+        ctx->bytes_read += chunk;
+        len -= chunk;
+        if (len == 0)
+            return 0;
     }
 
-    return ctx->io->seek(len, SEEK_CUR, ctx->io->io_ctx);
+    if (ctx->io->seek(len, SEEK_CUR, ctx->io->io_ctx) == -1)
+        return -1;
+
+    ctx->bytes_read += len;
+    return 0;
 }
 
 static rdata_error_t init_bz_stream(rdata_ctx_t *ctx) {
     rdata_error_t retval = RDATA_OK;
+#if HAVE_BZIP2
+    /* the blocks are decompressed in parallel, except in index mode */
+    if (ctx->decompress_threads > 1 && ctx->checkpoint_handler == NULL) {
+        if ((ctx->bz_parallel = rdata_bz_parallel_init(ctx->io, ctx->decompress_threads)) == NULL)
+            retval = RDATA_ERROR_MALLOC;
+        return retval;
+    }
+#endif
     ctx->strm_buffer = malloc(STREAM_BUFFER_SIZE);
     int bytes_read = ctx->io->read(ctx->strm_buffer, STREAM_BUFFER_SIZE, ctx->io->io_ctx);
     if (bytes_read <= 0) {
@@ -440,6 +781,7 @@ static rdata_error_t init_z_stream(rdata_ctx_t *ctx) {
     ctx->z_strm = calloc(1, sizeof(z_stream));
     ctx->z_strm->next_in = ctx->strm_buffer;
     ctx->z_strm->avail_in = bytes_read;
+    ctx->compressed_read = bytes_read;
 
     if (inflateInit2(ctx->z_strm, (15+32)) != Z_OK) {
         retval = RDATA_ERROR_MALLOC;
@@ -523,12 +865,17 @@ cleanup:
 }
 
 static rdata_error_t reset_stream(rdata_ctx_t *ctx) {
+    discard_read_buffer(ctx);
 #if HAVE_BZIP2
     if (ctx->bz_strm) {
         BZ2_bzDecompressEnd(ctx->bz_strm);
         free(ctx->bz_strm);
         ctx->bz_strm = NULL;
     }
+    if (ctx->bz_parallel) {
+        rdata_bz_parallel_free(ctx->bz_parallel);
+        ctx->bz_parallel = NULL;
+    }
 #endif
 #if HAVE_APPLE_COMPRESSION
     if (ctx->compression_strm) {
@@ -558,6 +905,64 @@ static rdata_error_t reset_stream(rdata_ctx_t *ctx) {
     return init_stream(ctx);
 }
 
+#if HAVE_ZLIB
+/* Restarts the inflation of a gzip stream at a checkpoint taken in index
+ * mode, the deflate data is decoded raw from there. */
+static rdata_error_t resume_z_stream(rdata_ctx_t *ctx, const rdata_checkpoint_t *checkpoint) {
+    unsigned char *input = ctx->strm_buffer;
+    int bytes_read = 0;
+
+    if (inflateReset2(ctx->z_strm, -15) != Z_OK)
+        return RDATA_ERROR_MALLOC;
+    discard_read_buffer(ctx);
+
+    if (ctx->io->seek(checkpoint->compressed_offset - (checkpoint->bits ? 1 : 0),
+                RDATA_SEEK_SET, ctx->io->io_ctx) == -1)
+        return RDATA_ERROR_SEEK;
+
+    bytes_read = ctx->io->read(input, STREAM_BUFFER_SIZE, ctx->io->io_ctx);
+    if (bytes_read <= 0)
+        return RDATA_ERROR_READ;
+
+    ctx->z_strm->next_in = input;
+    ctx->z_strm->avail_in = bytes_read;
+    if (checkpoint->bits) {
+        /* the block starts in the last bits of the previous byte */
+        ctx->z_strm->next_in++;
+        ctx->z_strm->avail_in--;
+        if (inflatePrime(ctx->z_strm, checkpoint->bits, input[0] >> (8 - checkpoint->bits)) != Z_OK)
+            return RDATA_ERROR_PARSE;
+    }
+    if (inflateSetDictionary(ctx->z_strm, checkpoint->window, checkpoint->window_len) != Z_OK)
+        return RDATA_ERROR_PARSE;
+
+    ctx->bytes_read = checkpoint->uncompressed_offset;
+    return RDATA_OK;
+}
+#endif
+
+/* Moves forward to an offset of the uncompressed stream. */
+static rdata_error_t seek_uncompressed(rdata_ctx_t *ctx, int64_t offset) {
+    rdata_error_t retval = RDATA_OK;
+    int64_t remaining = 0;
+#if HAVE_ZLIB
+    const rdata_checkpoint_t *checkpoint = ctx->start_checkpoint;
+    if (ctx->z_strm && checkpoint && checkpoint->uncompressed_offset > (int64_t)ctx->bytes_read &&
+            checkpoint->uncompressed_offset <= offset) {
+        if ((retval = resume_z_stream(ctx, checkpoint)) != RDATA_OK)
+            return retval;
+    }
+#endif
+    if (offset < (int64_t)ctx->bytes_read)
+        return RDATA_ERROR_SEEK;
+
+    remaining = offset - ctx->bytes_read;
+    if (remaining > 0 && lseek_st(ctx, remaining) == -1)
+        return RDATA_ERROR_SEEK;
+
+    return retval;
+}
+
 static rdata_error_t rdata_convert(char *dst, size_t dst_len, const char *src, size_t src_len, iconv_t converter) {
     if (dst_len == 0) {
         return RDATA_ERROR_CONVERT_LONG_STRING;
@@ -608,6 +1013,8 @@ rdata_ctx_t *rdata_ctx_init(rdata_io_t *io, const char *filename) {
 }
 
 void free_rdata_ctx(rdata_ctx_t *ctx) {
+    /* the thread uses the io and the decompressor */
+    stop_pipeline(ctx);
     if (ctx->io) {
         ctx->io->close(ctx->io->io_ctx);
     }
@@ -625,6 +1032,9 @@ void free_rdata_ctx(rdata_ctx_t *ctx) {
         BZ2_bzDecompressEnd(ctx->bz_strm);
         free(ctx->bz_strm);
     }
+    if (ctx->bz_parallel) {
+        rdata_bz_parallel_free(ctx->bz_parallel);
+    }
 #endif
 #if HAVE_APPLE_COMPRESSION
     if (ctx->compression_strm) {
@@ -647,9 +1057,18 @@ void free_rdata_ctx(rdata_ctx_t *ctx) {
     if (ctx->strm_buffer) {
         free(ctx->strm_buffer);
     }
+    if (ctx->skip_buffer) {
+        free(ctx->skip_buffer);
+    }
+    if (ctx->read_buffer) {
+        free(ctx->read_buffer);
+    }
     if (ctx->converter) {
         iconv_close(ctx->converter);
     }
+    free(ctx->string_arena.data);
+    free(ctx->string_arena.offsets);
+    free(ctx->string_arena.validity);
     free(ctx);
 }
 
@@ -672,9 +1091,28 @@ rdata_error_t rdata_parse(rdata_parser_t *parser, const char *filename, void *us
     ctx->row_name_handler = parser->row_name_handler;
     ctx->text_value_handler = parser->text_value_handler;
     ctx->value_label_handler = parser->value_label_handler;
+    ctx->column_class_handler = parser->column_class_handler;
     ctx->dim_handler = parser->dim_handler;
     ctx->dim_name_handler = parser->dim_name_handler;
+    ctx->string_vector_handler = parser->string_vector_handler;
+    ctx->column_filter_handler = parser->column_filter_handler;
     ctx->error_handler = parser->error_handler;
+    ctx->column_data_handoff = parser->column_data_handoff;
+    ctx->object_offset_handler = parser->object_offset_handler;
+    ctx->checkpoint_handler = parser->checkpoint_handler;
+    ctx->checkpoint_span = parser->checkpoint_span;
+    ctx->scan_mode = parser->scan_mode;
+    ctx->string_scan_handler = parser->string_scan_handler;
+    ctx->decompress_threads = parser->decompress_threads;
+    ctx->has_row_window = parser->has_row_window;
+    ctx->row_skip = parser->row_skip;
+    ctx->row_limit = parser->row_limit;
+    ctx->has_start_object = parser->has_start_object;
+    ctx->start_offset = parser->start_offset;
+    ctx->start_atoms = parser->start_atoms;
+    ctx->start_atom_count = parser->start_atom_count;
+    if (parser->has_start_checkpoint)
+        ctx->start_checkpoint = &parser->start_checkpoint;
 
     ctx->is_dimnames = false;
     
@@ -723,6 +1161,19 @@ rdata_error_t rdata_parse(rdata_parser_t *parser, const char *filename, void *us
         }
     }
     
+    if (ctx->has_start_object) {
+        if (!is_rdata) {
+            retval = RDATA_ERROR_PARSE;
+            goto cleanup;
+        }
+        /* the rest of the file is not read */
+        retval = read_start_object(ctx);
+        goto cleanup;
+    }
+
+    if ((retval = start_pipeline(ctx)) != RDATA_OK)
+        goto cleanup;
+
     if (is_rdata) {
         retval = read_environment(NULL, ctx);
     } else {
@@ -748,9 +1199,26 @@ cleanup:
     return retval;
 }
 
+/* Calls the table handler for a new object, skip is set if the handler asks to skip it */
+static rdata_error_t start_table(const char *key, int *skip, rdata_ctx_t *ctx) {
+    int cb_retval = 0;
+
+    *skip = 0;
+    if (ctx->table_handler)
+        cb_retval = ctx->table_handler(key, ctx->user_ctx);
+
+    if (cb_retval == RDATA_HANDLER_SKIP) {
+        *skip = 1;
+    } else if (cb_retval) {
+        return RDATA_ERROR_USER_ABORT;
+    }
+    return RDATA_OK;
+}
+
 static rdata_error_t read_toplevel_object(const char *table_name, const char *key, rdata_ctx_t *ctx) {
     rdata_sexptype_info_t sexptype_info;
     rdata_error_t retval = RDATA_OK;
+    int skip = 0;
     
     if ((retval = read_sexptype_header(&sexptype_info, ctx)) != RDATA_OK)
         goto cleanup;
@@ -758,21 +1226,25 @@ static rdata_error_t read_toplevel_object(const char *table_name, const char *ke
     if (sexptype_info.header.type == RDATA_SEXPTYPE_REAL_VECTOR ||
             sexptype_info.header.type == RDATA_SEXPTYPE_INTEGER_VECTOR ||
             sexptype_info.header.type == RDATA_SEXPTYPE_LOGICAL_VECTOR) {
-        if (table_name == NULL && ctx->table_handler) {
-            if (ctx->table_handler(key, ctx->user_ctx)) {
-                retval = RDATA_ERROR_USER_ABORT;
+        if (table_name == NULL) {
+            if ((retval = start_table(key, &skip, ctx)) != RDATA_OK)
+                goto cleanup;
+            if (skip) {
+                retval = recursive_discard(sexptype_info.header, ctx);
                 goto cleanup;
-            }   
+            }
         }
         
         if ((retval = read_value_vector(sexptype_info.header, key, ctx)) != RDATA_OK)
             goto cleanup;
     } else if (sexptype_info.header.type == RDATA_SEXPTYPE_CHARACTER_VECTOR) {
-        if (table_name == NULL && ctx->table_handler) {
-            if (ctx->table_handler(key, ctx->user_ctx)) {
-                retval = RDATA_ERROR_USER_ABORT;
+        if (table_name == NULL) {
+            if ((retval = start_table(key, &skip, ctx)) != RDATA_OK)
+                goto cleanup;
+            if (skip) {
+                retval = recursive_discard(sexptype_info.header, ctx);
                 goto cleanup;
-            }   
+            }
         }
         int32_t length;
         
@@ -786,13 +1258,14 @@ static rdata_error_t read_toplevel_object(const char *table_name, const char *ke
             }
         }
         
-        if ((retval = read_string_vector_n(sexptype_info.header.attributes, length,
-                        ctx->text_value_handler, ctx->user_ctx, ctx)) != RDATA_OK)
+        if ((retval = read_string_column(sexptype_info.header.attributes, length, 0, length, ctx)) != RDATA_OK)
             goto cleanup;
     } else if (sexptype_info.header.type == RDATA_PSEUDO_SXP_ALTREP) {
-        if (table_name == NULL && ctx->table_handler) {
-            if (ctx->table_handler(key, ctx->user_ctx)) {
-                retval = RDATA_ERROR_USER_ABORT;
+        if (table_name == NULL) {
+            if ((retval = start_table(key, &skip, ctx)) != RDATA_OK)
+                goto cleanup;
+            if (skip) {
+                retval = recursive_discard(sexptype_info.header, ctx);
                 goto cleanup;
             }
         }
@@ -803,13 +1276,13 @@ static rdata_error_t read_toplevel_object(const char *table_name, const char *ke
         if (table_name != NULL) {
             retval = recursive_discard(sexptype_info.header, ctx);
         } else {
-            if (ctx->table_handler) {
-                if (ctx->table_handler(key, ctx->user_ctx)) {
-                    retval = RDATA_ERROR_USER_ABORT;
-                    goto cleanup;
-                }
+            if ((retval = start_table(key, &skip, ctx)) != RDATA_OK)
+                goto cleanup;
+            if (skip) {
+                retval = recursive_discard(sexptype_info.header, ctx);
+            } else {
+                retval = read_generic_list(sexptype_info.header.attributes, ctx);
             }
-            retval = read_generic_list(sexptype_info.header.attributes, ctx);
         }
         if (retval != RDATA_OK)
             goto cleanup;
@@ -823,12 +1296,45 @@ cleanup:
     return retval;
 }
 
+static rdata_error_t read_start_object(rdata_ctx_t *ctx) {
+    rdata_error_t retval = RDATA_OK;
+    rdata_sexptype_info_t sexptype_info;
+    char *key = NULL;
+    int i;
+
+    for (i=0; i<ctx->start_atom_count; i++)
+        atom_table_add(ctx->atom_table, ctx->start_atoms[i]);
+
+    if ((retval = seek_uncompressed(ctx, ctx->start_offset)) != RDATA_OK)
+        goto cleanup;
+
+    if ((retval = start_pipeline(ctx)) != RDATA_OK)
+        goto cleanup;
+
+    if ((retval = read_sexptype_header(&sexptype_info, ctx)) != RDATA_OK)
+        goto cleanup;
+
+    if (sexptype_info.header.type != RDATA_SEXPTYPE_PAIRLIST ||
+            (key = atom_table_lookup(ctx->atom_table, sexptype_info.ref)) == NULL) {
+        retval = RDATA_ERROR_PARSE;
+        goto cleanup;
+    }
+
+    retval = read_toplevel_object(NULL, key, ctx);
+
+cleanup:
+
+    return retval;
+}
+
 static rdata_error_t read_environment(const char *table_name, rdata_ctx_t *ctx) {
     rdata_error_t retval = RDATA_OK;
     char *key = NULL;
     
     while (1) {
         rdata_sexptype_info_t sexptype_info;
+        int64_t offset = ctx->bytes_read;
+        int atom_count = ctx->atom_table->count;
         
         if ((retval = read_sexptype_header(&sexptype_info, ctx)) != RDATA_OK)
             goto cleanup;
@@ -846,6 +1352,20 @@ static rdata_error_t read_environment(const char *table_name, rdata_ctx_t *ctx)
             retval = RDATA_ERROR_PARSE;
             goto cleanup;
         }
+
+        if (ctx->object_offset_handler) {
+            /* index mode */
+            rdata_sexptype_info_t value_info;
+            if (ctx->object_offset_handler(key, offset, ctx->atom_table->data, atom_count, ctx->user_ctx)) {
+                retval = RDATA_ERROR_USER_ABORT;
+                goto cleanup;
+            }
+            if ((retval = read_sexptype_header(&value_info, ctx)) != RDATA_OK)
+                goto cleanup;
+            if ((retval = recursive_discard(value_info.header, ctx)) != RDATA_OK)
+                goto cleanup;
+            continue;
+        }
         
         if ((retval = read_toplevel_object(table_name, key, ctx)) != RDATA_OK)
             goto cleanup;
@@ -932,16 +1452,19 @@ cleanup:
     return retval;
 }
 
-static int handle_class_name(const char *buf, int i, void *ctx) {
-    unsigned int *column_class = (unsigned int *)ctx;
+static int handle_class_name(const char *buf, int i, void *user_ctx) {
+    rdata_ctx_t *ctx = (rdata_ctx_t *)user_ctx;
     if (buf) {
         if (strcmp(buf, "POSIXct") == 0) {
-            *column_class |= RDATA_CLASS_POSIXCT;
+            ctx->column_class |= RDATA_CLASS_POSIXCT;
         }
         if (strcmp(buf, "Date") == 0) {
-            *column_class |= RDATA_CLASS_DATE;
+            ctx->column_class |= RDATA_CLASS_DATE;
         }
     }
+    if (ctx->column_class_handler)
+        return ctx->column_class_handler(buf, i, ctx->user_ctx);
+
     return RDATA_OK;
 }
 
@@ -951,7 +1474,7 @@ static int handle_vector_attribute(char *key, rdata_sexptype_info_t val_info, rd
         retval = read_string_vector(val_info.header.attributes, ctx->value_label_handler, ctx->user_ctx, ctx);
     } else if (strcmp(key, "class") == 0) {
         ctx->column_class = 0;
-        retval = read_string_vector(val_info.header.attributes, &handle_class_name, &ctx->column_class, ctx);
+        retval = read_string_vector(val_info.header.attributes, &handle_class_name, ctx, ctx);
     } else if (strcmp(key, "dim") == 0) {
         if (val_info.header.type == RDATA_SEXPTYPE_INTEGER_VECTOR) {
             int32_t length;
@@ -1042,13 +1565,48 @@ cleanup:
     return retval;
 }
 
+/* The rows of a column of the given length that are in the row window. */
+static void row_window(rdata_ctx_t *ctx, int32_t length, int32_t *first, int32_t *count) {
+    *first = 0;
+    *count = length;
+    if (!ctx->has_row_window)
+        return;
+
+    if (*count < 0)
+        *count = 0;
+    if (ctx->row_skip > 0)
+        *first = ctx->row_skip < *count ? ctx->row_skip : *count;
+    *count -= *first;
+    if (ctx->row_limit >= 0 && ctx->row_limit < *count)
+        *count = ctx->row_limit;
+}
+
+/* read_generic_list marks each column of a data frame as windowed, and the
+ * mark is taken by the first vector read for it, so that the attributes of
+ * the column (levels, class ...) are read in full. */
+static void take_row_window(rdata_ctx_t *ctx, int32_t length, int32_t *first, int32_t *count) {
+    if (ctx->row_window_pending) {
+        ctx->row_window_pending = 0;
+        row_window(ctx, length, first, count);
+    } else {
+        *first = 0;
+        *count = length;
+    }
+}
+
 static int handle_data_frame_attribute(char *key, rdata_sexptype_info_t val_info, rdata_ctx_t *ctx) {
     rdata_error_t retval = RDATA_OK;
     
     if (strcmp(key, "names") == 0 && val_info.header.type == RDATA_SEXPTYPE_CHARACTER_VECTOR) {
         retval = read_string_vector(val_info.header.attributes, ctx->column_name_handler, ctx->user_ctx, ctx);
     } else if (strcmp(key, "row.names") == 0 && val_info.header.type == RDATA_SEXPTYPE_CHARACTER_VECTOR) {
-        retval = read_string_vector(val_info.header.attributes, ctx->row_name_handler, ctx->user_ctx, ctx);
+        int32_t length, first, count;
+        if ((retval = read_length(&length, ctx)) != RDATA_OK)
+            return retval;
+        /* the row names follow the row window of the columns */
+        row_window(ctx, length, &first, &count);
+        retval = read_string_vector_window(val_info.header.attributes, length, first, count,
+                ctx->row_name_handler, ctx->user_ctx, ctx);
     } else if (strcmp(key, "label.table") == 0) {
         retval = recursive_discard(val_info.header, ctx);
     } else {
@@ -1154,20 +1712,24 @@ static rdata_error_t read_compact_intseq(const char *name, rdata_ctx_t *ctx) {
         vals[2] = byteswap_double(vals[2]);
     }
 
+    int32_t first, count;
+    take_row_window(ctx, vals[0], &first, &count);
+
     if (sexptype_info.header.attributes) {
         if ((retval = read_attributes(&handle_vector_attribute, ctx)) != RDATA_OK)
             goto cleanup;
     }
 
     if (ctx->column_handler) {
-        int32_t *integers = rdata_malloc(vals[0] * sizeof(int32_t));
-        int32_t val = vals[1];
-        for (int i=0; i<vals[0]; i++) {
+        int32_t *integers = rdata_malloc(count * sizeof(int32_t));
+        int32_t val = vals[1] + first * vals[2];
+        for (int i=0; i<count; i++) {
             integers[i] = val;
             val += vals[2];
         }
-        int cb_retval = ctx->column_handler(name, RDATA_TYPE_INT32, integers, vals[0], ctx->user_ctx);
-        free(integers);
+        int cb_retval = ctx->column_handler(name, RDATA_TYPE_INT32, integers, count, ctx->user_ctx);
+        if (!ctx->column_data_handoff)
+            free(integers);
         if (cb_retval) {
             retval = RDATA_ERROR_USER_ABORT;
             goto cleanup;
@@ -1189,7 +1751,7 @@ static int deferred_string_handler(const char *name, enum rdata_type_e type, voi
     rdata_ctx_t *ctx = (rdata_ctx_t *)user_ctx;
     if (ctx->column_handler)
         ctx->column_handler(name, RDATA_TYPE_STRING, NULL, length, ctx->user_ctx);
-    if (ctx->text_value_handler) {
+    if (ctx->text_value_handler && !ctx->scan_mode) {
         for (int i=0; i<length; i++) {
             char buf[128] = { 0 };
             if (type == RDATA_TYPE_REAL) {
@@ -1217,7 +1779,7 @@ static rdata_error_t read_deferred_string(const char *name, rdata_ctx_t *ctx) {
     if ((retval = read_sexptype_header(&sexptype_info, ctx)) != RDATA_OK)
         goto cleanup;
 
-    if ((retval = read_value_vector_cb(sexptype_info.header, name, &deferred_string_handler, ctx, ctx)) != RDATA_OK)
+    if ((retval = read_value_vector_cb(sexptype_info.header, name, &deferred_string_handler, 0, ctx, ctx)) != RDATA_OK)
         goto cleanup;
 
     /* alt representation */
@@ -1309,13 +1871,29 @@ static rdata_error_t read_generic_list(int attributes, rdata_ctx_t *ctx) {
     int32_t length;
     int i;
     rdata_sexptype_info_t sexptype_info;
+    /* lists without attributes are not data frames */
+    int windowed = ctx->has_row_window && attributes && !ctx->is_dimnames;
     
     if ((retval = read_length(&length, ctx)) != RDATA_OK)
         goto cleanup;
     
     for (i=0; i<length; i++) {        
+        ctx->row_window_pending = 0;
         if ((retval = read_sexptype_header(&sexptype_info, ctx)) != RDATA_OK)
             goto cleanup;
+
+        if (!ctx->is_dimnames && ctx->column_filter_handler) {
+            int cb_retval = ctx->column_filter_handler(i, ctx->user_ctx);
+            if (cb_retval == RDATA_HANDLER_SKIP) {
+                if ((retval = recursive_discard(sexptype_info.header, ctx)) != RDATA_OK)
+                    goto cleanup;
+                continue;
+            } else if (cb_retval) {
+                retval = RDATA_ERROR_USER_ABORT;
+                goto cleanup;
+            }
+        }
+        ctx->row_window_pending = windowed;
         
         if (sexptype_info.header.type == RDATA_SEXPTYPE_CHARACTER_VECTOR) {
             int32_t vec_length;
@@ -1326,14 +1904,15 @@ static rdata_error_t read_generic_list(int attributes, rdata_ctx_t *ctx) {
                 retval = read_string_vector_n(sexptype_info.header.attributes, vec_length,
                     ctx->dim_name_handler, ctx->user_ctx, ctx);
             } else {
+                int32_t first, count;
+                take_row_window(ctx, vec_length, &first, &count);
                 if (ctx->column_handler) {
-                    if (ctx->column_handler(NULL, RDATA_TYPE_STRING, NULL, vec_length, ctx->user_ctx)) {
+                    if (ctx->column_handler(NULL, RDATA_TYPE_STRING, NULL, count, ctx->user_ctx)) {
                         retval = RDATA_ERROR_USER_ABORT;
                         goto cleanup;
                     }
                 }
-                retval = read_string_vector_n(sexptype_info.header.attributes, vec_length,
-                    ctx->text_value_handler, ctx->user_ctx, ctx);
+                retval = read_string_column(sexptype_info.header.attributes, vec_length, first, count, ctx);
             }
         } else if (sexptype_info.header.type == RDATA_PSEUDO_SXP_ALTREP) {
             retval = read_altrep_vector(NULL, ctx);
@@ -1350,6 +1929,7 @@ static rdata_error_t read_generic_list(int attributes, rdata_ctx_t *ctx) {
         if (retval != RDATA_OK)
             goto cleanup;
     }
+    ctx->row_window_pending = 0;
     
     if (attributes) {
         if ((retval = read_attributes(&handle_data_frame_attribute, ctx)) != RDATA_OK)
@@ -1358,6 +1938,7 @@ static rdata_error_t read_generic_list(int attributes, rdata_ctx_t *ctx) {
     
 cleanup:
 
+    ctx->row_window_pending = 0;
     if (ctx->is_dimnames)
         ctx->is_dimnames = false;
 
@@ -1384,7 +1965,9 @@ cleanup:
     return retval;
 }
 
-static rdata_error_t read_string_vector_n(int attributes, int32_t length,
+/* Reads a character vector of the given length, passing the count elements
+ * from first on to the handler, with the index relative to first. */
+static rdata_error_t read_string_vector_window(int attributes, int32_t length, int32_t first, int32_t count,
         rdata_text_value_handler text_value_handler, void *callback_ctx, rdata_ctx_t *ctx) {
     int32_t string_length;
     rdata_error_t retval = RDATA_OK;
@@ -1410,6 +1993,14 @@ static rdata_error_t read_string_vector_n(int attributes, int32_t length,
 
         if ((retval = read_length(&string_length, ctx)) != RDATA_OK)
             goto cleanup;
+
+        if (i < first || i - first >= count) {
+            if (string_length > 0 && lseek_st(ctx, string_length) == -1) {
+                retval = RDATA_ERROR_SEEK;
+                goto cleanup;
+            }
+            continue;
+        }
         
         if (string_length + 1 > buffer_size) {
             buffer_size = string_length + 1;
@@ -1430,9 +2021,9 @@ static rdata_error_t read_string_vector_n(int attributes, int32_t length,
         if (text_value_handler) {
             int cb_retval = 0;
             if (string_length < 0) {
-                cb_retval = text_value_handler(NULL, i, callback_ctx);
+                cb_retval = text_value_handler(NULL, i - first, callback_ctx);
             } else if (!ctx->converter) {
-                cb_retval = text_value_handler(buffer, i, callback_ctx);
+                cb_retval = text_value_handler(buffer, i - first, callback_ctx);
             } else {
                 if (4*string_length + 1 > utf8_buffer_size) {
                     utf8_buffer_size = 4*string_length + 1;
@@ -1445,7 +2036,7 @@ static rdata_error_t read_string_vector_n(int attributes, int32_t length,
                 if (retval != RDATA_OK)
                     goto cleanup;
 
-                cb_retval = text_value_handler(utf8_buffer, i, callback_ctx);
+                cb_retval = text_value_handler(utf8_buffer, i - first, callback_ctx);
             }
             if (cb_retval) {
                 retval = RDATA_ERROR_USER_ABORT;
@@ -1469,6 +2060,11 @@ cleanup:
     return retval;
 }
 
+static rdata_error_t read_string_vector_n(int attributes, int32_t length,
+        rdata_text_value_handler text_value_handler, void *callback_ctx, rdata_ctx_t *ctx) {
+    return read_string_vector_window(attributes, length, 0, length, text_value_handler, callback_ctx, ctx);
+}
+
 static rdata_error_t read_string_vector(int attributes, rdata_text_value_handler text_value_handler, 
         void *callback_ctx, rdata_ctx_t *ctx) {
     rdata_error_t retval = RDATA_OK;
@@ -1480,15 +2076,207 @@ static rdata_error_t read_string_vector(int attributes, rdata_text_value_handler
     return read_string_vector_n(attributes, length, text_value_handler, callback_ctx, ctx);
 }
 
+static void *string_arena_reserve(void *buf, size_t *capacity, size_t needed) {
+    /* always allocated, a vector of empty strings needs 0 bytes but a valid pointer */
+    if (buf && needed <= *capacity)
+        return buf;
+
+    size_t new_capacity = *capacity ? *capacity : 65536;
+    while (new_capacity < needed)
+        new_capacity *= 2;
+
+    void *new_buf = realloc(buf, new_capacity);
+    if (new_buf)
+        *capacity = new_capacity;
+    return new_buf;
+}
+
+static rdata_error_t read_string_vector_bulk(int attributes, int32_t length, int32_t first, int32_t count,
+        rdata_ctx_t *ctx) {
+    rdata_error_t retval = RDATA_OK;
+    rdata_string_arena_t *arena = &ctx->string_arena;
+    rdata_string_vector_t vector;
+    rdata_sexptype_info_t info;
+    int32_t string_length;
+    size_t data_len = 0;
+    size_t buffer_size = 0;
+    char *buffer = NULL;
+    void *new_buf = NULL;
+    int i, j;
+
+    if (length < 0)
+        length = 0;
+    if (count < 0)
+        count = 0;
+
+    if ((new_buf = string_arena_reserve(arena->offsets, &arena->offsets_capacity,
+                    (count + 1) * sizeof(int64_t))) == NULL) {
+        retval = RDATA_ERROR_MALLOC;
+        goto cleanup;
+    }
+    arena->offsets = new_buf;
+
+    if ((new_buf = string_arena_reserve(arena->validity, &arena->validity_capacity,
+                    count / 8 + 1)) == NULL) {
+        retval = RDATA_ERROR_MALLOC;
+        goto cleanup;
+    }
+    arena->validity = new_buf;
+    memset(arena->validity, 0, count / 8 + 1);
+
+    memset(&vector, 0, sizeof(vector));
+    arena->offsets[0] = 0;
+
+    for (i=0; i<length; i++) {
+        if ((retval = read_sexptype_header(&info, ctx)) != RDATA_OK)
+            goto cleanup;
+
+        if (info.header.type != RDATA_SEXPTYPE_CHARACTER_STRING) {
+            retval = RDATA_ERROR_PARSE;
+            goto cleanup;
+        }
+
+        if ((retval = read_length(&string_length, ctx)) != RDATA_OK)
+            goto cleanup;
+
+        j = i - first;
+        if (j < 0 || j >= count) {
+            if (string_length > 0 && lseek_st(ctx, string_length) == -1) {
+                retval = RDATA_ERROR_SEEK;
+                goto cleanup;
+            }
+            continue;
+        }
+
+        if (string_length < 0) {
+            vector.null_count++;
+        } else {
+            /* with a converter the value is read to a buffer first, and converted into the arena */
+            size_t reserved = ctx->converter ? 4*(size_t)string_length + 1 : (size_t)string_length;
+            if ((new_buf = string_arena_reserve(arena->data, &arena->data_capacity, data_len + reserved)) == NULL) {
+                retval = RDATA_ERROR_MALLOC;
+                goto cleanup;
+            }
+            arena->data = new_buf;
+
+            if (!ctx->converter) {
+                if (read_st(ctx, arena->data + data_len, string_length) != string_length) {
+                    retval = RDATA_ERROR_READ;
+                    goto cleanup;
+                }
+                data_len += string_length;
+            } else {
+                if ((new_buf = string_arena_reserve(buffer, &buffer_size, string_length + 1)) == NULL) {
+                    retval = RDATA_ERROR_MALLOC;
+                    goto cleanup;
+                }
+                buffer = new_buf;
+                if (read_st(ctx, buffer, string_length) != string_length) {
+                    retval = RDATA_ERROR_READ;
+                    goto cleanup;
+                }
+                retval = rdata_convert(arena->data + data_len, reserved, buffer, string_length, ctx->converter);
+                if (retval != RDATA_OK)
+                    goto cleanup;
+                data_len += strlen(arena->data + data_len);
+            }
+            arena->validity[j / 8] |= (1 << (j % 8));
+        }
+        arena->offsets[j+1] = data_len;
+    }
+
+    vector.count = count;
+    vector.data = arena->data;
+    vector.offsets = arena->offsets;
+    vector.validity = arena->validity;
+
+    if (ctx->string_vector_handler(&vector, ctx->user_ctx)) {
+        retval = RDATA_ERROR_USER_ABORT;
+        goto cleanup;
+    }
+
+    if (attributes) {
+        if ((retval = read_attributes(&handle_vector_attribute, ctx)) != RDATA_OK)
+            goto cleanup;
+    }
+
+cleanup:
+    if (buffer)
+        free(buffer);
+
+    return retval;
+}
+
+/* Scan mode: skips the strings, only counting missing values and bytes. */
+static rdata_error_t scan_string_vector(int attributes, int32_t length, rdata_ctx_t *ctx) {
+    rdata_error_t retval = RDATA_OK;
+    rdata_sexptype_info_t info;
+    int32_t string_length;
+    long null_count = 0;
+    int64_t data_size = 0;
+    int i;
+
+    for (i=0; i<length; i++) {
+        if ((retval = read_sexptype_header(&info, ctx)) != RDATA_OK)
+            goto cleanup;
+
+        if (info.header.type != RDATA_SEXPTYPE_CHARACTER_STRING) {
+            retval = RDATA_ERROR_PARSE;
+            goto cleanup;
+        }
+
+        if ((retval = read_length(&string_length, ctx)) != RDATA_OK)
+            goto cleanup;
+
+        if (string_length < 0) {
+            null_count++;
+        } else if (string_length > 0) {
+            if (lseek_st(ctx, string_length) == -1) {
+                retval = RDATA_ERROR_SEEK;
+                goto cleanup;
+            }
+            data_size += string_length;
+        }
+    }
+
+    if (ctx->string_scan_handler) {
+        if (ctx->string_scan_handler(length < 0 ? 0 : length, null_count, data_size, ctx->user_ctx)) {
+            retval = RDATA_ERROR_USER_ABORT;
+            goto cleanup;
+        }
+    }
+
+    if (attributes) {
+        if ((retval = read_attributes(&handle_vector_attribute, ctx)) != RDATA_OK)
+            goto cleanup;
+    }
+
+cleanup:
+
+    return retval;
+}
+
+/* Reads a character vector holding data, as opposed to names, levels etc. */
+static rdata_error_t read_string_column(int attributes, int32_t length, int32_t first, int32_t count,
+        rdata_ctx_t *ctx) {
+    if (ctx->scan_mode)
+        return scan_string_vector(attributes, length, ctx);
+
+    if (ctx->string_vector_handler)
+        return read_string_vector_bulk(attributes, length, first, count, ctx);
+
+    return read_string_vector_window(attributes, length, first, count,
+            ctx->text_value_handler, ctx->user_ctx, ctx);
+}
+
 static rdata_error_t read_value_vector_cb(rdata_sexptype_header_t header, const char *name,
-        rdata_column_handler column_handler, void *user_ctx, rdata_ctx_t *ctx) {
+        rdata_column_handler column_handler, int handoff, void *user_ctx, rdata_ctx_t *ctx) {
     rdata_error_t retval = RDATA_OK;
-    int32_t length;
+    int32_t length, first, count;
     size_t input_elem_size = 0;
     void *vals = NULL;
     size_t buf_len = 0;
     enum rdata_type_e output_data_type;
-    int i;
     
     switch (header.type) {
         case RDATA_SEXPTYPE_REAL_VECTOR:
@@ -1513,7 +2301,13 @@ static rdata_error_t read_value_vector_cb(rdata_sexptype_header_t header, const
     if ((retval = read_length(&length, ctx)) != RDATA_OK)
         goto cleanup;
 
-    buf_len = length * input_elem_size;
+    take_row_window(ctx, length, &first, &count);
+    if (first > 0 && lseek_st(ctx, first * input_elem_size) == -1) {
+        retval = RDATA_ERROR_SEEK;
+        goto cleanup;
+    }
+
+    buf_len = count * input_elem_size;
     
     if (buf_len) {
         vals = rdata_malloc(buf_len);
@@ -1522,25 +2316,32 @@ static rdata_error_t read_value_vector_cb(rdata_sexptype_header_t header, const
             goto cleanup;
         }
         
-        if (read_st(ctx, vals, buf_len) != buf_len) {
-            retval = RDATA_ERROR_READ;
-            goto cleanup;
+        /* with direct access the values are copied (and byteswapped) in one pass
+         * from the input into the destination buffer */
+        const void *src = peek_st(ctx, buf_len);
+        if (src == NULL) {
+            if (read_st(ctx, vals, buf_len) != buf_len) {
+                retval = RDATA_ERROR_READ;
+                goto cleanup;
+            }
+            src = vals;
         }
-        
+
         if (ctx->machine_needs_byteswap) {
             if (input_elem_size == sizeof(double)) {
-                double *d_vals = (double *)vals;
-                for (i=0; i<buf_len/sizeof(double); i++) {
-                    d_vals[i] = byteswap_double(d_vals[i]);
-                }
+                byteswap8_copy(vals, src, buf_len/sizeof(double));
             } else {
-                uint32_t *i_vals = (uint32_t *)vals;
-                for (i=0; i<buf_len/sizeof(uint32_t); i++) {
-                    i_vals[i] = byteswap4(i_vals[i]);
-                }
+                byteswap4_copy(vals, src, buf_len/sizeof(uint32_t));
             }
+        } else if (src != vals) {
+            memcpy(vals, src, buf_len);
         }
     }
+
+    if (length - first - count > 0 && lseek_st(ctx, (length - first - count) * input_elem_size) == -1) {
+        retval = RDATA_ERROR_SEEK;
+        goto cleanup;
+    }
     
     ctx->column_class = 0;
     if (header.attributes) {
@@ -1553,7 +2354,11 @@ static rdata_error_t read_value_vector_cb(rdata_sexptype_header_t header, const
         output_data_type = RDATA_TYPE_DATE;
     
     if (column_handler) {
-        if (column_handler(name, output_data_type, vals, length, user_ctx)) {
+        int cb_retval = column_handler(name, output_data_type, vals, count, user_ctx);
+        /* with handoff the buffer belongs to the handler from now on */
+        if (handoff)
+            vals = NULL;
+        if (cb_retval) {
             retval = RDATA_ERROR_USER_ABORT;
             goto cleanup;
         }
@@ -1566,8 +2371,60 @@ cleanup:
     return retval;
 }
 
+/* Scan mode: the values are skipped, the column handler gets the length only. */
+static rdata_error_t scan_value_vector(rdata_sexptype_header_t header, const char *name, rdata_ctx_t *ctx) {
+    rdata_error_t retval = RDATA_OK;
+    int32_t length;
+    size_t input_elem_size = 0;
+    enum rdata_type_e output_data_type;
+
+    switch (header.type) {
+        case RDATA_SEXPTYPE_REAL_VECTOR:
+            input_elem_size = sizeof(double);
+            output_data_type = RDATA_TYPE_REAL;
+            break;
+        case RDATA_SEXPTYPE_INTEGER_VECTOR:
+            input_elem_size = sizeof(int32_t);
+            output_data_type = RDATA_TYPE_INT32;
+            break;
+        case RDATA_SEXPTYPE_LOGICAL_VECTOR:
+            input_elem_size = sizeof(int32_t);
+            output_data_type = RDATA_TYPE_LOGICAL;
+            break;
+        default:
+            return RDATA_ERROR_PARSE;
+    }
+
+    if ((retval = read_length(&length, ctx)) != RDATA_OK)
+        return retval;
+
+    if (length > 0 && lseek_st(ctx, length * input_elem_size) == -1)
+        return RDATA_ERROR_SEEK;
+
+    ctx->column_class = 0;
+    if (header.attributes) {
+        if ((retval = read_attributes(&handle_vector_attribute, ctx)) != RDATA_OK)
+            return retval;
+    }
+    if (ctx->column_class == RDATA_CLASS_POSIXCT)
+        output_data_type = RDATA_TYPE_TIMESTAMP;
+    if (ctx->column_class == RDATA_CLASS_DATE)
+        output_data_type = RDATA_TYPE_DATE;
+
+    if (ctx->column_handler) {
+        if (ctx->column_handler(name, output_data_type, NULL, length, ctx->user_ctx))
+            return RDATA_ERROR_USER_ABORT;
+    }
+
+    return RDATA_OK;
+}
+
 static rdata_error_t read_value_vector(rdata_sexptype_header_t header, const char *name, rdata_ctx_t *ctx) {
-    return read_value_vector_cb(header, name, ctx->column_handler, ctx->user_ctx, ctx);
+    if (ctx->scan_mode)
+        return scan_value_vector(header, name, ctx);
+
+    return read_value_vector_cb(header, name, ctx->column_handler, ctx->column_data_handoff,
+            ctx->user_ctx, ctx);
 }
 
 static rdata_error_t discard_vector(rdata_sexptype_header_t sexptype_header, size_t element_size, rdata_ctx_t *ctx) {
@@ -1618,6 +2475,21 @@ cleanup:
     return retval;
 }
 
+/* Like discard_character_string, without reading the string */
+static rdata_error_t skip_character_string(rdata_ctx_t *ctx) {
+    int32_t length;
+    rdata_error_t retval = RDATA_OK;
+
+    if ((retval = read_length(&length, ctx)) != RDATA_OK)
+        return retval;
+
+    /* -1 is NA */
+    if (length > 0 && lseek_st(ctx, length) == -1)
+        return RDATA_ERROR_SEEK;
+
+    return retval;
+}
+
 static rdata_error_t discard_pairlist(rdata_sexptype_header_t sexptype_header, rdata_ctx_t *ctx) {
     rdata_sexptype_info_t temp_info;
     rdata_error_t error = 0;
@@ -1715,7 +2587,7 @@ static rdata_error_t recursive_discard(rdata_sexptype_header_t sexptype_header,
                         goto cleanup;
                     }
 
-                    if ((error = discard_character_string(0, ctx)) != RDATA_OK)
+                    if ((error = skip_character_string(ctx)) != RDATA_OK)
                         goto cleanup;
                 } else if ((error = recursive_discard(info.header, ctx)) != RDATA_OK) {
                     goto cleanup;
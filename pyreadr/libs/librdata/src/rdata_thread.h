@@ -0,0 +1,84 @@
+//
+//  rdata_thread.h
+//
+//  Minimal threads, mutexes and condition variables over pthreads or the
+//  Windows API, for the background decompression of compressed files.
+//
+
+#if defined _WIN32 || defined __CYGWIN__
+
+#include <windows.h>
+
+typedef HANDLE              rdata_thread_t;
+typedef SRWLOCK             rdata_mutex_t;
+typedef CONDITION_VARIABLE  rdata_cond_t;
+
+typedef struct rdata_thread_start_s {
+    void *(*start_routine)(void *);
+    void   *arg;
+} rdata_thread_start_t;
+
+static inline DWORD WINAPI rdata_thread_trampoline(LPVOID param) {
+    rdata_thread_start_t start = *(rdata_thread_start_t *)param;
+    free(param);
+    start.start_routine(start.arg);
+    return 0;
+}
+
+static inline int rdata_thread_create(rdata_thread_t *thread, void *(*start_routine)(void *), void *arg) {
+    rdata_thread_start_t *start = malloc(sizeof(rdata_thread_start_t));
+    if (start == NULL)
+        return -1;
+    start->start_routine = start_routine;
+    start->arg = arg;
+    if ((*thread = CreateThread(NULL, 0, rdata_thread_trampoline, start, 0, NULL)) == NULL) {
+        free(start);
+        return -1;
+    }
+    return 0;
+}
+
+static inline void rdata_thread_join(rdata_thread_t thread) {
+    WaitForSingleObject(thread, INFINITE);
+    CloseHandle(thread);
+}
+
+static inline void rdata_mutex_init(rdata_mutex_t *mutex) { InitializeSRWLock(mutex); }
+static inline void rdata_mutex_destroy(rdata_mutex_t *mutex) { (void)mutex; }
+static inline void rdata_mutex_lock(rdata_mutex_t *mutex) { AcquireSRWLockExclusive(mutex); }
+static inline void rdata_mutex_unlock(rdata_mutex_t *mutex) { ReleaseSRWLockExclusive(mutex); }
+
+static inline void rdata_cond_init(rdata_cond_t *cond) { InitializeConditionVariable(cond); }
+static inline void rdata_cond_destroy(rdata_cond_t *cond) { (void)cond; }
+static inline void rdata_cond_wait(rdata_cond_t *cond, rdata_mutex_t *mutex) {
+    SleepConditionVariableSRW(cond, mutex, INFINITE, 0);
+}
+static inline void rdata_cond_signal(rdata_cond_t *cond) { WakeConditionVariable(cond); }
+static inline void rdata_cond_broadcast(rdata_cond_t *cond) { WakeAllConditionVariable(cond); }
+
+#else
+
+#include <pthread.h>
+
+typedef pthread_t       rdata_thread_t;
+typedef pthread_mutex_t rdata_mutex_t;
+typedef pthread_cond_t  rdata_cond_t;
+
+static inline int rdata_thread_create(rdata_thread_t *thread, void *(*start_routine)(void *), void *arg) {
+    return pthread_create(thread, NULL, start_routine, arg) == 0 ? 0 : -1;
+}
+
+static inline void rdata_thread_join(rdata_thread_t thread) { pthread_join(thread, NULL); }
+
+static inline void rdata_mutex_init(rdata_mutex_t *mutex) { pthread_mutex_init(mutex, NULL); }
+static inline void rdata_mutex_destroy(rdata_mutex_t *mutex) { pthread_mutex_destroy(mutex); }
+static inline void rdata_mutex_lock(rdata_mutex_t *mutex) { pthread_mutex_lock(mutex); }
+static inline void rdata_mutex_unlock(rdata_mutex_t *mutex) { pthread_mutex_unlock(mutex); }
+
+static inline void rdata_cond_init(rdata_cond_t *cond) { pthread_cond_init(cond, NULL); }
+static inline void rdata_cond_destroy(rdata_cond_t *cond) { pthread_cond_destroy(cond); }
+static inline void rdata_cond_wait(rdata_cond_t *cond, rdata_mutex_t *mutex) { pthread_cond_wait(cond, mutex); }
+static inline void rdata_cond_signal(rdata_cond_t *cond) { pthread_cond_signal(cond); }
+static inline void rdata_cond_broadcast(rdata_cond_t *cond) { pthread_cond_broadcast(cond); }
+
+#endif
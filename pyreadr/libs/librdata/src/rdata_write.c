@@ -12,6 +12,8 @@
 #define R_ATTRIBUTES    0x04
 
 #define INITIAL_COLUMNS_CAPACITY    100
+/* vectors are byteswapped into this buffer and written a chunk at a time */
+#define SWAP_BUFFER_SIZE            16384UL
 
 #ifdef _WIN32
 #define timegm _mkgmtime
@@ -23,6 +25,7 @@ rdata_writer_t *rdata_writer_init(rdata_data_writer write_callback, rdata_file_f
     writer->bswap = machine_is_little_endian();
     writer->atom_table = ck_hash_table_init(100);
     writer->data_writer = write_callback;
+    writer->output_buffer_size = RDATA_DEFAULT_OUTPUT_BUFFER_SIZE;
 
     writer->columns_capacity = INITIAL_COLUMNS_CAPACITY;
     writer->columns = malloc(writer->columns_capacity * sizeof(rdata_column_t *));
@@ -30,8 +33,7 @@ rdata_writer_t *rdata_writer_init(rdata_data_writer write_callback, rdata_file_f
     return writer;
 }
 
-void rdata_writer_free(rdata_writer_t *writer) {
-    ck_hash_table_free(writer->atom_table);
+void rdata_clear_columns(rdata_writer_t *writer) {
     int i, j;
     for (i=0; i<writer->columns_count; i++) {
         rdata_column_t *column = writer->columns[i];
@@ -41,10 +43,27 @@ void rdata_writer_free(rdata_writer_t *writer) {
         free(column->factor);
         free(column);
     }
+    writer->columns_count = 0;
+}
+
+void rdata_writer_free(rdata_writer_t *writer) {
+    ck_hash_table_free(writer->atom_table);
+    rdata_clear_columns(writer);
     free(writer->columns);
+    free(writer->output_buffer);
     free(writer);
 }
 
+rdata_error_t rdata_set_output_buffer_size(rdata_writer_t *writer, size_t size) {
+    if (writer->output_buffer_len)
+        return RDATA_ERROR_WRITE;
+
+    free(writer->output_buffer);
+    writer->output_buffer = NULL;
+    writer->output_buffer_size = size;
+    return RDATA_OK;
+}
+
 rdata_column_t *rdata_add_column(rdata_writer_t *writer, const char *name, rdata_type_t type) {
     if (writer->columns_count == writer->columns_capacity) {
         writer->columns_capacity *= 2;
@@ -75,6 +94,22 @@ rdata_error_t rdata_column_set_label(rdata_column_t *column, const char *label)
     return RDATA_OK;
 }
 
+rdata_error_t rdata_column_set_ordered(rdata_column_t *column, int ordered) {
+    if (column->type != RDATA_TYPE_INT32)
+        return RDATA_ERROR_FACTOR;
+
+    column->ordered = ordered;
+    return RDATA_OK;
+}
+
+rdata_error_t rdata_column_set_timezone(rdata_column_t *column, const char *timezone) {
+    if (column->type != RDATA_TYPE_TIMESTAMP)
+        return RDATA_ERROR_WRITE;
+
+    snprintf(column->timezone, sizeof(column->timezone), "%s", timezone);
+    return RDATA_OK;
+}
+
 rdata_error_t rdata_column_add_factor(rdata_column_t *column, const char *factor) {
     if (column->type != RDATA_TYPE_INT32)
         return RDATA_ERROR_FACTOR;
@@ -89,15 +124,50 @@ rdata_error_t rdata_column_add_factor(rdata_column_t *column, const char *factor
     return RDATA_OK;
 }
 
-static rdata_error_t rdata_write_bytes(rdata_writer_t *writer, const void *data, size_t len) {
-    size_t bytes_written = writer->data_writer(data, len, writer->user_ctx);
-    if (bytes_written < len) {
+static rdata_error_t rdata_write_direct(rdata_writer_t *writer, const void *data, size_t len) {
+    ssize_t bytes_written = writer->data_writer(data, len, writer->user_ctx);
+    if (bytes_written < 0 || (size_t)bytes_written < len) {
         return RDATA_ERROR_WRITE;
     }
-    writer->bytes_written += bytes_written;
     return RDATA_OK;
 }
 
+rdata_error_t rdata_writer_flush(rdata_writer_t *writer) {
+    size_t len = writer->output_buffer_len;
+
+    if (len == 0)
+        return RDATA_OK;
+
+    writer->output_buffer_len = 0;
+    return rdata_write_direct(writer, writer->output_buffer, len);
+}
+
+static rdata_error_t rdata_write_bytes(rdata_writer_t *writer, const void *data, size_t len) {
+    rdata_error_t retval = RDATA_OK;
+
+    if (writer->output_buffer == NULL && writer->output_buffer_size &&
+            (writer->output_buffer = malloc(writer->output_buffer_size)) == NULL) {
+        writer->output_buffer_size = 0;
+    }
+
+    if (writer->output_buffer_len + len > writer->output_buffer_size) {
+        if ((retval = rdata_writer_flush(writer)) != RDATA_OK)
+            return retval;
+    }
+
+    if (len > writer->output_buffer_size) {
+        /* too big for the buffer, written as it comes */
+        retval = rdata_write_direct(writer, data, len);
+    } else {
+        memcpy(writer->output_buffer + writer->output_buffer_len, data, len);
+        writer->output_buffer_len += len;
+    }
+
+    if (retval == RDATA_OK)
+        writer->bytes_written += len;
+    return retval;
+}
+
 static rdata_error_t rdata_write_integer(rdata_writer_t *writer, int32_t val) {
     if (writer->bswap) {
         val = byteswap4(val);
@@ -112,6 +182,46 @@ static rdata_error_t rdata_write_double(rdata_writer_t *writer, double val) {
     return rdata_write_bytes(writer, &val, sizeof(val));
 }
 
+/* Writes count values of elem_size (4 or 8) bytes in big endian order,
+ * byteswapped straight into the output buffer if there is one. */
+static rdata_error_t rdata_write_values(rdata_writer_t *writer, const void *values, size_t count, size_t elem_size) {
+    const unsigned char *input = (const unsigned char *)values;
+    unsigned char buffer[SWAP_BUFFER_SIZE];
+    rdata_error_t retval = RDATA_OK;
+
+    if (!writer->bswap)
+        return rdata_write_bytes(writer, values, count * elem_size);
+
+    while (count > 0) {
+        unsigned char *output = buffer;
+        size_t capacity = SWAP_BUFFER_SIZE;
+        if (writer->output_buffer && writer->output_buffer_size >= elem_size) {
+            if (writer->output_buffer_size - writer->output_buffer_len < elem_size &&
+                    (retval = rdata_writer_flush(writer)) != RDATA_OK)
+                return retval;
+            output = (unsigned char *)writer->output_buffer + writer->output_buffer_len;
+            capacity = writer->output_buffer_size - writer->output_buffer_len;
+        }
+
+        size_t chunk = count > capacity / elem_size ? capacity / elem_size : count;
+        if (elem_size == sizeof(double)) {
+            byteswap8_copy(output, input, chunk);
+        } else {
+            byteswap4_copy(output, input, chunk);
+        }
+        if (output == buffer) {
+            if ((retval = rdata_write_bytes(writer, buffer, chunk * elem_size)) != RDATA_OK)
+                return retval;
+        } else {
+            writer->output_buffer_len += chunk * elem_size;
+            writer->bytes_written += chunk * elem_size;
+        }
+        input += chunk * elem_size;
+        count -= chunk;
+    }
+    return retval;
+}
+
 static rdata_error_t rdata_write_header(rdata_writer_t *writer, int type, int flags) {
     rdata_sexptype_header_t header;
     memset(&header, 0, sizeof(header));
@@ -304,7 +414,23 @@ static rdata_error_t rdata_end_factor_column(rdata_writer_t *writer, rdata_colum
             goto cleanup;
     }
 
-    retval = rdata_write_class_pairlist(writer, "factor");
+    if (column->ordered) {
+        retval = rdata_write_pairlist_header(writer, "class");
+        if (retval != RDATA_OK)
+            goto cleanup;
+
+        retval = rdata_write_simple_vector_header(writer, RDATA_SEXPTYPE_CHARACTER_VECTOR, 2);
+        if (retval != RDATA_OK)
+            goto cleanup;
+
+        retval = rdata_write_string(writer, "ordered");
+        if (retval != RDATA_OK)
+            goto cleanup;
+
+        retval = rdata_write_string(writer, "factor");
+    } else {
+        retval = rdata_write_class_pairlist(writer, "factor");
+    }
     if (retval != RDATA_OK)
         goto cleanup;
 
@@ -331,6 +457,20 @@ static rdata_error_t rdata_begin_timestamp_column(rdata_writer_t *writer, rdata_
 static rdata_error_t rdata_end_timestamp_column(rdata_writer_t *writer, rdata_column_t *column) {
     rdata_error_t retval = RDATA_OK;
 
+    if (column->timezone[0]) {
+        retval = rdata_write_pairlist_header(writer, "tzone");
+        if (retval != RDATA_OK)
+            goto cleanup;
+
+        retval = rdata_write_simple_vector_header(writer, RDATA_SEXPTYPE_CHARACTER_VECTOR, 1);
+        if (retval != RDATA_OK)
+            goto cleanup;
+
+        retval = rdata_write_string(writer, column->timezone);
+        if (retval != RDATA_OK)
+            goto cleanup;
+    }
+
     retval = rdata_write_class_pairlist(writer, "POSIXct");
     if (retval != RDATA_OK)
         goto cleanup;
@@ -416,6 +556,14 @@ rdata_error_t rdata_append_int32_value(rdata_writer_t *writer, int32_t value) {
     return rdata_write_integer(writer, value);
 }
 
+rdata_error_t rdata_append_real_values(rdata_writer_t *writer, const double *values, int32_t count) {
+    return rdata_write_values(writer, values, count, sizeof(double));
+}
+
+rdata_error_t rdata_append_int32_values(rdata_writer_t *writer, const int32_t *values, int32_t count) {
+    return rdata_write_values(writer, values, count, sizeof(int32_t));
+}
+
 rdata_error_t rdata_append_timestamp_value(rdata_writer_t *writer, time_t value) {
     return rdata_write_double(writer, value);
 }
@@ -535,8 +683,13 @@ cleanup:
 }
 
 rdata_error_t rdata_end_file(rdata_writer_t *writer) {
+    rdata_error_t retval = RDATA_OK;
+
     if (writer->file_format == RDATA_WORKSPACE)
-        return rdata_write_header(writer, RDATA_PSEUDO_SXP_NIL, 0);
+        retval = rdata_write_header(writer, RDATA_PSEUDO_SXP_NIL, 0);
 
-    return RDATA_OK;
+    if (retval == RDATA_OK)
+        retval = rdata_writer_flush(writer);
+
+    return retval;
 }
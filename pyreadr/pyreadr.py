@@ -2,24 +2,66 @@
 @author: Otto Fajardo
 """
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numbers
 import os
+import queue
+import sys
+import threading
+import warnings
 from urllib.request import urlopen
 
 import pandas as pd
 
-from ._pyreadr_parser import PyreadrParser, ListObjectsParser
+from ._pyreadr_parser import PyreadrParser, ListObjectsParser, IndexParser, pyarrow_available
+from ._pyreadr_index import default_index_path, file_fingerprint, read_index, write_index, start_objects
 from ._pyreadr_writer import PyreadrWriter
 from .custom_errors import PyreadrError
 
 
-def read_r(path, use_objects=None, timezone=None):
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+# RData version 2 and 3, and xdr, ascii and native Rds
+_UNCOMPRESSED_MAGIC = (b"RDX2\n", b"RDX3\n", b"X\n", b"A\n", b"B\n")
+
+
+def _is_compressed(path):
+    """
+    Checks the magic bytes of the file for gzip, bzip2 or xz compression
+    """
+    with open(path, "rb") as fhandle:
+        header = fhandle.read(6)
+    return header.startswith(_COMPRESSED_MAGIC)
+
+
+def _source_type(source):
     """
-    Read an R RData or Rds file into pandas data frames
+    Tells if the source given to read_r is the contents of a file in memory ("buffer"), a binary file like object
+    ("fileobj") or a path ("path"). bytes are taken as contents if they start with the magic bytes of a RData or Rds
+    file, as a path otherwise.
+    """
+    if isinstance(source, (bytearray, memoryview)):
+        return "buffer"
+    if isinstance(source, bytes):
+        if source.startswith(_COMPRESSED_MAGIC) or source.startswith(_UNCOMPRESSED_MAGIC):
+            return "buffer"
+        return "path"
+    if hasattr(source, "readinto"):
+        return "fileobj"
+    return "path"
+
+
+def read_r(path, use_objects=None, timezone=None, backend="pandas", use_nullable_dtypes=False, mmap=None,
+           index=None, use_columns=None, nrows=None, skiprows=None, threads=None):
+    """
+    Read an R RData or Rds file into pandas data frames or pyarrow tables
 
     Parameters
     ----------
-        path : str
-            path to the file. The string is assumed to be utf-8 encoded.
+        path : str, bytes, memoryview or file like object
+            path to the file. The string is assumed to be utf-8 encoded. It can also be the contents of the file
+            already in memory (bytes, bytearray or memoryview), which are read in place, or a binary file like object
+            with a readinto method, for example an open file, a BytesIO or a http response. The stream does not need
+            to be seekable. Compressed contents are decompressed on the fly in both cases.
         use_objects : list, optional
             a list with object names to read from the file. Only those objects will be imported. Case sensitive!
         timezone : str, optional
@@ -27,18 +69,331 @@ def read_r(path, use_objects=None, timezone=None):
             R datetimes (POSIXct and POSIXlt) are stored as UTC, but coverted to some timezone (explicitly if set by the
             user or implicitly to local zone) when displaying it in R. librdata cannot recover that timezone information
             therefore timestamps are displayed in UTC, unless this parameter is set.
+        backend : str, optional
+            "pandas" (default) returns pandas data frames. "pyarrow" returns pyarrow tables built directly from
+            the librdata buffers, R NA values become arrow nulls, factors become dictionary arrays, datetimes
+            become timestamp[us, tz] and dates date32. Row names, if present, go to a column named rownames.
+            Arrays with more than 2 dimensions are not supported with this backend. Requires pyarrow.
+        use_nullable_dtypes : bool, optional
+            if True, R integer and logical vectors are read into pandas masked arrays (Int32 and boolean dtypes)
+            where R NA becomes pd.NA. If False (default) vectors with NA values are converted to object dtype with
+            np.nan as missing value. This will become the default in a future version. Only for the pandas backend.
+        mmap : bool, optional
+            if True the file is memory mapped instead of being read with system calls. By default (None) this is done
+            for uncompressed files (saved in R with compress=FALSE), where it is much faster. False disables it.
+            Only for paths.
+        index : str or bool, optional
+            used together with use_objects on RData files. Path to an index built with build_index, or True for the
+            default location (the path of the file with the suffix .pyreadr_index). The objects are then read
+            directly from their position in the file, instead of going through all the objects before them. If the
+            index does not exist or the file has changed since it was built, a warning is issued and the file is
+            read from the beginning.
+        use_columns : list or dict, optional
+            column names to read from data frames, the other columns are skipped without being converted. A list
+            applies to all data frames, a dictionary maps object names to lists of columns, objects not in it are read
+            entirely. Columns keep the order they have in the file, names that are not found are ignored. As column
+            names come after the data in R files, for uncompressed files they are looked up first with a quick scan
+            of the file (see list_objects) and the other columns are skipped. Compressed files and file like objects
+            are read in a single pass instead: all the columns are read, but character vectors are kept undecoded
+            until the names are known and only the selected columns are converted.
+        nrows : int, optional
+            number of rows to read from each object, all by default. For data frames only the needed part of each
+            column (and of the row names) is read, the rest is skipped without being converted, which makes
+            previewing big files cheap. Vectors, matrices and arrays are read entirely and sliced along the first
+            dimension.
+        skiprows : int, optional
+            number of rows to skip at the beginning of each object, none by default.
+        threads : int, optional
+            number of threads for compressed files. With more than one, a background thread decompresses the file
+            while the calling thread parses it, which for bzip2 and xz files, where decompression takes a good part
+            of the time, cuts the reading time. The blocks of bzip2 files are besides decompressed by this number
+            of threads, with two blocks per thread in flight: each thread costs up to about 7MB of memory (900kB
+            of compressed and of decompressed data for each of its blocks, and the bzip2 working memory), so keep
+            it to a few threads. By default (None) everything is done in the calling thread, as with 1.
 
     Returns
     -------
         result : OrderedDict
-            object name as key and pandas data frame as value
+            object name as key and pandas data frame (or pyarrow table) as value
+    """
+
+    parser = _make_parser(use_objects, timezone, backend, use_nullable_dtypes, nrows, skiprows, threads)
+    indexed_objects = None
+    if index and use_objects:
+        indexed_objects = _indexed_objects(path, index, use_objects)
+    if use_columns is not None:
+        _set_use_columns(parser, path, use_columns, use_objects, mmap, indexed_objects)
+    if indexed_objects is None:
+        _parse_source(parser, path, mmap)
+    else:
+        for offset, atoms, checkpoint in indexed_objects:
+            parser.set_start_object(offset, atoms, checkpoint)
+            _parse_path(parser, path, mmap)
+
+    result = OrderedDict()
+    for table_index, table in enumerate(parser.table_data):
+        result[table.name] = _convert_table(table, backend)
+    return result
+
+
+def read_r_iter(path, use_objects=None, timezone=None, backend="pandas", use_nullable_dtypes=False, mmap=None,
+                use_columns=None, nrows=None, skiprows=None, threads=None):
+    """
+    Read an R RData or Rds file object by object. This is a generator that yields each object as soon as librdata
+    has finished parsing it, the file is parsed in a background thread that waits for the object to be consumed
+    before going on with the next one. Therefore only a couple of objects are in memory at a time instead of the whole
+    file, which is useful for very big RData files, for example to convert them to another format.
+
+    Parameters
+    ----------
+        path : str, bytes, memoryview or file like object
+            same as for read_r.
+        use_objects : list, optional
+            a list with object names to read from the file. Only those objects will be yielded. Case sensitive!
+        timezone : str, optional
+            same as for read_r.
+        backend : str, optional
+            same as for read_r.
+        use_nullable_dtypes : bool, optional
+            same as for read_r.
+        mmap : bool, optional
+            same as for read_r.
+        use_columns : list or dict, optional
+            same as for read_r.
+        nrows : int, optional
+            same as for read_r.
+        skiprows : int, optional
+            same as for read_r.
+        threads : int, optional
+            same as for read_r.
+
+    Yields
+    -------
+        object_name, data : tuple
+            the name of the object (None for Rds files) and the pandas data frame (or pyarrow table)
     """
 
+    parser = _make_parser(use_objects, timezone, backend, use_nullable_dtypes, nrows, skiprows, threads)
+    if use_columns is not None:
+        _set_use_columns(parser, path, use_columns, use_objects, mmap)
+    # one object waiting to be consumed at most, so that the parser does not run ahead
+    tables = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                tables.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise _StopParsing()
+
+    def produce():
+        try:
+            parser.set_table_callback(lambda table: put((table.name, _convert_table(table, backend))))
+            _parse_source(parser, path, mmap)
+            parser.finish_table()
+            put(done)
+        except _StopParsing:
+            pass
+        except BaseException as e:
+            try:
+                put(e)
+            except _StopParsing:
+                pass
+
+    producer = threading.Thread(target=produce, name="pyreadr-read_r_iter", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = tables.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+            # do not keep a reference to the object while the next one is parsed
+            item = None
+    finally:
+        stop.set()
+        producer.join()
+
+
+class _StopParsing(Exception):
+    """
+    Raised in the parser thread of read_r_iter when the generator is closed before the end of the file
+    """
+
+
+def _make_parser(use_objects, timezone, backend, use_nullable_dtypes, nrows=None, skiprows=None, threads=None):
+    """
+    Checks the arguments common to read_r and read_r_iter and returns a configured parser
+    """
+
+    if backend not in ("pandas", "pyarrow"):
+        raise PyreadrError("backend must be either 'pandas' or 'pyarrow'")
+    if backend == "pyarrow" and not pyarrow_available:
+        raise PyreadrError("The pyarrow backend needs pyarrow, please install it!")
+    for value, argname in ((nrows, "nrows"), (skiprows, "skiprows")):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, numbers.Integral) or value < 0):
+            raise PyreadrError("{0} must be a non negative integer".format(argname))
+    if threads is not None and (isinstance(threads, bool) or not isinstance(threads, numbers.Integral) or threads < 1):
+        raise PyreadrError("threads must be a positive integer")
+
     parser = PyreadrParser()
     if use_objects:
         parser.set_use_objects(use_objects)
     if timezone:
         parser.set_timezone(timezone)
+    if backend == "pyarrow":
+        parser.set_arrow_strings(True)
+    if use_nullable_dtypes:
+        parser.set_use_nullable_dtypes(True)
+    if threads is not None and threads > 1:
+        parser.set_decompress_threads(int(threads))
+    if nrows is not None or skiprows is not None:
+        parser.set_row_window(int(skiprows or 0), -1 if nrows is None else int(nrows))
+    return parser
+
+
+def _parse_source(parser, path, mmap):
+    """
+    Parses a path, the contents of a file in memory or a file like object
+    """
+
+    source_type = _source_type(path)
+    if source_type == "buffer":
+        parser.parse_buffer(path)
+    elif source_type == "fileobj":
+        parser.parse_fileobj(path)
+    else:
+        _parse_path(parser, path, mmap)
+
+
+def _set_use_columns(parser, path, use_columns, use_objects, mmap, indexed_objects=None):
+    """
+    Column names come after the data in R files. Uncompressed files can be scanned quickly, therefore the names are
+    collected first with a scan that skips the data, and then librdata skips the columns that are not needed. For
+    compressed files and file like objects a second pass would mean decompressing twice, instead all the columns are
+    read in one pass, but character vectors are kept undecoded until the names are known and only the selected
+    columns are converted.
+    """
+
+    if isinstance(use_columns, str) or not isinstance(use_columns, (dict, list, tuple, set)):
+        raise PyreadrError("use_columns must be a list of column names or a dictionary of lists")
+
+    source_type = _source_type(path)
+    if source_type == "buffer":
+        scan = not bytes(memoryview(path).cast("B")[:6]).startswith(_COMPRESSED_MAGIC)
+    elif source_type == "path":
+        filename = os.path.expanduser(path)
+        scan = mmap is not False and os.path.isfile(filename) and not _is_compressed(filename)
+    else:
+        scan = False
+
+    if scan:
+        parser.set_column_selection(_column_selection(path, use_columns, use_objects, mmap, indexed_objects))
+    else:
+        parser.set_use_columns(use_columns)
+
+
+def _column_selection(path, use_columns, use_objects, mmap, indexed_objects):
+    """
+    Collects the column names with a scan of the file and turns the selected names into column positions for each
+    object.
+    """
+
+    parser = ListObjectsParser(use_objects=use_objects)
+    if indexed_objects is not None:
+        for offset, atoms, checkpoint in indexed_objects:
+            parser.start_object = (offset, atoms, checkpoint)
+            _parse_path(parser, path, mmap)
+    else:
+        _parse_source(parser, path, mmap)
+
+    selection = dict()
+    for curobject in parser.object_list:
+        name = curobject["object_name"]
+        columns = use_columns.get(name) if isinstance(use_columns, dict) else use_columns
+        # only data frames have column names
+        if columns is None or not curobject["columns"]:
+            continue
+        columns = set(columns)
+        selection[name] = [pos for pos, colname in enumerate(curobject["columns"]) if colname in columns]
+    return selection
+
+
+def _convert_table(table, backend):
+    if backend == "pyarrow":
+        return table.convert_to_arrow_table()
+    return table.convert_to_pandas_dataframe()
+
+
+def build_index(path, index_path=None, checkpoint_span=8 * 1024 * 1024):
+    """
+    Build an index for a RData file and write it to a sidecar file, so that read_r with use_objects can go straight
+    to the requested objects. The index records the position of each object in the uncompressed data. For gzip
+    compressed files (the R default) it also stores points every checkpoint_span uncompressed bytes where
+    decompression can resume, each takes 32KB. bzip2 and xz files are still decompressed from the beginning up to
+    the object, but the objects before it are not parsed. The index is tied to the size, modification time and a
+    hash of the file, and is ignored if the file changes.
+
+    Parameters
+    ----------
+        path : str
+            path to the RData file.
+        index_path : str, optional
+            path of the index file, by default the path of the RData file with the suffix .pyreadr_index.
+        checkpoint_span : int, optional
+            distance in uncompressed bytes between resume points for gzip files, by default 8MB.
+
+    Returns
+    -------
+        index_path : str
+            the path of the index file.
+    """
+
+    path = os.path.expanduser(path)
+    if not os.path.isfile(path):
+        raise PyreadrError("File {0} does not exist!".format(path))
+    if index_path is None:
+        index_path = default_index_path(path)
+
+    fingerprint = file_fingerprint(path)
+    parser = IndexParser(checkpoint_span)
+    parser.use_mmap = not _is_compressed(path)
+    parser.parse(path)
+    if not parser.objects:
+        raise PyreadrError("No objects found, only RData files can be indexed")
+    write_index(index_path, fingerprint, parser)
+    return index_path
+
+
+def _indexed_objects(path, index, use_objects):
+    """
+    Looks up the objects in the index, returns None if the index cannot be used
+    """
+
+    if _source_type(path) != "path":
+        raise PyreadrError("index can only be used when reading from a path")
+    path = os.path.expanduser(path)
+    if index is True:
+        index_path = default_index_path(path)
+    else:
+        index_path = os.path.expanduser(index)
+    index_data = read_index(index_path, path) if os.path.isfile(path) else None
+    if index_data is None:
+        warnings.warn("The index {0} does not exist or is out of date, reading the whole file".format(index_path))
+        return None
+    return start_objects(index_data, use_objects)
+
+
+def _parse_path(parser, path, mmap):
+    """
+    Parses the file at path, with memory mapping if mmap is True or if it is None and the file is not compressed
+    """
 
     if hasattr(os, 'fsencode'):
         try:
@@ -63,24 +418,68 @@ def read_r(path, use_objects=None, timezone=None):
     filename_bytes = os.path.expanduser(filename_bytes)
     if not os.path.isfile(filename_bytes):
         raise PyreadrError("File {0} does not exist!".format(filename_bytes))
+    if mmap is None:
+        mmap = not _is_compressed(filename_bytes)
+    if mmap:
+        parser.use_mmap = True
     parser.parse(filename_bytes)
 
-    result = OrderedDict()
-    for table_index, table in enumerate(parser.table_data):
-        result[table.name] = table.convert_to_pandas_dataframe()
-    return result
 
+def read_r_many(paths, max_workers=None, return_exceptions=False, **kwargs):
+    """
+    Read several R RData or Rds files in parallel with a pool of threads. The files are decompressed and parsed
+    without holding the GIL, so that threads give a real speedup.
+
+    Parameters
+    ----------
+        paths : list
+            paths to the files. Same as for read_r.
+        max_workers : int, optional
+            maximum number of threads, by default as in concurrent.futures.ThreadPoolExecutor.
+        return_exceptions : bool, optional
+            if False (default) the first error (in input order) is raised. If True, errors are captured and the
+            exception is returned in the place of the result for that file.
+        **kwargs
+            any other argument is passed to read_r. As the files are already read in parallel, threads is 1 unless
+            given.
+
+    Returns
+    -------
+        result : list
+            one result of read_r (an OrderedDict) per file, in the same order as paths.
+    """
 
-def list_objects(path):
+    kwargs.setdefault("threads", 1)
+
+    def read_one(path):
+        try:
+            return read_r(path, **kwargs)
+        except Exception as e:
+            if return_exceptions:
+                return e
+            raise
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_one, paths))
+
+
+def list_objects(path, detailed=False):
     """
     Read an R RData or Rds file and lists objects and their column names.
     Not all objects are readable, and also it is not always possible to read the column names without parsing the
     whole file, in those cases this method will return Nones instead of column names.
+    The data itself is skipped, which makes this much faster than reading the file.
 
     Parameters
     ----------
-        path : str
-            path to the file. The string is assumed to be utf-8 encoded.
+        path : str, bytes, memoryview or file like object
+            path to the file. The string is assumed to be utf-8 encoded. As in read_r, it can also be the contents
+            of the file in memory or a binary file like object.
+        detailed : bool, optional
+            if True, each dictionary also has the keys "nrows" with the number of rows, "dims" with the
+            dimensions of matrices, arrays and tables (None otherwise), "types" and "classes" with the R type
+            (double, integer, logical, character) and class (numeric, factor, Date ...) of each column, and
+            "memory_size" with an estimation in bytes of the memory needed to read the object as a pandas data frame.
 
     Returns
     -------
@@ -89,47 +488,24 @@ def list_objects(path):
             columns with a list of columns.
     """
 
-    parser = ListObjectsParser()
+    parser = ListObjectsParser(detailed)
+    source_type = _source_type(path)
+    if source_type == "buffer":
+        parser.parse_buffer(path)
+        return parser.object_list
+    if source_type == "fileobj":
+        parser.parse_fileobj(path)
+        return parser.object_list
     if not isinstance(path, str):
         raise PyreadrError("path must be a string!")
-    path = os.path.expanduser(path)
-    if not os.path.isfile(path):
-        raise PyreadrError("File {0} does not exist!".format(path))
- 
-    parser.parse(path)
+    _parse_path(parser, path, None)
     return parser.object_list
     
     
-def write_rdata(path, df, df_name="dataset", dateformat="%Y-%m-%d", datetimeformat="%Y-%m-%d %H:%M:%S", compress=None):
+def _write_path(path):
     """
-    Write a single pandas data frame to a rdata file.
-
-    Parameters
-    ----------
-        path : str
-            path to the file. The string is assumed to be utf-8 encoded.
-        df : pandas data frame
-            the dataframe to write
-        df_name : str
-            name for the R dataframe object, cannot be empty string. If 
-            not supplied will default to "dataset"
-        dateformat : str
-            string to format datetime.date objects. 
-            By default "%Y-%m-%d".
-        datetimeformat : str
-            string to format datetime like objects. By default "%Y-%m-%d %H:%M:%S".
+    path to write to as bytes, with the user folder expanded
     """
-    
-    if not df_name:
-        msg = "df_name must be a valid string"
-        raise PyreadrError(msg)
-        
-    if not isinstance(df, pd.DataFrame):
-        msg = "df must be a pandas data frame"
-        raise PyreadrError(msg)
-    
-    file_format = "rdata"
-    writer = PyreadrWriter()
 
     if hasattr(os, 'fsencode'):
         try:
@@ -151,11 +527,66 @@ def write_rdata(path, df, df_name="dataset", dateformat="%Y-%m-%d", datetimeform
             filename_bytes = path.encode('utf-8')
 
     filename_bytes = os.path.expanduser(filename_bytes)
+    return filename_bytes
+
+
+def write_rdata(path, df, df_name="dataset", dateformat="%Y-%m-%d", datetimeformat="%Y-%m-%d %H:%M:%S", compress=None,
+                native_dates=False):
+    """
+    Write a pandas data frame, or several, to a rdata file.
+
+    Parameters
+    ----------
+        path : str
+            path to the file. The string is assumed to be utf-8 encoded.
+        df : pandas data frame or dict
+            the dataframe to write, or a dict with object names as keys and
+            data frames as values to write all of them in the same file, in
+            the order of the dict.
+        df_name : str
+            name for the R dataframe object, cannot be empty string. If 
+            not supplied will default to "dataset". Ignored if df is a dict.
+        dateformat : str
+            string to format datetime.date objects. 
+            By default "%Y-%m-%d".
+        datetimeformat : str
+            string to format datetime like objects. By default "%Y-%m-%d %H:%M:%S".
+        native_dates : bool
+            if True datetime.date columns are written as R Date vectors and datetime64 columns (naive or tz-aware)
+            and datetime.datetime columns as POSIXct vectors with the timezone of the column (UTC for naive ones)
+            in the tzone attribute, instead of strings. dateformat and datetimeformat are then ignored.
+            By default False.
+    """
+    
+    if isinstance(df, dict):
+        if not df:
+            msg = "df must contain at least one data frame"
+            raise PyreadrError(msg)
+        for name, frame in df.items():
+            if not name or not isinstance(name, str):
+                msg = "the keys of df must be valid strings"
+                raise PyreadrError(msg)
+            if not isinstance(frame, pd.DataFrame):
+                msg = "the values of df must be pandas data frames"
+                raise PyreadrError(msg)
+    else:
+        if not df_name:
+            msg = "df_name must be a valid string"
+            raise PyreadrError(msg)
+            
+        if not isinstance(df, pd.DataFrame):
+            msg = "df must be a pandas data frame or a dict of pandas data frames"
+            raise PyreadrError(msg)
+    
+    file_format = "rdata"
+    writer = PyreadrWriter()
+
+    filename_bytes = _write_path(path)
 
-    writer.write_r(filename_bytes, file_format, df, df_name, dateformat, datetimeformat, compress)
+    writer.write_r(filename_bytes, file_format, df, df_name, dateformat, datetimeformat, compress, native_dates)
 
 
-def write_rds(path, df, dateformat="%Y-%m-%d", datetimeformat="%Y-%m-%d %H:%M:%S", compress=None):
+def write_rds(path, df, dateformat="%Y-%m-%d", datetimeformat="%Y-%m-%d %H:%M:%S", compress=None, native_dates=False):
     """
     Write a single pandas data frame to a rds file.
 
@@ -172,6 +603,11 @@ def write_rds(path, df, dateformat="%Y-%m-%d", datetimeformat="%Y-%m-%d %H:%M:%S
             string to format datetime like objects. By default "%Y-%m-%d %H:%M:%S".
         compress : str
             compression to use, defaults to no compression. Only "gzip" supported.
+        native_dates : bool
+            if True datetime.date columns are written as R Date vectors and datetime64 columns (naive or tz-aware)
+            and datetime.datetime columns as POSIXct vectors with the timezone of the column (UTC for naive ones)
+            in the tzone attribute, instead of strings. dateformat and datetimeformat are then ignored.
+            By default False.
     """
     
     if not isinstance(df, pd.DataFrame):
@@ -181,29 +617,85 @@ def write_rds(path, df, dateformat="%Y-%m-%d", datetimeformat="%Y-%m-%d %H:%M:%S
     file_format = "rds"
     df_name = ""   # this is irrelevant in this case, but we need to pass something
     
-    if hasattr(os, 'fsencode'):
-        try:
-            filename_bytes = os.fsencode(path)
-        except UnicodeError:
-            warnings.warn("file path could not be encoded with %s which is set as your system encoding, trying to encode it as utf-8. Please set your system encoding correctly." % sys.getfilesystemencoding())
-            filename_bytes = os.fsdecode(path).encode("utf-8", "surrogateescape")
-    else:
-        if sys.version_info[0]>2:
-            if type(path) == str:
-                filename_bytes = path.encode('utf-8')
-            elif type(path) == bytes:
-                filename_bytes = path
-            else:
-                raise PyreadstatError("path must be either str or bytes")
-        else:
-            if type(path) not in (str, bytes, unicode):
-                raise PyreadstatError("path must be str, bytes or unicode")
-            filename_bytes = path.encode('utf-8')
+    filename_bytes = _write_path(path)
 
-    filename_bytes = os.path.expanduser(filename_bytes)
+    writer = PyreadrWriter()
+    writer.write_r(filename_bytes, file_format, df, df_name, dateformat, datetimeformat, compress, native_dates)
+
+
+def write_rdata_chunks(path, chunks, nrows=None, df_name="dataset", dateformat="%Y-%m-%d",
+                       datetimeformat="%Y-%m-%d %H:%M:%S", compress=None, native_dates=False):
+    """
+    Write a data frame given in chunks of rows to a rdata file, for data frames that do not fit in memory.
+    The chunks are transformed and spilled column by column to temporary files (in the folder given by
+    tempfile.gettempdir()) and written from there, so that only one chunk at a time is held in memory.
+
+    Parameters
+    ----------
+        path : str
+            path to the file. The string is assumed to be utf-8 encoded.
+        chunks : iterable
+            pandas data frames or pyarrow record batches (or tables) with the same columns, the rows of the
+            data frame in order. The columns must give the same R type in all chunks, a chunk where a column
+            has only missing values fits any type.
+        nrows : int
+            total number of rows, if given the chunks are checked to have that many.
+        df_name : str
+            name for the R dataframe object, cannot be empty string. If 
+            not supplied will default to "dataset"
+        dateformat : str
+            string to format datetime.date objects. 
+            By default "%Y-%m-%d".
+        datetimeformat : str
+            string to format datetime like objects. By default "%Y-%m-%d %H:%M:%S".
+        compress : str
+            compression to use, defaults to no compression. Only "gzip" supported.
+        native_dates : bool
+            if True dates and datetimes are written as R Date and POSIXct vectors instead of strings, see write_rds.
+            By default False.
+    """
+
+    if not df_name:
+        msg = "df_name must be a valid string"
+        raise PyreadrError(msg)
+
+    writer = PyreadrWriter()
+    writer.write_r_chunks(_write_path(path), "rdata", chunks, df_name, nrows, dateformat, datetimeformat, compress,
+                          native_dates)
+
+
+def write_rds_chunks(path, chunks, nrows=None, dateformat="%Y-%m-%d", datetimeformat="%Y-%m-%d %H:%M:%S",
+                     compress=None, native_dates=False):
+    """
+    Write a data frame given in chunks of rows to a rds file, for data frames that do not fit in memory.
+    The chunks are transformed and spilled column by column to temporary files (in the folder given by
+    tempfile.gettempdir()) and written from there, so that only one chunk at a time is held in memory.
+
+    Parameters
+    ----------
+        path : str
+            path to the file. The string is assumed to be utf-8 encoded.
+        chunks : iterable
+            pandas data frames or pyarrow record batches (or tables) with the same columns, the rows of the
+            data frame in order. The columns must give the same R type in all chunks, a chunk where a column
+            has only missing values fits any type.
+        nrows : int
+            total number of rows, if given the chunks are checked to have that many.
+        dateformat : str
+            string to format datetime.date objects. 
+            By default "%Y-%m-%d".
+        datetimeformat : str
+            string to format datetime like objects. By default "%Y-%m-%d %H:%M:%S".
+        compress : str
+            compression to use, defaults to no compression. Only "gzip" supported.
+        native_dates : bool
+            if True dates and datetimes are written as R Date and POSIXct vectors instead of strings, see write_rds.
+            By default False.
+    """
 
     writer = PyreadrWriter()
-    writer.write_r(filename_bytes, file_format, df, df_name, dateformat, datetimeformat, compress)
+    writer.write_r_chunks(_write_path(path), "rds", chunks, "", nrows, dateformat, datetimeformat, compress,
+                          native_dates)
 
 def download_file(url, destination_path):
     """
@@ -82,6 +82,7 @@ elif platform.system() == 'Linux':
     libraries.append('z')
     libraries.append('bz2')
     libraries.append('lzma')
+    libraries.append('pthread')
     #extra_compile_args.append("--std=gnu99")
     if is_ubuntu():
         libraries.append('iconv')
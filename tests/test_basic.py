@@ -3,6 +3,8 @@
 """
 import unittest
 import os
+import io
+import bz2
 import datetime
 import warnings
 import shutil
@@ -19,6 +21,13 @@ try:
 except:
     pass
 
+is_pyarrow_available = False
+try:
+    import pyarrow as pa
+    is_pyarrow_available = True
+except:
+    pass
+
 
 class PyReadRBasic(unittest.TestCase):
 
@@ -137,8 +146,10 @@ class PyReadRBasic(unittest.TestCase):
         matstr = np.asarray(["james", "cecil","zoe", "amber", np.nan, "rob"]*2, dtype=object)
         self.mat_str = pd.DataFrame(np.reshape(matstr, (4,3), order='F'))
         # categories
+        # all columns share the factor levels, also those not present in the column
         mat_cat = self.mat_str.copy()
-        self.mat_cat = mat_cat.astype("category")
+        levels = pd.CategoricalDtype(["amber", "cecil", "james", "rob", "zoe"])
+        self.mat_cat = mat_cat.astype(levels)
 
     def test_rdata_basic(self):
 
@@ -202,12 +213,159 @@ class PyReadRBasic(unittest.TestCase):
         res = pyreadr.read_r(rds_path)
         self.assertTrue(self.df1.equals(res[None]))
 
+    def test_rdata_uncompressed(self):
+        # uncompressed files are memory mapped by default
+        rdata_path = os.path.join(self.basic_data_folder, "two_uncompressed.RData")
+        for mmap in (None, True, False):
+            res = pyreadr.read_r(rdata_path, mmap=mmap)
+            self.assertListEqual(list(res.keys()), self.rdata_objects)
+            self.assertTrue(self.df1.equals(res['df1']))
+            self.assertTrue(self.df2.equals(res['df2']))
+        rds_path = os.path.join(self.basic_data_folder, "one_uncompressed.Rds")
+        res = pyreadr.read_r(rds_path)
+        self.assertTrue(self.df1.equals(res[None]))
+
+    def test_rdata_mmap_compressed(self):
+        for fname in ("two.RData", "two_bzip2.RData", "two_xz.RData"):
+            rdata_path = os.path.join(self.basic_data_folder, fname)
+            res = pyreadr.read_r(rdata_path, mmap=True)
+            expected = pyreadr.read_r(rdata_path, mmap=False)
+            self.assertTrue(expected['df1'].equals(res['df1']))
+            self.assertTrue(expected['df2'].equals(res['df2']))
+
+    def test_read_buffer(self):
+        for fname in ("two.RData", "two_bzip2.RData", "two_xz.RData", "two_uncompressed.RData"):
+            rdata_path = os.path.join(self.basic_data_folder, fname)
+            expected = pyreadr.read_r(rdata_path)
+            with open(rdata_path, "rb") as fhandle:
+                contents = fhandle.read()
+            for source in (contents, bytearray(contents), memoryview(contents)):
+                res = pyreadr.read_r(source)
+                self.assertListEqual(list(res.keys()), self.rdata_objects)
+                self.assertTrue(expected['df1'].equals(res['df1']))
+                self.assertTrue(expected['df2'].equals(res['df2']))
+        objects = pyreadr.list_objects(contents)
+        self.assertListEqual([x['object_name'] for x in objects], self.rdata_objects)
+
+    def test_read_fileobj(self):
+
+        class NonSeekableStream(io.RawIOBase):
+            # gives back few bytes at a time and cannot seek, like a socket
+            def __init__(self, contents):
+                self.stream = io.BytesIO(contents)
+            def readable(self):
+                return True
+            def readinto(self, buffer):
+                data = self.stream.read(min(len(buffer), 1000))
+                buffer[:len(data)] = data
+                return len(data)
+
+        for fname in ("two.RData", "two_bzip2.RData", "two_xz.RData", "two_uncompressed.RData"):
+            rdata_path = os.path.join(self.basic_data_folder, fname)
+            expected = pyreadr.read_r(rdata_path)
+            with open(rdata_path, "rb") as fhandle:
+                contents = fhandle.read()
+                fhandle.seek(0)
+                res_file = pyreadr.read_r(fhandle)
+            for res in (res_file, pyreadr.read_r(io.BytesIO(contents)), pyreadr.read_r(NonSeekableStream(contents))):
+                self.assertListEqual(list(res.keys()), self.rdata_objects)
+                self.assertTrue(expected['df1'].equals(res['df1']))
+                self.assertTrue(expected['df2'].equals(res['df2']))
+        with open(os.path.join(self.basic_data_folder, "one.Rds"), "rb") as fhandle:
+            res = pyreadr.read_r(NonSeekableStream(fhandle.read()))
+        self.assertTrue(self.df1.equals(res[None]))
+
+    def test_read_r_iter(self):
+        rdata_path = os.path.join(self.basic_data_folder, "two.RData")
+        res = list(pyreadr.read_r_iter(rdata_path))
+        self.assertListEqual([name for name, df in res], self.rdata_objects)
+        self.assertTrue(self.df1.equals(res[0][1]))
+        self.assertTrue(self.df2.equals(res[1][1]))
+        res = list(pyreadr.read_r_iter(rdata_path, use_objects=self.use_objects))
+        self.assertListEqual([name for name, df in res], self.use_objects)
+        # closing the generator early stops the parser
+        objects = pyreadr.read_r_iter(rdata_path)
+        name, df = next(objects)
+        objects.close()
+        self.assertEqual(name, "df1")
+        rds_path = os.path.join(self.basic_data_folder, "one.Rds")
+        res = list(pyreadr.read_r_iter(rds_path))
+        self.assertEqual(len(res), 1)
+        self.assertIsNone(res[0][0])
+        self.assertTrue(self.df1.equals(res[0][1]))
+        self.assertRaises(pyreadr.PyreadrError, list, pyreadr.read_r_iter("does_not_exist.RData"))
+
+    def test_build_index(self):
+        for fname in ("two.RData", "two_bzip2.RData", "two_uncompressed.RData"):
+            rdata_path = os.path.join(self.basic_data_folder, fname)
+            index_path = os.path.join(self.write_data_folder, fname + ".pyreadr_index")
+            # a checkpoint at every deflate block for gzip
+            res = pyreadr.build_index(rdata_path, index_path, checkpoint_span=1)
+            self.assertEqual(res, index_path)
+            expected = pyreadr.read_r(rdata_path)
+            for objects in (["char"], ["df2", "df1"]):
+                res = pyreadr.read_r(rdata_path, use_objects=objects, index=index_path)
+                self.assertListEqual(sorted(res.keys()), sorted(objects))
+                for name in objects:
+                    self.assertTrue(expected[name].equals(res[name]))
+        # an index for another file is not used
+        rdata_path = os.path.join(self.basic_data_folder, "two_xz.RData")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            res = pyreadr.read_r(rdata_path, use_objects=["char"], index=index_path)
+        self.assertEqual(len(caught), 1)
+        self.assertListEqual(list(res.keys()), ["char"])
+        rds_path = os.path.join(self.basic_data_folder, "one.Rds")
+        self.assertRaises(pyreadr.PyreadrError, pyreadr.build_index, rds_path,
+                          os.path.join(self.write_data_folder, "one.Rds.pyreadr_index"))
+
+    def test_read_r_many(self):
+        paths = [os.path.join(self.basic_data_folder, "one.Rds"),
+                 os.path.join(self.basic_data_folder, "two.RData"),
+                 os.path.join(self.basic_data_folder, "mat_simple.rds")]
+        res = pyreadr.read_r_many(paths, max_workers=2)
+        self.assertEqual(len(res), 3)
+        self.assertTrue(self.df1.equals(res[0][None]))
+        self.assertListEqual(list(res[1].keys()), self.rdata_objects)
+        self.assertTrue(self.df2.equals(res[1]['df2']))
+        self.assertTrue(self.mat_simple.equals(res[2][None]))
+        # kwargs are passed to read_r
+        res = pyreadr.read_r_many(paths[1:2], use_objects=self.use_objects)
+        self.assertListEqual(list(res[0].keys()), self.use_objects)
+
+    def test_read_r_many_errors(self):
+        paths = [os.path.join(self.basic_data_folder, "one.Rds"),
+                 os.path.join(self.basic_data_folder, "does_not_exist.Rds"),
+                 os.path.join(self.basic_data_folder, "basic_dataset.R")]
+        self.assertRaises(pyreadr.PyreadrError, pyreadr.read_r_many, paths)
+        res = pyreadr.read_r_many(paths, return_exceptions=True)
+        self.assertTrue(self.df1.equals(res[0][None]))
+        self.assertIsInstance(res[1], pyreadr.PyreadrError)
+        self.assertIsInstance(res[2], pyreadr.LibrdataError)
+
     def test_list_objects_rdata(self):
 
         rdata_path = os.path.join(self.basic_data_folder, "two.RData")
         res = pyreadr.list_objects(rdata_path)
         self.assertListEqual(self.rdata_objects_description, res)
 
+    def test_list_objects_detailed(self):
+
+        rdata_path = os.path.join(self.basic_data_folder, "two.RData")
+        res = pyreadr.list_objects(rdata_path, detailed=True)
+        self.assertListEqual([x["object_name"] for x in res], ["df1", "df2", "char"])
+        self.assertListEqual(res[0]["columns"], self.rdata_objects_description[0]["columns"])
+        self.assertEqual(res[0]["nrows"], 6)
+        self.assertIsNone(res[0]["dims"])
+        self.assertListEqual(res[0]["types"], ["double", "integer", "character", "integer", "logical", "double", "double"])
+        self.assertListEqual(res[0]["classes"], ["numeric", "integer", "character", "factor", "logical", "POSIXct", "POSIXct"])
+        self.assertTrue(res[0]["memory_size"] > 0)
+        res = pyreadr.list_objects(os.path.join(self.basic_data_folder, "mat_str.rds"), detailed=True)
+        self.assertEqual(res[0]["dims"], (4, 3))
+        self.assertEqual(res[0]["nrows"], 4)
+        res = pyreadr.list_objects(os.path.join(self.basic_data_folder, "factors.rds"), detailed=True)
+        self.assertListEqual(res[0]["classes"], ["ordered", "factor"])
+
     def test_rdata_use_objects(self):
 
         rdata_path = os.path.join(self.basic_data_folder, "two.RData")
@@ -215,6 +373,84 @@ class PyReadRBasic(unittest.TestCase):
         self.assertListEqual(list(res.keys()), self.use_objects)
         self.assertTrue(self.df1.equals(res['df1']))
 
+    def test_rdata_use_objects_skipped(self):
+
+        # the objects before the selected one are skipped by librdata
+        expected = pyreadr.read_r(os.path.join(self.basic_data_folder, "two.RData"))["char"]
+        for filename in ("two_uncompressed.RData", "two_bzip2.RData", "two_xz.RData"):
+            rdata_path = os.path.join(self.basic_data_folder, filename)
+            res = pyreadr.read_r(rdata_path, use_objects=["char"])
+            self.assertListEqual(list(res.keys()), ["char"])
+            self.assertTrue(expected.equals(res["char"]))
+        res = pyreadr.list_objects(os.path.join(self.basic_data_folder, "two_rownames.RData"))
+        self.assertListEqual([x["object_name"] for x in res], ["df1_rownames", "df2", "char"])
+
+    def test_rdata_use_columns(self):
+
+        # uncompressed files are scanned first, compressed ones read in one pass
+        for filename in ("two.RData", "two_uncompressed.RData"):
+            rdata_path = os.path.join(self.basic_data_folder, filename)
+            res = pyreadr.read_r(rdata_path, use_columns=["char", "num", "fac2"])
+            self.assertListEqual(list(res.keys()), ["df1", "df2", "char"])
+            self.assertTrue(self.df1[["num", "char"]].equals(res["df1"]))
+            self.assertListEqual(list(res["df2"].columns), ["fac2"])
+            self.assertListEqual(list(res["char"].columns), ["char"])
+            res = pyreadr.read_r(rdata_path, use_objects=["df1"], use_columns={"df1": ["fac", "tstamp1"]})
+            self.assertTrue(self.df1[["fac", "tstamp1"]].equals(res["df1"]))
+
+    def test_rdata_nrows(self):
+
+        # numpy comparing nans raises a runtimewarning, let's ignore that here
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for filename in ("two.RData", "two_uncompressed.RData"):
+            rdata_path = os.path.join(self.basic_data_folder, filename)
+            res = pyreadr.read_r(rdata_path, nrows=2, skiprows=1)
+            # without NA in the window integer and logical columns keep their numpy dtype
+            pd.testing.assert_frame_equal(self.df1.iloc[1:3].reset_index(drop=True), res["df1"], check_dtype=False)
+            # vectors are sliced too
+            self.assertListEqual(res["char"]["char"].tolist(), ["b", "c"])
+            res = pyreadr.read_r(rdata_path, skiprows=4)
+            self.assertTrue(self.df2.iloc[4:].reset_index(drop=True).equals(res["df2"]))
+        res = pyreadr.read_r(os.path.join(self.basic_data_folder, "two_rownames.RData"), nrows=3)
+        pd.testing.assert_frame_equal(self.df1_rownames.iloc[:3], res["df1_rownames"], check_dtype=False)
+        self.assertRaises(pyreadr.PyreadrError, pyreadr.read_r, rdata_path, nrows=-1)
+
+    def test_read_threads(self):
+
+        # decompression in a background thread gives the same result, and errors as well
+        for filename in ("two.RData", "two_bzip2.RData", "two_xz.RData"):
+            rdata_path = os.path.join(self.basic_data_folder, filename)
+            res = pyreadr.read_r(rdata_path, threads=2)
+            expected = pyreadr.read_r(rdata_path, threads=1)
+            self.assertTrue(expected["df1"].equals(res["df1"]))
+            self.assertTrue(expected["df2"].equals(res["df2"]))
+            with open(rdata_path, "rb") as fhandle:
+                contents = fhandle.read()
+            self.assertRaises(pyreadr.LibrdataError, pyreadr.read_r, contents[:len(contents)//2], threads=2)
+        self.assertRaises(pyreadr.PyreadrError, pyreadr.read_r, rdata_path, threads=0)
+
+    def test_read_bzip2_threads(self):
+
+        # the blocks of bzip2 files decompressed in parallel come out in order
+        rdata_path = os.path.join(self.basic_data_folder, "two_bzip2.RData")
+        res = pyreadr.read_r(rdata_path, threads=4)
+        expected = pyreadr.read_r(rdata_path, threads=1)
+        self.assertTrue(expected["df1"].equals(res["df1"]))
+        self.assertTrue(expected["df2"].equals(res["df2"]))
+        # a file with many blocks, 100kB each at compression level 1
+        rows = 300000
+        df = pd.DataFrame({"num": np.arange(rows) / 7, "char": ["s%d" % (x % 1000) for x in range(rows)]})
+        path = os.path.join(self.write_data_folder, "test_bzip2_threads.RData")
+        pyreadr.write_rdata(path, df, df_name="df")
+        with open(path, "rb") as fhandle:
+            contents = bz2.compress(fhandle.read(), 1)
+        os.remove(path)
+        res = pyreadr.read_r(contents, threads=3)
+        expected = pyreadr.read_r(contents, threads=1)
+        self.assertTrue(expected["df"].equals(res["df"]))
+        self.assertEqual(len(res["df"]), rows)
+        self.assertRaises(pyreadr.LibrdataError, pyreadr.read_r, contents[:len(contents)//2], threads=3)
+
     def test_rdata_tzone(self):
 
         rdata_path = os.path.join(self.basic_data_folder, "tzone.RData")
@@ -248,7 +484,152 @@ class PyReadRBasic(unittest.TestCase):
             os.remove(path)
         pyreadr.write_rds(path, self.df_out)
         self.assertTrue(os.path.isfile(path))
-        
+
+    def test_write_rds_roundtrip(self):
+
+        # columns are written in bulk, missing values included
+        df = pd.DataFrame({"num": [1.5, np.nan, -3.0], "int": pd.array([1, None, 3], dtype="Int32"),
+                           "bool": [True, None, False], "char": ["a", None, "\u00e9\u2713"]})
+        path = os.path.join(self.write_data_folder, "test_roundtrip.Rds")
+        pyreadr.write_rds(path, df)
+        res = pyreadr.read_r(path, use_nullable_dtypes=True)[None]
+        os.remove(path)
+        self.assertListEqual(res["num"].isna().tolist(), [False, True, False])
+        self.assertListEqual(res["num"].dropna().tolist(), [1.5, -3.0])
+        self.assertListEqual(res["int"].astype(object).where(res["int"].notna(), None).tolist(), [1, None, 3])
+        self.assertListEqual(res["bool"].astype(object).where(res["bool"].notna(), None).tolist(), [True, None, False])
+        self.assertListEqual(res["char"].where(res["char"].notna(), None).tolist(), ["a", None, "\u00e9\u2713"])
+
+    def test_write_output_buffer(self):
+
+        # the file is the same whatever the size of the output buffer, 0 being no buffer
+        from pyreadr._pyreadr_writer import PyreadrWriter
+        path = os.path.join(self.write_data_folder, "test_buffer.Rds")
+        default_size = PyreadrWriter().output_buffer_size
+        contents = []
+        for size in (0, 7, default_size):
+            writer = PyreadrWriter(output_buffer_size=size)
+            self.assertEqual(writer.output_buffer_size, size)
+            writer.write_r(path.encode("utf-8"), "rds", self.df_out, "", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", None)
+            with open(path, "rb") as fhandle:
+                contents.append(fhandle.read())
+        os.remove(path)
+        self.assertEqual(contents[0], contents[1])
+        self.assertEqual(contents[0], contents[2])
+        self.assertRaises(pyreadr.PyreadrError, PyreadrWriter, output_buffer_size=-1)
+
+    def test_write_column_types(self):
+
+        from pyreadr._pyreadr_writer import get_pyreadr_column_types
+        df = pd.DataFrame({"str": ["a", "b"], "strna": ["a", None], "allna": pd.Series([None, np.nan], dtype=object),
+                           "pyfloat": pd.Series([1.5, None], dtype=object), "mixed": pd.Series([1, "a"], dtype=object),
+                           "date": [datetime.date(2020, 1, 1), None], "cat": pd.Categorical(["a", None]),
+                           "string": pd.array(["a", None], dtype="string"),
+                           "boolean": pd.array([True, None], dtype="boolean")})
+        columns = {"str": "CHARACTER", "strna": "CHARACTER", "allna": "LOGICAL", "pyfloat": "NUMERIC",
+                   "mixed": "OBJECT", "date": "DATE", "cat": "FACTOR", "string": "CHARACTER", "boolean": "LOGICAL"}
+        missing = [False, True, True, True, False, True, True, True, True]
+        if is_pyarrow_available:
+            df["arrow_str"] = pd.array(["a", None], dtype=pd.ArrowDtype(pa.string()))
+            df["arrow_int"] = pd.array([1, None], dtype=pd.ArrowDtype(pa.int16()))
+            columns.update({"arrow_str": "CHARACTER", "arrow_int": "INTEGER"})
+            missing.extend([True, True])
+        types, has_missing = get_pyreadr_column_types(df)
+        self.assertDictEqual(dict(types), columns)
+        self.assertListEqual(has_missing, missing)
+        path = os.path.join(self.write_data_folder, "test_types.Rds")
+        pyreadr.write_rds(path, df)
+        res = pyreadr.read_r(path)[None]
+        os.remove(path)
+        self.assertListEqual(res["boolean"].tolist()[:1], [True])
+        self.assertTrue(res["string"].isna().tolist()[1])
+        if is_pyarrow_available:
+            self.assertListEqual(res["arrow_int"].tolist()[:1], [1])
+
+    def test_write_native_dates(self):
+
+        # dates and datetimes as R Date and POSIXct vectors instead of strings
+        naive = pd.to_datetime([datetime.datetime(2020, 1, 2, 3, 4, 5), None])
+        df = pd.DataFrame({"naive": naive, "tz": naive.tz_localize("Europe/Berlin"),
+                           "objdt": pd.Series([datetime.datetime(1960, 1, 2, 3, 4, 5), None], dtype=object),
+                           "date": [datetime.date(2020, 1, 2), None],
+                           "olddate": [datetime.date(1000, 3, 1), datetime.date(1969, 12, 31)]})
+        path = os.path.join(self.write_data_folder, "test_native_dates.Rds")
+        pyreadr.write_rds(path, df, native_dates=True)
+        with open(path, "rb") as fhandle:
+            content = fhandle.read()
+        res = pyreadr.read_r(path)[None]
+        os.remove(path)
+        self.assertIn(b"POSIXct", content)
+        self.assertIn(b"Europe/Berlin", content)
+        self.assertListEqual(res["naive"].tolist()[:1], [pd.Timestamp("2020-01-02 03:04:05")])
+        self.assertListEqual(res["tz"].tolist()[:1], [pd.Timestamp("2020-01-02 02:04:05")])
+        self.assertListEqual(res["objdt"].tolist()[:1], [pd.Timestamp("1960-01-02 03:04:05")])
+        self.assertTrue(res["naive"].isna().tolist()[1])
+        self.assertListEqual(res["date"].tolist(), [datetime.date(2020, 1, 2), None])
+        self.assertListEqual(res["olddate"].tolist(), [datetime.date(1000, 3, 1), datetime.date(1969, 12, 31)])
+        # units other than ns, outside the range of datetime64[ns]
+        old = pd.DataFrame({"ms": np.array(["1600-01-01T12:00:00.250", "NaT"], dtype="datetime64[ms]")})
+        pyreadr.write_rds(path, old, native_dates=True)
+        with open(path, "rb") as fhandle:
+            content = fhandle.read()
+        os.remove(path)
+        self.assertIn(np.array([-11676052799.75], dtype=">f8").tobytes(), content)
+
+    def test_write_factors(self):
+
+        # categories with string levels are written as factors, codes and levels
+        df = pd.DataFrame({"fac": pd.Categorical(["b", None, "a", "b"], categories=["b", "a", "unused"]),
+                           "ord": pd.Categorical(["lo", "hi", "lo", None], categories=["lo", "hi"], ordered=True),
+                           "int": pd.Categorical([1, 2, 1, 2])})
+        path = os.path.join(self.write_data_folder, "test_factors.Rds")
+        pyreadr.write_rds(path, df)
+        res = pyreadr.read_r(path)[None]
+        os.remove(path)
+        self.assertListEqual(list(res["fac"].cat.categories), ["b", "a", "unused"])
+        self.assertListEqual(res["fac"].cat.codes.tolist(), [0, -1, 1, 0])
+        self.assertFalse(res["fac"].cat.ordered)
+        self.assertListEqual(list(res["ord"].cat.categories), ["lo", "hi"])
+        self.assertListEqual(res["ord"].cat.codes.tolist(), [0, 1, 0, -1])
+        self.assertTrue(res["ord"].cat.ordered)
+        # other categories keep the type of the levels
+        self.assertListEqual(res["int"].tolist(), [1, 2, 1, 2])
+
+    def test_write_rdata_many(self):
+
+        frames = {"df_out": self.df_out, "df2": self.df2, "empty": pd.DataFrame()}
+        path = os.path.join(self.write_data_folder, "test_many.RData")
+        pyreadr.write_rdata(path, frames)
+        res = pyreadr.read_r(path)
+        single = os.path.join(self.write_data_folder, "test_single.RData")
+        pyreadr.write_rdata(single, self.df2, df_name="df2")
+        res_single = pyreadr.read_r(single)
+        os.remove(path)
+        os.remove(single)
+        self.assertListEqual(list(res.keys()), ["df_out", "df2", "empty"])
+        self.assertTrue(res["df2"].equals(res_single["df2"]))
+        self.assertEqual(res["df_out"].shape, self.df_out.shape)
+        self.assertEqual(res["empty"].shape, (0, 0))
+        self.assertRaises(pyreadr.PyreadrError, pyreadr.write_rdata, path, {"a": self.df2, "b": [1]})
+
+    def test_write_rds_chunks(self):
+
+        df = pd.DataFrame({"num": [1.5, np.nan, 3.0, 4.0], "int": np.array([1, 2, 3, 4], dtype=np.int32),
+                           "chr": pd.Series([None, None, "b", "ñ"], dtype=object),
+                           "fac": pd.Categorical(["a", "b", "a", None])})
+        chunks = [df.iloc[:2], df.iloc[2:2], df.iloc[2:]]
+        path = os.path.join(self.write_data_folder, "test_chunks.rds")
+        single = os.path.join(self.write_data_folder, "test_single.rds")
+        pyreadr.write_rds_chunks(path, iter(chunks), nrows=4)
+        pyreadr.write_rds(single, df)
+        with open(path, "rb") as chunked_file, open(single, "rb") as single_file:
+            self.assertEqual(chunked_file.read(), single_file.read())
+        self.assertRaises(pyreadr.PyreadrError, pyreadr.write_rds_chunks, path, chunks, nrows=3)
+        other = df.iloc[2:].assign(int=lambda x: x["int"].astype("str"))
+        self.assertRaises(pyreadr.PyreadrError, pyreadr.write_rds_chunks, path, [df.iloc[:2], other])
+        os.remove(path)
+        os.remove(single)
+
     def test_rdata_international_win(self):
 
         rdata_path = os.path.join(self.basic_data_folder, "international.Rdata")
@@ -277,6 +658,17 @@ class PyReadRBasic(unittest.TestCase):
         res = pyreadr.read_r(rdata_path)
         self.assertTrue(self.df_dates.equals(res[None]))
         
+    def test_rds_dates_fractional(self):
+
+        # fractional days are the day they start in, as in R, also before 1970
+        expected = [datetime.date(1969, 12, 31), datetime.date(1970, 1, 1), datetime.date(1969, 12, 30), None]
+        rds_path = os.path.join(self.basic_data_folder, "dates_fractional.rds")
+        res = pyreadr.read_r(rds_path, backend="pandas")
+        self.assertListEqual(res[None]["d"].tolist(), expected)
+        if is_pyarrow_available:
+            res = pyreadr.read_r(rds_path, backend="pyarrow")
+            self.assertListEqual(res[None].column("d").to_pylist(), expected)
+
     def test_rds_expanduser(self):
 
         rds_path = os.path.join(self.basic_data_folder, "one.Rds")
@@ -491,6 +883,92 @@ class PyReadRBasic(unittest.TestCase):
         df = res[None]
         self.assertTrue(df.equals(self.mat_cat))
 
+    def test_factors_ordered(self):
+        path = os.path.join(self.basic_data_folder, "factors.rds")
+        df = pyreadr.read_r(path)[None]
+        ordered = pd.Categorical(["low", "high", np.nan, "mid"], categories=["low", "mid", "high", "unused"],
+                                 ordered=True)
+        unordered = pd.Categorical(["b", "a", "b", "a"], categories=["b", "a"])
+        self.assertTrue(df['ord'].cat.ordered)
+        self.assertFalse(df['unord'].cat.ordered)
+        self.assertTrue(df['ord'].equals(pd.Series(ordered, name='ord')))
+        self.assertTrue(df['unord'].equals(pd.Series(unordered, name='unord')))
+
+    def test_rds_nullable_dtypes(self):
+        rds_path = os.path.join(self.basic_data_folder, "one.Rds")
+        df = pyreadr.read_r(rds_path, use_nullable_dtypes=True)[None]
+        self.assertEqual(df['int'].dtype, pd.Int32Dtype())
+        self.assertEqual(df['log'].dtype, pd.BooleanDtype())
+        expected_int = pd.array([1, 2, 3, None, None, None], dtype="Int32")
+        expected_log = pd.array([True, True, False, True, False, None], dtype="boolean")
+        self.assertTrue(df['int'].array.equals(expected_int))
+        self.assertTrue(df['log'].array.equals(expected_log))
+        # the rest is not affected
+        self.assertTrue(df['num'].equals(self.df1['num']))
+        self.assertTrue(df['fac'].equals(self.df1['fac']))
+
+    def test_matrix_nullable_dtypes(self):
+        path = os.path.join(self.basic_data_folder, "mat_na.rds")
+        df = pyreadr.read_r(path, use_nullable_dtypes=True)[None]
+        expected = self.mat_nan.astype("Int32")
+        self.assertTrue(df.equals(expected))
+        path = os.path.join(self.basic_data_folder, "mat_rowcolnames.rds")
+        df = pyreadr.read_r(path, use_nullable_dtypes=True)[None]
+        self.assertTrue(df.equals(self.mat_rowcolnames.astype("Int32")))
+
+    # pyarrow backend
+    @unittest.skipUnless(is_pyarrow_available, "pyarrow not installed")
+    def test_rdata_pyarrow(self):
+        rdata_path = os.path.join(self.basic_data_folder, "two.RData")
+        res = pyreadr.read_r(rdata_path, backend="pyarrow")
+        self.assertListEqual(list(res.keys()), self.rdata_objects)
+        table = res['df1']
+        self.assertEqual(table.schema.field('num').type, pa.float64())
+        self.assertEqual(table.schema.field('int').type, pa.int32())
+        self.assertEqual(table.schema.field('log').type, pa.bool_())
+        self.assertEqual(table.schema.field('tstamp1').type, pa.timestamp('us', tz='UTC'))
+        self.assertTrue(pa.types.is_dictionary(table.schema.field('fac').type))
+        # R NA becomes null, but NaN stays NaN
+        self.assertEqual(table.column('num').to_pylist()[4], None)
+        self.assertTrue(np.isnan(table.column('num').to_pylist()[5]))
+        self.assertListEqual(table.column('int').to_pylist(), [1, 2, 3, None, None, None])
+        self.assertListEqual(table.column('char').to_pylist(), ['a', 'b', 'c', 'a', '', None])
+        self.assertListEqual(table.column('fac').to_pylist(), ['james', 'cecil', 'zoe', 'amber', None, 'rob'])
+        self.assertListEqual(table.column('log').to_pylist(), [True, True, False, True, False, None])
+        df2 = res['df2'].to_pandas()
+        df2['fac2'] = df2['fac2'].astype(str).astype('category')
+        self.assertTrue(np.array_equal(df2['int2'].values, self.df2['int2'].values))
+        self.assertListEqual(df2['char2'].tolist(), self.df2['char2'].tolist())
+        self.assertListEqual(df2['fac2'].tolist(), self.df2['fac2'].tolist())
+
+    @unittest.skipUnless(is_pyarrow_available, "pyarrow not installed")
+    def test_dates_rownames_pyarrow(self):
+        res = pyreadr.read_r(os.path.join(self.basic_data_folder, "dates.rds"), backend="pyarrow")
+        dates = res[None].column('d').to_pylist()
+        self.assertListEqual(dates, self.df_dates['d'].tolist())
+        res = pyreadr.read_r(os.path.join(self.basic_data_folder, "two_rownames.RData"), backend="pyarrow")
+        self.assertListEqual(res['df1_rownames'].column('rownames').to_pylist(), ['A', 'B', 'C', 'D', 'E', 'F'])
+
+    @unittest.skipUnless(is_pyarrow_available, "pyarrow not installed")
+    def test_matrix_pyarrow(self):
+        path = os.path.join(self.basic_data_folder, "mat_rowcolnames.rds")
+        table = pyreadr.read_r(path, backend="pyarrow")[None]
+        self.assertListEqual(table.column_names, ['rownames', 'V1', 'V2', 'V3'])
+        df = table.to_pandas().set_index('rownames')
+        df.index.name = None
+        self.assertTrue(df.equals(self.mat_rowcolnames))
+        path = os.path.join(self.basic_data_folder, "array_3d.rds")
+        self.assertRaises(pyreadr.PyreadrError, pyreadr.read_r, path, backend="pyarrow")
+
+    @unittest.skipUnless(is_pyarrow_available, "pyarrow not installed")
+    def test_factors_ordered_pyarrow(self):
+        path = os.path.join(self.basic_data_folder, "factors.rds")
+        table = pyreadr.read_r(path, backend="pyarrow")[None]
+        self.assertTrue(table.schema.field('ord').type.ordered)
+        self.assertFalse(table.schema.field('unord').type.ordered)
+        self.assertListEqual(table.column('ord').to_pylist(), ["low", "high", None, "mid"])
+        self.assertListEqual(table.column('ord').chunk(0).dictionary.to_pylist(), ["low", "mid", "high", "unused"])
+
  
 if __name__ == '__main__':
 